@@ -0,0 +1,178 @@
+"""
+Keyset (Cursor) Pagination
+Shared paging for list endpoints. Pages are positioned with a row-value
+comparison on (sort key, id) instead of OFFSET, and the position is handed
+to the client as an opaque cursor. Totals are optional: exact, estimated
+(planner statistics / short-lived cached counts) or skipped.
+"""
+import base64
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, func, text, tuple_, literal, desc, type_coerce, String, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+# Seconds an "estimate" count computed with COUNT(*) is reused
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "60"))
+COUNT_CACHE_SIZE = 512
+
+_count_cache: Dict[Tuple, Tuple[float, int]] = {}
+
+
+# ----------------------------------------------------------------------
+# Cursors
+# ----------------------------------------------------------------------
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Inverse of encode_cursor. Raises 400 on anything malformed."""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        return sort_value, row_id
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# ----------------------------------------------------------------------
+# Pages
+# ----------------------------------------------------------------------
+
+async def fetch_page(
+    session: AsyncSession,
+    stmt,
+    *,
+    sort_key,
+    id_column,
+    descending: bool = True,
+    cursor: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 20,
+    scalars: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Runs `stmt` (filters applied, no ORDER BY/LIMIT) ordered by (sort_key, id_column).
+
+    With `cursor` the page starts right after that position (`page` is ignored);
+    without it, `page` is applied as an OFFSET so numbered pagers keep working.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    `scalars=True` returns the first selected entity per row, else the row tuple.
+    """
+    # On SQLite, datetimes written by server defaults ("2025-01-01 10:00:00") and by
+    # Python ("2025-01-01 10:00:00.000000") compare as text, so the cursor carries
+    # the stored text itself. type_coerce changes no SQL; indexes still apply.
+    if session.bind.dialect.name == "sqlite" and isinstance(getattr(sort_key, "type", None), DateTime):
+        sort_key = type_coerce(sort_key, String)
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if isinstance(last_value, str) and isinstance(sort_key.type, String):
+            last_value = literal(last_value, String)
+        position = tuple_(sort_key, id_column)
+        stmt = stmt.where(position < tuple_(last_value, last_id) if descending else position > tuple_(last_value, last_id))
+    elif page > 1:
+        stmt = stmt.offset((page - 1) * page_size)
+
+    if descending:
+        stmt = stmt.order_by(desc(sort_key), desc(id_column))
+    else:
+        stmt = stmt.order_by(sort_key, id_column)
+
+    # The key of the last row becomes the next cursor
+    stmt = stmt.add_columns(sort_key.label("_keyset_value"), id_column.label("_keyset_id")).limit(page_size)
+    rows = (await session.execute(stmt)).all()
+
+    items = [row[0] if scalars else tuple(row[:-2]) for row in rows]
+    next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1]) if len(rows) == page_size else None
+    return items, next_cursor
+
+
+async def iter_chunks(
+    stmt,
+    *,
+    sort_key,
+    id_column,
+    descending: bool = True,
+    cursor: Optional[str] = None,
+    chunk_size: int = 1000,
+    scalars: bool = False
+) -> AsyncIterator[Tuple[List[Any], Optional[str]]]:
+    """
+    Walks `stmt` in keyset order, yielding (items, next_cursor) per chunk.
+    Each chunk uses its own short-lived session, so no connection is held while
+    the caller writes; next_cursor lets an interrupted walk resume where it stopped.
+    """
+    while True:
+        async with AsyncSessionLocal() as session:
+            items, cursor = await fetch_page(
+                session, stmt, sort_key=sort_key, id_column=id_column, descending=descending,
+                cursor=cursor, page_size=chunk_size, scalars=scalars
+            )
+        if items:
+            yield items, cursor
+        if cursor is None:
+            break
+
+
+# ----------------------------------------------------------------------
+# Counts
+# ----------------------------------------------------------------------
+
+async def count_rows(session: AsyncSession, stmt, mode: str = "exact", table: Optional[str] = None) -> Optional[int]:
+    """
+    Total for a filtered select.
+      exact    - COUNT(*) over the query
+      estimate - planner row estimate (pg_class.reltuples) when the query has no
+                 filters and `table` is given on Postgres; otherwise a COUNT(*)
+                 reused for COUNT_CACHE_TTL seconds
+      none     - skipped (None); clients page with next_cursor only
+    """
+    if mode not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count must be one of: {', '.join(COUNT_MODES)}")
+    if mode == "none":
+        return None
+
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    if mode == "exact":
+        return (await session.execute(count_stmt)).scalar()
+
+    if table and stmt.whereclause is None and session.bind.dialect.name == "postgresql":
+        estimate = (await session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": table}
+        )).scalar()
+        # -1 / 0: table never analyzed, fall through to a real count
+        if estimate and estimate > 0:
+            return int(estimate)
+
+    compiled = count_stmt.compile(dialect=session.bind.dialect)
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    cached = _count_cache.get(key)
+    now = time.monotonic()
+    if cached and now - cached[0] < COUNT_CACHE_TTL:
+        return cached[1]
+
+    total = (await session.execute(count_stmt)).scalar()
+    if len(_count_cache) >= COUNT_CACHE_SIZE:
+        _count_cache.clear()
+    _count_cache[key] = (now, total)
+    return total
+
+
+def total_pages(total: Optional[int], page_size: int) -> Optional[int]:
+    return None if total is None else (total + page_size - 1) // page_size
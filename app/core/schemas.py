@@ -13,6 +13,8 @@ class OrderCreate(BaseModel):
     shipping_company: Optional[int] = None  # Optional shipping company ID
     discount_detail: Optional[Dict[str, Any]] = {}
     payment_details: Optional[Dict[str, float]] = {}
+    shipping_latitude: Optional[float] = None  # Delivery location, used to prefer nearby warehouses
+    shipping_longitude: Optional[float] = None
 
 class OrderResponse(BaseModel):
     id: int
@@ -1,15 +1,48 @@
-
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 # Configuration
-SECRET_KEY = "your-secret-key-production-change-this" 
+SECRET_KEY = "your-secret-key-production-change-this"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 300 # 5 Hours for Dev
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing. New hashes use PASSWORD_HASH_SCHEME; hashes made with the
+# other scheme (or older cost settings) still verify and are replaced on the
+# next successful login (verify_and_update_password_async).
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "argon2")
+# Cost profile: argon2 memory in KiB. Defaults follow the OWASP minimum
+# (19 MiB, 2 passes, 1 lane), ~0.1s per hash on one core.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "19456"))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads hashing/verifying passwords (per worker); excess requests queue
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_schemes = [PASSWORD_HASH_SCHEME] + [s for s in ("argon2", "bcrypt") if s != PASSWORD_HASH_SCHEME]
+pwd_context = CryptContext(
+    schemes=_schemes,
+    deprecated=_schemes[1:],
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__parallelism=ARGON2_PARALLELISM,
+    bcrypt__rounds=BCRYPT_ROUNDS,
+)
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _hash_executor
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -17,13 +50,27 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Async variants for request handlers: hashing is deliberately slow (~0.1-0.3s)
+# and would otherwise block the event loop, stalling every other request.
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_executor(), get_password_hash, password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash uses an old scheme or cost and should be replaced."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _executor(), pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    
+
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -9,8 +9,10 @@ from sqlalchemy.orm import selectinload
 from app.core.database import get_db
 
 from app.core.security import SECRET_KEY, ALGORITHM
-from app.core.schemas import TokenData
-from app.modules.auth.models import User
+from app.modules.auth.models import User, UserRole
+from app.modules.auth.user_cache import (
+    AUTH_TRUST_TOKEN_CLAIMS, get_cached_user, cache_user, token_revoked
+)
 
 from fastapi import Request
 
@@ -30,46 +32,84 @@ async def get_token_from_cookie_or_header(request: Request) -> str | None:
         return auth_header.split(" ")[1]
     return None
 
-async def get_current_user(
-    request: Request,
-    db: AsyncSession = Depends(get_db)
-):
-    token = await get_token_from_cookie_or_header(request)
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+async def _token_payload(request: Request) -> dict:
+    """Decoded claims of the request's token; 401 when missing or invalid."""
+    token = await get_token_from_cookie_or_header(request)
     if not token:
         # Check if it's an API call or HTML request to decide response? 
         # For now, just raise 401. UI will redirect to login.
-        raise credentials_exception
+        raise _credentials_exception()
 
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-        
-    stmt = select(User).options(selectinload(User.security_settings)).where(User.username == token_data.username)
+        raise _credentials_exception()
+    return payload
+
+async def get_current_user(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    payload = await _token_payload(request)
+    username = payload["sub"]
+    token_version = payload.get("token_version")
+
+    # Security: a token older than the user's current token_version is revoked
+    if token_revoked(username, token_version):
+        raise _credentials_exception()
+
+    cached = get_cached_user(username, token_version)
+    if cached is not None:
+        # A copy attached to this request's session, without a query, so routes can still modify and commit it
+        return await db.merge(cached, load=False)
+
+    stmt = select(User).options(selectinload(User.security_settings)).where(User.username == username)
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
         
     # Security: Check Token Version
-    token_version = payload.get("token_version")
     if token_version is not None and token_version != user.token_version:
-        raise credentials_exception
-        
-    return user
+        raise _credentials_exception()
+
+    # The loaded instance becomes the cached snapshot; the request gets its own copy
+    db.expunge(user)
+    cache_user(user, token_version)
+    return await db.merge(user, load=False)
+
+async def get_current_claims(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    For hot read-only endpoints (POS polling and search, job status). With
+    AUTH_TRUST_TOKEN_CLAIMS the user is built from the signed token alone
+    (id, username, role, token_version) without touching the database: a
+    transient User with no profile fields or security settings. Otherwise, and
+    for tokens issued without those claims, the same as get_current_user.
+    """
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        payload = await _token_payload(request)
+        username = payload["sub"]
+        user_id, role = payload.get("uid"), payload.get("role")
+        token_version = payload.get("token_version")
+        if user_id is not None and role is not None:
+            if token_revoked(username, token_version):
+                raise _credentials_exception()
+            try:
+                return User(id=user_id, username=username, role=UserRole(role), token_version=token_version)
+            except ValueError:
+                raise _credentials_exception()
+    return await get_current_user(request, db)
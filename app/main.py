@@ -18,6 +18,7 @@ from app.modules.settings.routes import router as settings_router
 from app.modules.catalog.routes import router as catalog_router
 from app.modules.customers.routes import router as customers_router
 from app.modules.marketing.routes import router as marketing_router
+from app.modules.jobs.routes import router as jobs_router
 
 app = FastAPI(title="Enterprise Store Platform", version="2.0.0")
 
@@ -36,6 +37,7 @@ app.include_router(settings_router)
 app.include_router(catalog_router)
 app.include_router(customers_router)
 app.include_router(marketing_router)
+app.include_router(jobs_router)
 
 @app.get("/")
 async def root():
@@ -48,6 +50,15 @@ templates = Jinja2Templates(directory="templates")
 async def main_dashboard(request: Request):
     return templates.TemplateResponse("dashboard.html", {"request": request})
 
+# Connection pool metrics (per worker) for sizing DB_POOL_SIZE / DB_MAX_OVERFLOW
+from app.core.database import get_pool_status
+from app.dependencies import get_current_user
+from fastapi import Depends
+
+@app.get("/api/system/db-pool")
+async def db_pool_status(current_user = Depends(get_current_user)):
+    return get_pool_status()
+
 # Startup Event (Optional: Database Check)
 from app.core.database import engine, Base, AsyncSessionLocal
 @app.on_event("startup")
@@ -64,11 +75,16 @@ async def startup():
         from app.modules.auth import models as auth_models
         from app.modules.catalog import models as catalog_models
         from app.modules.customers import models as customers_models
+        from app.modules.jobs import models as jobs_models
         await conn.run_sync(Base.metadata.create_all)
+        
+        # Product search index (FTS5 on SQLite, tsvector/trigram on Postgres)
+        from app.modules.catalog.search import ensure_search_index
+        await ensure_search_index(conn)
     
     # Seed default admin user if not exists
     from app.modules.auth.models import User, UserRole, SecuritySettings
-    from app.core.security import get_password_hash
+    from app.core.security import get_password_hash_async
     from sqlalchemy import select
     
     async with AsyncSessionLocal() as session:
@@ -81,7 +97,7 @@ async def startup():
             admin_user = User(
                 username="admin",
                 email="admin@store.com",
-                password_hash=get_password_hash("admin123"),
+                password_hash=await get_password_hash_async("admin123"),
                 role=UserRole.ADMIN,
                 full_name="System Administrator",
                 is_active=True,
@@ -228,4 +244,21 @@ async def startup():
         else:
             print(f"ℹ️  Notification templates already exist ({len(existing_templates)} templates)")
 
+        # Checkout configuration version counter (config_cache)
+        from app.modules.settings.config_cache import ensure_config_version
+        await ensure_config_version(session)
+
+    # Pick up export jobs that were queued or interrupted by a restart
+    from app.modules.jobs.runner import recover_jobs
+    await recover_jobs()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Requeue this worker's running jobs; they resume from their checkpoint
+    from app.modules.jobs.runner import shutdown_jobs
+    await shutdown_jobs()
+
+    # Close pooled connections cleanly
+    await engine.dispose()
+
 
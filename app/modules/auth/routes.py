@@ -7,16 +7,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.database import get_db
-from app.core.security import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.security import verify_and_update_password_async, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 from app.core.schemas import Token
 from app.modules.auth.models import User
 from app.modules.auth.schemas import UserUpdate, PasswordChange, UserRead
 from app.modules.auth.service import update_user_profile, change_password
+from app.modules.auth.user_cache import invalidate_user
 from app.dependencies import get_current_user
 from fastapi.responses import RedirectResponse, JSONResponse
 
 router = APIRouter(tags=["Auth"])
 
+def issue_access_token(user: User) -> str:
+    # uid/role let claims-only endpoints (get_current_claims) skip the database
+    return create_access_token(
+        data={
+            "sub": user.username, "token_version": user.token_version,
+            "uid": user.id, "role": user.role.value if user.role else None
+        },
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
@@ -27,18 +38,23 @@ async def login_for_access_token(
     result = await db.execute(stmt)
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_and_update_password_async(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Stored with an older scheme or cost (e.g. bcrypt): re-hash with the current one
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        invalidate_user(user.username)
         
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username, "token_version": user.token_version}, 
-        expires_delta=access_token_expires
-    )
+    access_token = issue_access_token(user)
     
     response = JSONResponse(content={"access_token": access_token, "token_type": "bearer"})
     response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
@@ -79,7 +95,12 @@ async def update_password(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    return await change_password(db, current_user, password_data)
+    result = await change_password(db, current_user, password_data)
+    # Other devices are signed out (token_version was bumped); this one gets a fresh token
+    access_token = issue_access_token(current_user)
+    response = JSONResponse(content={**result, "access_token": access_token, "token_type": "bearer"})
+    response.set_cookie(key="access_token", value=f"Bearer {access_token}", httponly=True)
+    return response
 
 # Security Settings Endpoints
 from app.modules.auth.schemas import SecuritySettingsRead, SecuritySettingsUpdate
@@ -97,6 +118,7 @@ async def account_security_page(
         ss = SecuritySettings(user_id=current_user.id)
         db.add(ss)
         await db.commit()
+        invalidate_user(current_user.username)
         await db.refresh(current_user)
         
     return templates.TemplateResponse("security_settings.html", {
@@ -116,6 +138,7 @@ async def update_security_settings(
          ss = SecuritySettings(user_id=current_user.id)
          db.add(ss)
          await db.commit()
+         invalidate_user(current_user.username)
          await db.refresh(current_user)
 
     # Update logic
@@ -128,6 +151,7 @@ async def update_security_settings(
     ss.session_policy = settings_data.session_policy
     
     await db.commit()
+    invalidate_user(current_user.username)
     await db.refresh(ss)
     return ss
 
@@ -139,4 +163,5 @@ async def logout_all_devices(
     # Increment token version
     current_user.token_version += 1
     await db.commit()
+    invalidate_user(current_user.username, current_user.token_version)
     return {"message": "Logged out from all other devices"}
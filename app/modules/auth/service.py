@@ -3,7 +3,8 @@ from sqlalchemy import select
 from fastapi import HTTPException, status
 from app.modules.auth.models import User
 from app.modules.auth.schemas import UserUpdate, PasswordChange
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
+from app.modules.auth.user_cache import invalidate_user
 
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     stmt = select(User).where(User.username == username)
@@ -15,11 +16,12 @@ async def update_user_profile(db: AsyncSession, user: User, update_data: UserUpd
         setattr(user, key, value)
     
     await db.commit()
+    invalidate_user(user.username)
     await db.refresh(user)
     return user
 
 async def change_password(db: AsyncSession, user: User, password_data: PasswordChange):
-    if not verify_password(password_data.current_password, user.password_hash):
+    if not await verify_password_async(password_data.current_password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="كلمة المرور الحالية غير صحيحة"
@@ -31,6 +33,9 @@ async def change_password(db: AsyncSession, user: User, password_data: PasswordC
             detail="كلمة المرور الجديدة غير متطابقة"
         )
         
-    user.password_hash = get_password_hash(password_data.new_password)
+    user.password_hash = await get_password_hash_async(password_data.new_password)
+    # Tokens issued before the change stop working
+    user.token_version += 1
     await db.commit()
+    invalidate_user(user.username, user.token_version)
     return {"message": "تم تغيير كلمة المرور بنجاح"}
@@ -0,0 +1,114 @@
+"""
+Current-User Cache
+Authenticated requests resolve their user from an in-process LRU keyed by
+(username, token_version) instead of querying the user and its security
+settings on every call. Bumping token_version (logout from all devices,
+password change) or editing a user drops that user's entries immediately.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from app.modules.auth.models import User
+
+# Seconds a cached user is trusted. Writes through the auth and team endpoints
+# invalidate immediately; the TTL only bounds staleness for changes made by
+# other workers or scripts.
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1000"))
+# Claims-only auth for endpoints that depend on get_current_claims: id, role and
+# token_version are trusted from the signed token, so they need no database.
+# A token revoked in another worker stays usable there until it expires.
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+CacheKey = Tuple[str, Optional[int]]
+
+
+class _UserCache:
+    """LRU of detached User snapshots, plus the newest token_version seen per username."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: "OrderedDict[CacheKey, Tuple[User, float]]" = OrderedDict()
+        self.keys_by_username: Dict[str, Set[CacheKey]] = {}
+        self.versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[User]:
+        cached = self.entries.get(key)
+        if cached is None or (time.monotonic() - cached[1]) >= AUTH_USER_CACHE_TTL:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return cached[0]
+
+    def put(self, key: CacheKey, user: User):
+        self._drop_key(key)
+        self.entries[key] = (user, time.monotonic())
+        self.keys_by_username.setdefault(key[0], set()).add(key)
+        while len(self.entries) > self.size:
+            self._drop_key(next(iter(self.entries)))
+
+    def _drop_key(self, key: CacheKey):
+        if self.entries.pop(key, None) is None:
+            return
+        keys = self.keys_by_username.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_username[key[0]]
+
+    def drop_username(self, username: str):
+        for key in list(self.keys_by_username.get(username, ())):
+            self._drop_key(key)
+
+    def note_version(self, username: str, token_version: Optional[int]):
+        if token_version is not None and token_version > self.versions.get(username, token_version - 1):
+            self.versions[username] = token_version
+
+    def clear(self):
+        self.entries.clear()
+        self.keys_by_username.clear()
+        self.versions.clear()
+
+
+_cache = _UserCache(AUTH_USER_CACHE_SIZE)
+
+
+def get_cached_user(username: str, token_version: Optional[int]) -> Optional[User]:
+    """Detached snapshot; attach a copy to the request's session before use (session.merge(load=False))."""
+    return _cache.get((username, token_version))
+
+
+def cache_user(user: User, token_version: Optional[int]):
+    """`user` must be detached (expunged) and fully loaded; it is never modified afterwards."""
+    _cache.note_version(user.username, user.token_version)
+    _cache.put((user.username, token_version), user)
+
+
+def token_revoked(username: str, token_version: Optional[int]) -> bool:
+    """True when this process has seen a newer token_version for the user."""
+    known = _cache.versions.get(username)
+    return token_version is not None and known is not None and token_version < known
+
+
+def invalidate_user(username: str, token_version: Optional[int] = None):
+    """Call after a user is changed or deleted; pass the new token_version after bumping it."""
+    _cache.drop_username(username)
+    _cache.note_version(username, token_version)
+
+
+def next_token_version(username: str) -> int:
+    """token_version for a new user: newer than any version this process saw for a deleted user of that name."""
+    return _cache.versions.get(username, 0) + 1
+
+
+def clear_user_cache():
+    _cache.clear()
+
+
+def user_cache_stats() -> Dict:
+    return {"entries": len(_cache.entries), "size": _cache.size, "hits": _cache.hits, "misses": _cache.misses}
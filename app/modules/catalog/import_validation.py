@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Product Import Validation
+Reads an import spreadsheet and validates every row with column-wise pandas
+operations (no per-row Python loop). Runs in the job worker processes, so it
+depends on pandas only, not on the database or the models.
+"""
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ("Product Name", "SKU", "Price", "Quantity")
+SKU_MAX_LENGTH = 64
+MAX_QUANTITY = 2 ** 31 - 1
+TRUE_VALUES = ("true", "1", "yes", "y", "نعم")
+
+# Columns of the validated frame
+PLAN_COLUMNS = (
+    "row", "name", "slug", "sku", "barcode", "price", "cost_price", "quantity",
+    "options", "product_type", "status", "taxable", "error"
+)
+
+
+class ImportFileError(ValueError):
+    """The file as a whole can't be imported (unreadable, missing columns)."""
+
+
+def read_import_file(path: str) -> pd.DataFrame:
+    # SKUs and barcodes are identifiers: keep "00123" as text
+    text_columns = {"SKU": str, "Barcode": str}
+    try:
+        if path.lower().endswith(".csv"):
+            return pd.read_csv(path, dtype=text_columns, encoding="utf-8-sig")
+        return pd.read_excel(path, dtype=text_columns)
+    except Exception as exc:
+        raise ImportFileError(f"Could not read the file: {exc}")
+
+
+def _text(df: pd.DataFrame, column: str, default=None) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype="object")
+    values = df[column].astype("string").str.strip()
+    values = values.mask(values == "")
+    return values.astype("object").where(values.notna(), default)
+
+
+def _number(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(float("nan"), index=df.index)
+    return pd.to_numeric(df[column], errors="coerce")
+
+
+def slugify_names(names: pd.Series) -> pd.Series:
+    """Same slug the importer has always used: lower case, spaces to dashes."""
+    return names.str.lower().str.replace(" ", "-", regex=False)
+
+
+def validate_import_frame(
+    df: pd.DataFrame,
+    product_types: Sequence[str],
+    statuses: Sequence[str]
+) -> pd.DataFrame:
+    """
+    One output row per input row (PLAN_COLUMNS). `row` is the spreadsheet row
+    number (header = 1); `error` is empty for valid rows, else the first problem found.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ImportFileError(f"Missing required columns: {', '.join(missing)}")
+
+    name = _text(df, "Product Name")
+    sku = _text(df, "SKU")
+    price = _number(df, "Price")
+    quantity = _number(df, "Quantity")
+    cost_price = _number(df, "Cost Price").fillna(0.0)
+    product_type = _text(df, "Type", "Physical")
+    status = _text(df, "Status", "Active")
+    if "Taxable" in df.columns:
+        taxable = df["Taxable"].astype("string").str.strip().str.lower().isin(TRUE_VALUES)
+    else:
+        taxable = pd.Series(False, index=df.index)
+
+    error = pd.Series("", index=df.index, dtype="object")
+
+    def flag(mask: pd.Series, message: str):
+        # First problem wins
+        error[mask.fillna(False).astype(bool) & (error == "")] = message
+
+    flag(name.isna(), "Product Name is required")
+    flag(sku.isna(), "SKU is required")
+    flag(sku.str.len() > SKU_MAX_LENGTH, f"SKU is longer than {SKU_MAX_LENGTH} characters")
+    flag(~np.isfinite(price), "Price must be a number")
+    flag(price < 0, "Price cannot be negative")
+    flag(~np.isfinite(quantity) | (quantity % 1 != 0), "Quantity must be a whole number")
+    flag(quantity < 0, "Quantity cannot be negative")
+    flag(quantity > MAX_QUANTITY, "Quantity is too large")
+    flag(~np.isfinite(cost_price) | (cost_price < 0), "Cost Price must be a non-negative number")
+    flag(~product_type.isin(list(product_types)), f"Type must be one of: {', '.join(product_types)}")
+    flag(~status.isin(list(statuses)), f"Status must be one of: {', '.join(statuses)}")
+    flag(sku.notna() & sku.duplicated(keep="first"), "Duplicate SKU in file")
+
+    return pd.DataFrame({
+        "row": df.index + 2,
+        "name": name,
+        "slug": slugify_names(name.astype("string")).astype("object"),
+        "sku": sku,
+        "barcode": _text(df, "Barcode"),
+        "price": price,
+        "cost_price": cost_price,
+        "quantity": quantity.where(np.isfinite(quantity), 0).clip(0, MAX_QUANTITY).astype("int64"),
+        "options": _text(df, "Options", "{}"),
+        "product_type": product_type,
+        "status": status,
+        "taxable": taxable.astype(bool),
+        "error": error,
+    }, columns=list(PLAN_COLUMNS))
+
+
+def prepare_import(upload_path: str, plan_path: str, product_types: List[str], statuses: List[str]) -> int:
+    """Reads and validates the upload, pickles the result to `plan_path`. Returns the row count."""
+    plan = validate_import_frame(read_import_file(upload_path), product_types, statuses)
+    plan.to_pickle(plan_path)
+    return len(plan)
@@ -20,7 +20,9 @@ from sqlalchemy import (
     ForeignKey,
     UniqueConstraint,
     DateTime,
+    Index,
 )
+from sqlalchemy import event
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import relationship, backref
 from enum import Enum
@@ -100,6 +102,10 @@ class Product(Base):
     Can have multiple variants, images, and options.
     """
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination of the product list (newest first)
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
 
     # Primary key
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -138,7 +144,7 @@ class Product(Base):
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationships (cascade delete)
     category = relationship("Category", back_populates="products")
@@ -185,7 +191,7 @@ class ProductVariant(Base):
     
     # Unique identifiers
     sku = Column(String(64), nullable=False, unique=True, index=True)
-    barcode = Column(String(64), nullable=True)
+    barcode = Column(String(64), nullable=True, index=True)
     
     # Pricing
     price = Column(Float, nullable=False, default=0.0)
@@ -202,7 +208,7 @@ class ProductVariant(Base):
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     
     # Relationship back to product
     product = relationship("Product", back_populates="variants")
@@ -230,7 +236,7 @@ class ProductImage(Base):
     display_order = Column(Integer, default=0, nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # Relationship back to product
     product = relationship("Product", back_populates="images")
@@ -453,6 +459,55 @@ class ProductCustomFieldValue(Base):
         return f"<CustomFieldValue {self.value} for Product {self.product_id}>"
 
 
+class ProductSearchDocument(Base):
+    """
+    Normalized search text for a product (name, slug, SKUs, barcodes).
+    Maintained by app.modules.catalog.search.index_products; indexed with
+    tsvector/trigram on Postgres and mirrored into an FTS5 table on SQLite.
+    """
+    __tablename__ = "product_search_documents"
+
+    product_id = Column(String(36), ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ProductSearchDocument {self.product_id}>"
+
+
+class CatalogDeletion(Base):
+    """
+    Tombstone of a deleted product, variant or image, written by the session
+    hook below so POS catalog deltas can report deletions (which leave no
+    updated_at behind) instead of inferring them.
+    """
+    __tablename__ = "catalog_deletions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entity = Column(String(20), nullable=False)  # "product", "variant" or "image"
+    entity_id = Column(String(36), nullable=False)
+    product_id = Column(String(36), nullable=True)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CatalogDeletion {self.entity} {self.entity_id}>"
+
+
+def _tombstone(entity: str):
+    def record(mapper, connection, target):
+        connection.execute(CatalogDeletion.__table__.insert().values(
+            entity=entity,
+            entity_id=target.id,
+            product_id=target.id if entity == "product" else target.product_id,
+            deleted_at=datetime.utcnow()
+        ))
+    return record
+
+
+# Every ORM delete (cascades and delete-orphan included) leaves a tombstone in the same transaction
+for _model, _entity in ((Product, "product"), (ProductVariant, "variant"), (ProductImage, "image")):
+    event.listen(_model, "after_delete", _tombstone(_entity))
+
 
 # ----------------------------------------------------------------------
 # Utility Functions
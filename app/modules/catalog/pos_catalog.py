@@ -0,0 +1,160 @@
+"""
+POS Catalog Snapshot
+Compact, versioned copy of the sellable catalog for POS terminals. Terminals
+download it once (revalidated with ETag/If-None-Match), search it locally and
+then poll for rows changed since their version.
+
+A version is "<newest change in microseconds>-<variant count>", where the
+newest change includes deletions: products, variants and images leave a
+CatalogDeletion tombstone, so a delta lists the variant ids to drop and
+re-sends the variants of products that lost an image.
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.catalog.models import Product, ProductVariant, ProductImage, CatalogDeletion
+from app.modules.catalog.scan_cache import main_image_url, PLACEHOLDER_IMAGE
+from app.modules.catalog.search import build_document
+
+EPOCH = datetime(1970, 1, 1)
+
+# Deltas re-send rows changed this long before the terminal's version, so a
+# write that committed just after that version was read is not missed.
+DELTA_OVERLAP = timedelta(seconds=5)
+
+
+class _SnapshotCache:
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.body: Optional[bytes] = None
+
+
+_cache = _SnapshotCache()
+
+
+def _to_micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        # SQLite scalar aggregates come back as text
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def parse_version(version: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """"<micros>-<count>" -> (changed_at, variant_count); None if malformed."""
+    try:
+        micros, count = (version or "").strip('"').split("-")
+        return EPOCH + timedelta(microseconds=int(micros)), int(count)
+    except ValueError:
+        return None
+
+
+async def catalog_version(session: AsyncSession) -> str:
+    """Cheap version check (index-only max/count queries)."""
+    stmt = select(
+        select(func.max(Product.updated_at)).scalar_subquery(),
+        select(func.max(ProductVariant.updated_at)).scalar_subquery(),
+        select(func.max(ProductImage.created_at)).scalar_subquery(),
+        select(func.max(CatalogDeletion.deleted_at)).scalar_subquery(),
+        select(func.count(ProductVariant.id)).scalar_subquery()
+    )
+    products_at, variants_at, images_at, deleted_at, count = (await session.execute(stmt)).one()
+    changed = max(_to_micros(products_at), _to_micros(variants_at), _to_micros(images_at), _to_micros(deleted_at))
+    return f"{changed}-{count}"
+
+
+def _items_stmt():
+    return (
+        select(
+            ProductVariant.id,
+            ProductVariant.product_id,
+            Product.name,
+            Product.category_id,
+            ProductVariant.sku,
+            ProductVariant.barcode,
+            ProductVariant.price,
+            main_image_url(),
+            ProductVariant.quantity
+        )
+        .join(Product, Product.id == ProductVariant.product_id)
+    )
+
+
+def _item(row) -> Dict:
+    variant_id, product_id, name, category_id, sku, barcode, price, image, quantity = row
+    return {
+        "id": variant_id,
+        "product_id": product_id,
+        "name": name or "Unknown",
+        "category_id": category_id,
+        "sku": sku,
+        "barcode": barcode,
+        "price": price,
+        "image": image or PLACEHOLDER_IMAGE,
+        "available": quantity or 0,
+        # Normalized tokens (see catalog.search) so terminals match like the server does
+        "search": build_document(name, None, (sku, barcode))
+    }
+
+
+async def get_catalog_snapshot(session: AsyncSession) -> Tuple[str, bytes]:
+    """
+    Returns (version, JSON body) for the whole catalog. The body is built once
+    per version and shared by every terminal hitting this worker.
+    """
+    version = await catalog_version(session)
+    if _cache.version == version and _cache.body is not None:
+        return version, _cache.body
+
+    result = await session.execute(_items_stmt().order_by(ProductVariant.id))
+    items = [_item(row) for row in result.all()]
+    body = json.dumps({"version": version, "items": items}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    _cache.version, _cache.body = version, body
+    return version, body
+
+
+async def get_catalog_changes(session: AsyncSession, since: str) -> Dict:
+    """
+    Rows changed since a terminal's version:
+    {"version", "reset", "items", "deleted"}. `deleted` lists variant ids to
+    drop; reset=True means the version is unknown and the full snapshot must
+    be reloaded.
+    """
+    version = await catalog_version(session)
+    parsed = parse_version(since)
+    if parsed is None:
+        return {"version": version, "reset": True, "items": [], "deleted": []}
+    changed_at, _ = parsed
+
+    window = changed_at - DELTA_OVERLAP
+    deletions = (await session.execute(
+        select(CatalogDeletion.entity, CatalogDeletion.entity_id, CatalogDeletion.product_id)
+        .where(CatalogDeletion.deleted_at > window)
+    )).all()
+    deleted = {entity_id for entity, entity_id, _ in deletions if entity == "variant"}
+    # A removed image may have been the main one: re-send the product's variants
+    image_products = {product_id for entity, _, product_id in deletions if entity == "image"}
+
+    stmt = _items_stmt().where(or_(
+        ProductVariant.updated_at > window,
+        ProductVariant.product_id.in_(select(Product.id).where(Product.updated_at > window)),
+        ProductVariant.product_id.in_(select(ProductImage.product_id).where(ProductImage.created_at > window)),
+        ProductVariant.product_id.in_(list(image_products))
+    ))
+    items: List[Dict] = [_item(row) for row in (await session.execute(stmt)).all()]
+    return {"version": version, "reset": False, "items": items, "deleted": sorted(deleted)}
+
+
+def etag_matches(if_none_match: Optional[str], version: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")]
+    return version in candidates or "*" in candidates
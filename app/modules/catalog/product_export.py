@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Product Export Rows
+One row per variant (or one per product without variants), read in keyset
+chunks with their variants and category, for the Excel export and export jobs.
+The Excel download is written chunk by chunk (xlsxwriter constant_memory) to
+a temporary file and streamed from there, never held in memory.
+"""
+import os
+import tempfile
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+import xlsxwriter
+from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+
+from app.core.pagination import iter_chunks
+from app.modules.catalog.models import Product, ProductVariant
+
+# Products fetched per round trip (their variants come in one extra query)
+PRODUCT_EXPORT_CHUNK_SIZE = 500
+# Bytes per chunk when sending a finished workbook
+FILE_STREAM_CHUNK = 64 * 1024
+
+# Arabic headers, as the import template expects
+PRODUCT_EXPORT_COLUMNS = (
+    "اسم المنتج", "SKU", "الباركود", "السعر", "سعر التكلفة",
+    "الكمية", "الحالة", "النوع", "التصنيف", "الخيارات"
+)
+
+
+def _value(enum_or_str):
+    return getattr(enum_or_str, "value", enum_or_str)
+
+
+def product_export_stmt(ids: Optional[Sequence[str]] = None):
+    stmt = select(Product)
+    if ids:
+        stmt = stmt.where(Product.id.in_(list(ids)))
+    return stmt
+
+
+def product_export_count_stmt(ids: Optional[Sequence[str]] = None):
+    """Rows the export will produce: variants, plus one per product without any."""
+    variants = select(func.count(ProductVariant.id))
+    bare_products = select(func.count(Product.id)).where(~Product.variants.any())
+    if ids:
+        variants = variants.where(ProductVariant.product_id.in_(list(ids)))
+        bare_products = bare_products.where(Product.id.in_(list(ids)))
+    return select(variants.scalar_subquery() + bare_products.scalar_subquery())
+
+
+def _product_rows(product: Product) -> List[Tuple]:
+    category = product.category.name if product.category else "-"
+    if not product.variants:
+        # If no variants, at least export product info (slug stands in for the SKU)
+        return [(
+            product.name, product.slug, "", 0, 0, 0,
+            _value(product.status), _value(product.product_type), category, ""
+        )]
+    return [
+        (
+            product.name, variant.sku, variant.barcode or "", variant.price, variant.cost_price,
+            variant.quantity, _value(product.status), _value(product.product_type), category,
+            variant.options or ""
+        )
+        for variant in product.variants
+    ]
+
+
+async def iter_product_rows(
+    ids: Optional[Sequence[str]] = None,
+    chunk_size: int = PRODUCT_EXPORT_CHUNK_SIZE,
+    cursor: Optional[str] = None
+) -> AsyncIterator[Tuple[List[Tuple], Optional[str]]]:
+    """Yields (rows, next_cursor), newest products first; a cursor resumes after its chunk."""
+    stmt = product_export_stmt(ids).options(
+        selectinload(Product.variants),
+        selectinload(Product.category)
+    )
+    async for products, cursor in iter_chunks(
+        stmt, sort_key=Product.created_at, id_column=Product.id,
+        descending=True, cursor=cursor, chunk_size=chunk_size, scalars=True
+    ):
+        rows = []
+        for product in products:
+            rows.extend(_product_rows(product))
+        yield rows, cursor
+
+
+def _write_rows(sheet, first_row: int, rows: List[Tuple]):
+    for offset, row in enumerate(rows):
+        sheet.write_row(first_row + offset, 0, row)
+
+
+async def write_products_xlsx(path: str, ids: Optional[Sequence[str]] = None) -> int:
+    """
+    Writes the "Products" workbook to `path` in xlsxwriter's constant_memory
+    mode. Returns the number of rows.
+    """
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    sheet = workbook.add_worksheet("Products")
+    sheet.write_row(0, 0, PRODUCT_EXPORT_COLUMNS, workbook.add_format({"bold": True}))
+
+    written = 0
+    try:
+        async for rows, _ in iter_product_rows(ids):
+            # xlsxwriter is synchronous; keep it off the event loop
+            await run_in_threadpool(_write_rows, sheet, written + 1, rows)
+            written += len(rows)
+    finally:
+        await run_in_threadpool(workbook.close)
+    return written
+
+
+async def stream_products_xlsx(ids: Optional[Sequence[str]] = None) -> AsyncIterator[bytes]:
+    """Builds the workbook in a temporary file, then streams it and removes the file."""
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await write_products_xlsx(path, ids)
+        with open(path, "rb") as workbook_file:
+            while True:
+                chunk = workbook_file.read(FILE_STREAM_CHUNK)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
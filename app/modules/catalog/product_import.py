@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk Product Import
+Background job that imports products from a spreadsheet:
+  1. read + validate every row with vectorized pandas (job worker process)
+  2. look up existing SKUs and slugs in bulk, one IN query per few thousand values
+  3. bulk-insert products, variants, inventory rows and stock movements in
+     chunks of PRODUCT_IMPORT_CHUNK_SIZE products, one commit per chunk
+Rows that can't be imported are written to an error report (the job's
+download). A SKU or slug created by someone else while the job runs fails
+the chunk's insert; the chunk's values are then looked up again and only the
+clashing rows are reported. The checkpoint is the next chunk, so a failed job
+resumes there.
+"""
+import os
+import uuid
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pandas as pd
+from sqlalchemy import select, insert, func
+from sqlalchemy.exc import IntegrityError
+
+from app.core.database import AsyncSessionLocal
+from app.modules.catalog.import_validation import prepare_import
+from app.modules.catalog.models import Product, ProductVariant, ProductTypeEnum, ProductStatusEnum
+from app.modules.catalog.scan_cache import invalidate_scan_products
+from app.modules.catalog.search import index_products
+from app.modules.jobs.runner import job_handler, JobContext
+
+# Products per transaction (their variants and inventory rows go with them)
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "1000"))
+# Values per IN (...) when checking for existing SKUs / slugs
+LOOKUP_CHUNK = 5000
+# Times a chunk is re-checked and retried after a unique conflict
+CONFLICT_RETRIES = 3
+
+ERROR_REPORT_NAME = "product_import_errors.csv"
+ERROR_REPORT_COLUMNS = ["Row", "Product Name", "SKU", "Error"]
+
+
+async def _existing_values(session, column, values: Iterable[str]) -> Set[str]:
+    values = list(values)
+    found: Set[str] = set()
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        found.update((await session.execute(
+            select(column).where(column.in_(values[start:start + LOOKUP_CHUNK]))
+        )).scalars().all())
+    return found
+
+
+def _append_errors(report_path: str, rows: pd.DataFrame, message: str = None):
+    """Appends rows (row, name, sku, error) to the CSV report."""
+    if rows.empty:
+        return
+    report = pd.DataFrame({
+        "Row": rows["row"],
+        "Product Name": rows["name"],
+        "SKU": rows["sku"],
+        "Error": message if message else rows["error"],
+    }, columns=ERROR_REPORT_COLUMNS)
+    exists = os.path.exists(report_path)
+    report.to_csv(report_path, mode="a", header=not exists, index=False, encoding="utf-8" if exists else "utf-8-sig")
+
+
+async def _plan(ctx: JobContext, plan_path: str, report_path: str):
+    """Validation + existing SKU/slug checks; leaves the importable rows in `plan_path`."""
+    upload_path = os.path.join(ctx.directory, ctx.params["upload"])
+    # Unreadable file / missing columns raise ImportFileError: the job fails with that message
+    total = await ctx.run_cpu(
+        prepare_import, upload_path, plan_path,
+        [t.value for t in ProductTypeEnum], [s.value for s in ProductStatusEnum]
+    )
+    await ctx.set_total(total)
+
+    plan = pd.read_pickle(plan_path)
+    valid = plan["error"] == ""
+    async with AsyncSessionLocal() as session:
+        from app.modules.inventory.service import get_default_warehouse
+        warehouse = await get_default_warehouse(session)
+        if not warehouse:
+            raise ValueError("No active warehouse found. Please create a warehouse first.")
+        existing_skus = await _existing_values(session, ProductVariant.sku, plan.loc[valid, "sku"].unique())
+        existing_slugs = await _existing_values(session, Product.slug, plan.loc[valid, "slug"].unique())
+
+    plan.loc[valid & plan["sku"].isin(existing_skus), "error"] = "SKU already exists"
+    plan.loc[(plan["error"] == "") & plan["slug"].isin(existing_slugs), "error"] = "Product already exists"
+
+    invalid = plan[plan["error"] != ""]
+    _append_errors(report_path, invalid)
+
+    # Importable rows, numbered by product in order of first appearance
+    importable = plan[plan["error"] == ""].copy()
+    importable["product"] = pd.factorize(importable["slug"])[0]
+    importable.to_pickle(plan_path)
+
+    await ctx.progress(len(invalid), {
+        "planned": True, "warehouse_id": warehouse.id, "next_product": 0,
+        "products": 0, "variants": 0, "failed": len(invalid)
+    })
+
+
+def _chunk_records(rows: pd.DataFrame, warehouse_id: int) -> Dict[str, List[Dict]]:
+    """Insert parameters for one chunk; product attributes come from each product's first row."""
+    from app.modules.inventory.models import StockMovementReason
+
+    firsts = rows.drop_duplicates("product")
+    product_ids = pd.Series([str(uuid.uuid4()) for _ in range(len(firsts))], index=firsts["product"].values)
+    variant_ids = [str(uuid.uuid4()) for _ in range(len(rows))]
+    rows = rows.assign(product_id=rows["product"].map(product_ids).values, variant_id=variant_ids)
+
+    products = firsts.assign(id=product_ids.values)[["id", "name", "slug", "product_type", "status", "taxable"]]
+    variants = rows.rename(columns={"variant_id": "id"})[
+        ["id", "product_id", "sku", "barcode", "price", "cost_price", "quantity", "options"]
+    ]
+    stocked = rows[rows["quantity"] > 0]
+    inventory = pd.DataFrame({
+        "variant_id": stocked["variant_id"], "warehouse_id": warehouse_id, "quantity": stocked["quantity"]
+    })
+    movements = pd.DataFrame({
+        "variant_id": stocked["variant_id"], "warehouse_id": warehouse_id,
+        "qty_change": stocked["quantity"], "reason": StockMovementReason.MANUAL_EDIT
+    })
+
+    def records(frame: pd.DataFrame) -> List[Dict]:
+        # Plain Python values (numpy ints/floats and NaN don't bind everywhere)
+        return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+    return {
+        "product_ids": list(product_ids.values),
+        "products": records(products),
+        "variants": records(variants),
+        "inventory": records(inventory),
+        "movements": records(movements),
+    }
+
+
+async def _insert_chunk(records: Dict[str, List[Dict]]):
+    from app.modules.inventory.models import InventoryItem, StockMovement
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Product), records["products"])
+        await session.execute(insert(ProductVariant), records["variants"])
+        if records["inventory"]:
+            # The new variants' totals are already set to the imported quantity
+            await session.execute(insert(InventoryItem), records["inventory"])
+            await session.execute(insert(StockMovement), records["movements"])
+        await index_products(session, records["product_ids"])
+        await session.commit()
+    invalidate_scan_products(records["product_ids"])
+
+
+async def _already_imported(skus: List[str]) -> bool:
+    """
+    After a crash between commit and checkpoint: is this chunk in the database
+    already? By SKU, since rows dropped after a conflict exist too.
+    """
+    async with AsyncSessionLocal() as session:
+        found = (await session.execute(
+            select(func.count()).select_from(ProductVariant).where(ProductVariant.sku.in_(skus))
+        )).scalar()
+    return found == len(skus)
+
+
+async def _flag_existing(rows: pd.DataFrame) -> pd.DataFrame:
+    """The rows with `error` set where their SKU or slug exists now (same messages as the plan)."""
+    async with AsyncSessionLocal() as session:
+        existing_skus = await _existing_values(session, ProductVariant.sku, rows["sku"].unique())
+        existing_slugs = await _existing_values(session, Product.slug, rows["slug"].unique())
+    rows = rows.copy()
+    rows.loc[rows["sku"].isin(existing_skus), "error"] = "SKU already exists"
+    rows.loc[(rows["error"] == "") & rows["slug"].isin(existing_slugs), "error"] = "Product already exists"
+    return rows
+
+
+async def _import_chunk(rows: pd.DataFrame, warehouse_id: int, report_path: str) -> Tuple[int, int, int]:
+    """
+    Inserts one chunk. On a unique conflict the rows whose SKU or slug was
+    created meanwhile are reported and the rest retried. Returns
+    (products, variants, failed rows).
+    """
+    failed = 0
+    for _ in range(CONFLICT_RETRIES + 1):
+        try:
+            await _insert_chunk(_chunk_records(rows, warehouse_id))
+            return rows["product"].nunique(), len(rows), failed
+        except IntegrityError as exc:
+            error = exc
+            rows = await _flag_existing(rows)
+            clashing = rows["error"] != ""
+            if not clashing.any():
+                break
+            _append_errors(report_path, rows[clashing])
+            failed += int(clashing.sum())
+            rows = rows[~clashing]
+            if rows.empty:
+                return 0, 0, failed
+
+    # Still conflicting (or not on a SKU/slug we can see): the rest of the chunk is skipped
+    _append_errors(report_path, rows, f"Not imported (conflict while saving): {error.orig}")
+    return 0, 0, failed + len(rows)
+
+
+@job_handler("product_import")
+async def run_product_import(ctx: JobContext):
+    plan_path = ctx.path("plan.pkl")
+    report_path = ctx.path(ERROR_REPORT_NAME)
+    resuming = bool(ctx.checkpoint.get("planned")) and os.path.exists(plan_path)
+    if not resuming:
+        if os.path.exists(report_path):
+            os.remove(report_path)
+        await _plan(ctx, plan_path, report_path)
+
+    plan = pd.read_pickle(plan_path)
+    checkpoint = dict(ctx.checkpoint)
+    product_count = int(plan["product"].max()) + 1 if len(plan) else 0
+    resumed_at = checkpoint["next_product"]
+
+    for start in range(resumed_at, product_count, PRODUCT_IMPORT_CHUNK_SIZE):
+        end = start + PRODUCT_IMPORT_CHUNK_SIZE
+        rows = plan[(plan["product"] >= start) & (plan["product"] < end)]
+
+        if resuming and start == resumed_at and await _already_imported(rows["sku"].tolist()):
+            products, variants, failed = rows["product"].nunique(), len(rows), 0
+        else:
+            products, variants, failed = await _import_chunk(rows, checkpoint["warehouse_id"], report_path)
+
+        checkpoint["products"] += products
+        checkpoint["variants"] += variants
+        checkpoint["failed"] += failed
+        checkpoint["next_product"] = end
+        await ctx.progress(ctx.rows_done + len(rows), checkpoint)
+
+    ctx.result = {
+        "products": checkpoint["products"],
+        "variants": checkpoint["variants"],
+        "errors": checkpoint["failed"],
+        "message": f"Imported {checkpoint['products']} products ({checkpoint['variants']} variants), "
+                   f"{checkpoint['failed']} rows skipped",
+    }
+    if os.path.exists(report_path):
+        ctx.artifact_path = report_path
+        ctx.artifact_name = ERROR_REPORT_NAME
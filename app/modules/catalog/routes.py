@@ -5,16 +5,19 @@ Handles CRUD operations, filtering, import/export.
 """
 
 import json
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
 from fastapi import APIRouter, Depends, Request, HTTPException, Query, UploadFile, File
 from fastapi.responses import StreamingResponse, HTMLResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_, and_, desc
 from sqlalchemy.orm import selectinload
 
 from app.core.database import get_db
+from app.core.pagination import fetch_page, count_rows, total_pages
 from app.dependencies import get_current_user
 from app.modules.auth.models import User
 from app.modules.catalog.models import (
@@ -33,9 +36,12 @@ from app.modules.catalog.schemas import (
     CustomFieldDefinitionCreate, CustomFieldDefinitionUpdate, CustomFieldDefinitionResponse
 )
 from app.modules.catalog.services import CategoryService, AttributeService, ReviewService, CustomFieldService
+from app.modules.catalog.search import search_matches, index_products
+from app.modules.catalog.scan_cache import invalidate_scan_products
+from app.modules.catalog.product_export import stream_products_xlsx
+from app.modules.catalog import product_import  # registers the "product_import" job
+from app.modules.jobs.runner import submit_job, new_job_id, job_directory
 
-import pandas as pd
-import io
 import shutil
 import os
 import time
@@ -83,6 +89,12 @@ async def product_editor_edit(request: Request, product_id: str):
 # ----------------------------------------------------------------------
 # API Routes - Product CRUD
 # ----------------------------------------------------------------------
+# Low-stock threshold used by the stock_status filter
+LOW_STOCK_THRESHOLD = 5
+
+PRODUCT_SORTS = ("newest", "stock_asc", "stock_desc")
+
+
 @router.get("/api/products", response_model=ProductListResponse)
 async def list_products(
     page: int = Query(1, ge=1),
@@ -92,28 +104,40 @@ async def list_products(
     product_type: Optional[str] = None,
     status: Optional[str] = None,
     stock_status: Optional[str] = None,
+    sort: str = Query("newest", description="newest, stock_asc or stock_desc"),
+    cursor: Optional[str] = None,
+    count: str = Query("exact", description="exact, estimate or none"),
     db: AsyncSession = Depends(get_db)
 ):
     """
     List products with filtering and pagination.
     Returns aggregated data for the list view.
+    
+    Stock filtering and sorting run in SQL against the per-variant totals,
+    so pages are always full and `total` matches the filter.
+    Pass `cursor` (the previous response's next_cursor) for keyset paging;
+    `page` is then ignored. `count=none` skips the total (see core/pagination.py).
     """
-    # Build base query
-    query = select(Product).options(
-        selectinload(Product.variants),
-        selectinload(Product.images),
-        selectinload(Product.category)
+    if sort not in PRODUCT_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(PRODUCT_SORTS)}")
+    
+    # Stock per product from the maintained per-variant totals. Correlated, so with the
+    # product_id index it is only evaluated for rows the query actually touches.
+    total_stock = (
+        select(func.coalesce(func.sum(ProductVariant.quantity), 0))
+        .where(ProductVariant.product_id == Product.id)
+        .correlate(Product)
+        .scalar_subquery()
     )
     
     # Apply filters
     filters = []
     
     if search:
-        search_filter = or_(
-            Product.name.ilike(f"%{search}%"),
-            Product.slug.ilike(f"%{search}%")
-        )
-        filters.append(search_filter)
+        # Indexed prefix search over name, slug, SKUs and barcodes (see catalog/search.py)
+        matches = search_matches(search)
+        if matches is not None:
+            filters.append(Product.id.in_(select(matches.subquery().c.product_id)))
     
     if category_id:
         filters.append(Product.category_id == category_id)
@@ -124,35 +148,45 @@ async def list_products(
     if status:
         filters.append(Product.status == status)
     
-    if filters:
-        query = query.where(and_(*filters))
+    if stock_status == 'out':
+        filters.append(total_stock <= 0)
+    elif stock_status == 'in':
+        filters.append(total_stock != 0)
+    elif stock_status == 'low':
+        filters.append(total_stock < LOW_STOCK_THRESHOLD)
     
-    # Get total count
-    count_query = select(func.count()).select_from(Product)
+    # Total over the same filters (without the stock column)
+    count_query = select(Product.id)
     if filters:
         count_query = count_query.where(and_(*filters))
-    result = await db.execute(count_query)
-    total = result.scalar_one()
+    total = await count_rows(db, count_query, count, table="products")
+    
+    # Build base query
+    query = (
+        select(Product, total_stock.label("total_stock"))
+        .options(
+            selectinload(Product.variants),
+            selectinload(Product.images),
+            selectinload(Product.category)
+        )
+    )
+    if filters:
+        query = query.where(and_(*filters))
     
-    # Apply pagination and ordering
-    query = query.order_by(desc(Product.created_at))
-    query = query.offset((page - 1) * page_size).limit(page_size)
+    # Ordering: (sort key, id); the (created_at, id) index serves "newest"
+    if sort == "newest":
+        sort_key, descending = Product.created_at, True
+    else:
+        sort_key, descending = total_stock, sort == "stock_desc"
     
-    # Execute query
-    result = await db.execute(query)
-    products = result.scalars().all()
+    rows, next_cursor = await fetch_page(
+        db, query, sort_key=sort_key, id_column=Product.id, descending=descending,
+        cursor=cursor, page=page, page_size=page_size, scalars=False
+    )
     
     # Build response items
-    from app.modules.inventory.service import get_variant_total_stock
-    
     items = []
-    for product in products:
-        # Aggregate variant data - calculate stock from InventoryItem
-        total_stock = 0
-        for variant in product.variants:
-            variant_stock = await get_variant_total_stock(db, variant.id)
-            total_stock += variant_stock
-        
+    for product, product_stock in rows:
         prices = [v.price for v in product.variants if v.price > 0]
         min_price = min(prices) if prices else None
         max_price = max(prices) if prices else None
@@ -162,15 +196,6 @@ async def list_products(
         if not main_image and product.images:
             main_image = product.images[0].image_url
         
-        # Apply stock filter if needed
-        if stock_status:
-            if stock_status == 'out' and total_stock > 0:
-                continue
-            if stock_status == 'in' and total_stock == 0:
-                 continue
-            if stock_status == 'low' and total_stock >= 5:
-                continue
-        
         items.append(ProductListItem(
             id=product.id,
             name=product.name,
@@ -179,7 +204,7 @@ async def list_products(
             status=product.status,
             created_at=product.created_at,
             total_variants=len(product.variants),
-            total_stock=total_stock,
+            total_stock=product_stock,
             min_price=min_price,
             max_price=max_price,
             main_image_url=main_image,
@@ -187,14 +212,13 @@ async def list_products(
             category_name=product.category.name if product.category else None
         ))
     
-    total_pages = (total + page_size - 1) // page_size
-    
     return ProductListResponse(
         items=items,
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages(total, page_size),
+        next_cursor=next_cursor
     )
 
 
@@ -300,6 +324,7 @@ async def create_product(
             )
             db.add(cf)
     
+    await index_products(db, [product.id])
     await db.commit()
     
     # Re-fetch with all relationships to avoid MissingGreenlet error during serialization
@@ -321,65 +346,12 @@ async def create_product(
 # ----------------------------------------------------------------------
 @router.get("/api/products/export")
 async def export_products(
-    ids: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db)
+    ids: Optional[str] = Query(None)
 ):
-    """Export products to Excel (All or Selected)"""
-    query = select(Product).options(
-        selectinload(Product.variants),
-        selectinload(Product.category)
-    )
-    
-    if ids:
-        id_list = ids.split(',')
-        query = query.where(Product.id.in_(id_list))
-        
-    result = await db.execute(query)
-    products = result.scalars().all()
-    
-    # Build data for export with Arabic Headers
-    export_data = []
-    for product in products:
-        # If no variants, at least export product info
-        if not product.variants:
-            export_data.append({
-                "اسم المنتج": product.name,
-                "SKU": product.slug, # Fallback
-                "الباركود": "",
-                "السعر": 0,
-                "سعر التكلفة": 0,
-                "الكمية": 0,
-                "الحالة": product.status,
-                "النوع": product.product_type,
-                "التصنيف": product.category.name if product.category else "-",
-                "الخيارات": ""
-            })
-            continue
-
-        for variant in product.variants:
-            export_data.append({
-                "اسم المنتج": product.name,
-                "SKU": variant.sku,
-                "الباركود": variant.barcode,
-                "السعر": variant.price,
-                "سعر التكلفة": variant.cost_price,
-                "الكمية": variant.quantity,
-                "الحالة": product.status,
-                "النوع": product.product_type,
-                "التصنيف": product.category.name if product.category else "-",
-                "الخيارات": variant.options
-            })
-    
-    df = pd.DataFrame(export_data)
-    
-    # Create Excel file in memory
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Products')
-    output.seek(0)
-    
+    """Streams products (all or selected) as Excel, chunk by chunk. Large exports should use /api/jobs/exports."""
+    id_list = ids.split(',') if ids else None
     return StreamingResponse(
-        output,
+        stream_products_xlsx(id_list),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": "attachment; filename=products_export.xlsx"}
     )
@@ -415,7 +387,7 @@ async def get_product_inventory_distribution(
     Get inventory distribution for all variants of a product across warehouses.
     Shows how stock is distributed across different locations.
     """
-    from app.modules.inventory.service import get_variant_stock_by_warehouse, get_variant_total_stock
+    from app.modules.inventory.service import get_stock_by_warehouse_for_variants
     
     # Get product with variants
     query = select(Product).where(Product.id == product_id).options(
@@ -427,18 +399,17 @@ async def get_product_inventory_distribution(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Build inventory distribution for all variants
+    # Build inventory distribution for all variants (one query for every variant)
+    distribution = await get_stock_by_warehouse_for_variants(db, [variant.id for variant in product.variants])
+    
     inventory_data = []
     for variant in product.variants:
-        total_stock = await get_variant_total_stock(db, variant.id)
-        distribution = await get_variant_stock_by_warehouse(db, variant.id)
-        
         inventory_data.append({
             "variant_id": variant.id,
             "sku": variant.sku,
             "options": json.loads(variant.options) if variant.options else {},
-            "total_stock": total_stock,
-            "warehouses": distribution
+            "total_stock": variant.quantity or 0,
+            "warehouses": distribution[variant.id]
         })
     
     return {
@@ -471,6 +442,8 @@ async def update_product(
         if field in ['product_type', 'status'] and value:
             value = ProductTypeEnum(value) if field == 'product_type' else ProductStatusEnum(value)
         setattr(product, field, value)
+    # Always bump, so POS catalog deltas pick up changes to related rows too
+    product.updated_at = datetime.utcnow()
     
     # Update Custom Fields (Delete All & Re-insert strategy for simplicity)
     if custom_fields_data is not None:
@@ -488,8 +461,9 @@ async def update_product(
             )
             db.add(cf)
     
+    await index_products(db, [product.id])
     await db.commit()
-    await db.commit()
+    invalidate_scan_products([product_id])
     
     # Reload product with all relationships
     query = select(Product).where(Product.id == product_id).options(
@@ -518,7 +492,9 @@ async def delete_product(
         raise HTTPException(status_code=404, detail="Product not found")
     
     await db.delete(product)
+    await index_products(db, [product_id])
     await db.commit()
+    invalidate_scan_products([product_id])
 
 
 # ----------------------------------------------------------------------
@@ -568,7 +544,10 @@ async def bulk_operations(
         for product in products:
             await db.delete(product)
         
+        deleted_ids = [product.id for product in products]
+        await index_products(db, deleted_ids)
         await db.commit()
+        invalidate_scan_products(deleted_ids)
         return {"message": f"Deleted {len(products)} products"}
     
     elif operation.action == "update_status":
@@ -615,71 +594,32 @@ async def upload_image(file: UploadFile = File(...)):
 
 
 
-@router.post("/api/products/import")
+@router.post("/api/products/import", status_code=202)
 async def import_products(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
 ):
-    """Import products from Excel file"""
-    if not file.filename.endswith(('.xlsx', '.xls')):
-        raise HTTPException(status_code=400, detail="Only Excel files are supported")
-    
-    # Read Excel file
-    contents = await file.read()
-    df = pd.read_excel(io.BytesIO(contents))
-    
-    # Validate required columns
-    required_cols = ["Product Name", "SKU", "Price", "Quantity"]
-    missing_cols = [col for col in required_cols if col not in df.columns]
-    if missing_cols:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Missing required columns: {', '.join(missing_cols)}"
-        )
-    
-    # Group by product name to handle variants
-    imported_count = 0
-    for product_name, group in df.groupby("Product Name"):
-        # Create product with first variant's data
-        first_row = group.iloc[0]
-        
-        # Generate slug from name
-        slug = product_name.lower().replace(" ", "-")
-        
-        # Check if product exists
-        existing = await db.execute(select(Product).where(Product.slug == slug))
-        if existing.scalar_one_or_none():
-            continue  # Skip existing products
-        
-        product = Product(
-            name=product_name,
-            slug=slug,
-            product_type=ProductTypeEnum(first_row.get("Type", "Physical")),
-            status=ProductStatusEnum(first_row.get("Status", "Active")),
-            taxable=first_row.get("Taxable", False)
-        )
-        
-        db.add(product)
-        await db.flush()
-        
-        # Add variants from all rows for this product
-        for _, row in group.iterrows():
-            variant = ProductVariant(
-                product_id=product.id,
-                sku=row["SKU"],
-                barcode=row.get("Barcode"),
-                price=float(row["Price"]),
-                cost_price=float(row.get("Cost Price", 0)),
-                quantity=int(row["Quantity"]),
-                options=row.get("Options", "{}")
-            )
-            db.add(variant)
-        
-        imported_count += 1
-    
-    await db.commit()
-    
-    return {"message": f"Imported {imported_count} products successfully"}
+    """
+    Import products from an Excel (or CSV) file as a background job.
+    Poll /api/jobs/{job_id}; when done, its download is the per-row error report.
+    """
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if extension not in ('.xlsx', '.xls', '.csv'):
+        raise HTTPException(status_code=400, detail="Only Excel or CSV files are supported")
+
+    # The upload goes straight to the job's directory, without being held in memory
+    job_id = new_job_id()
+    os.makedirs(job_directory(job_id), exist_ok=True)
+    upload_name = "upload" + extension
+    with open(os.path.join(job_directory(job_id), upload_name), "wb") as upload:
+        await run_in_threadpool(shutil.copyfileobj, file.file, upload)
+
+    job = await submit_job(
+        db, "product_import", {"upload": upload_name, "filename": file.filename},
+        created_by=current_user.id, job_id=job_id
+    )
+    return {"message": "Import started", "job_id": job.id, "status": job.status}
 
 
 # ----------------------------------------------------------------------
@@ -729,11 +669,13 @@ async def list_categories_api(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    count: str = Query("exact", description="exact, estimate or none"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get paginated category list"""
     service = CategoryService(db)
-    return await service.get_list(page=page, page_size=page_size, search=search)
+    return await service.get_list(page=page, page_size=page_size, search=search, cursor=cursor, count=count)
 
 
 @router.post("/api/categories", response_model=CategoryResponse, status_code=201)
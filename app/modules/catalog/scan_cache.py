@@ -0,0 +1,205 @@
+"""
+POS Scan Lookup
+Exact barcode/SKU lookup for the till, backed by an in-process LRU of hot
+variants (price, name, main image, available stock) so repeated scans of
+popular items don't hit the database.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, select, or_, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.catalog.models import Product, ProductVariant, ProductImage
+
+# Variants kept in memory (per worker)
+POS_SCAN_CACHE_SIZE = int(os.getenv("POS_SCAN_CACHE_SIZE", "5000"))
+# Seconds an entry is trusted. Catalog and stock writes invalidate immediately;
+# the TTL only bounds staleness for changes made by other workers or scripts.
+POS_SCAN_CACHE_TTL = float(os.getenv("POS_SCAN_CACHE_TTL", "30"))
+
+PLACEHOLDER_IMAGE = "/static/placeholder.png"
+
+
+class ScanEntry:
+    """What the till needs for one scanned variant."""
+
+    __slots__ = ("variant_id", "product_id", "sku", "barcode", "name", "price", "image", "available", "loaded_at")
+
+    def __init__(self, variant_id, product_id, sku, barcode, name, price, image, available):
+        self.variant_id = variant_id
+        self.product_id = product_id
+        self.sku = sku
+        self.barcode = barcode
+        self.name = name or "Unknown"
+        self.price = price
+        self.image = image or PLACEHOLDER_IMAGE
+        self.available = available or 0
+        self.loaded_at = time.monotonic()
+
+    def as_dict(self) -> Dict:
+        return {
+            "id": self.variant_id,
+            "product_id": self.product_id,
+            "sku": self.sku,
+            "barcode": self.barcode,
+            "name": self.name,
+            "price": self.price,
+            "image": self.image,
+            "available": self.available
+        }
+
+
+class _ScanCache:
+    """LRU keyed by scanned code, with reverse indexes for invalidation by variant or product."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.entries: "OrderedDict[str, ScanEntry]" = OrderedDict()
+        self.codes_by_variant: Dict[str, Set[str]] = {}
+        self.variants_by_product: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code: str) -> Optional[ScanEntry]:
+        entry = self.entries.get(code)
+        if entry is None or (time.monotonic() - entry.loaded_at) >= POS_SCAN_CACHE_TTL:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(code)
+        self.hits += 1
+        return entry
+
+    def put(self, code: str, entry: ScanEntry):
+        self._drop_code(code)
+        self.entries[code] = entry
+        self.codes_by_variant.setdefault(entry.variant_id, set()).add(code)
+        self.variants_by_product.setdefault(entry.product_id, set()).add(entry.variant_id)
+        while len(self.entries) > self.size:
+            self._drop_code(next(iter(self.entries)))
+
+    def _drop_code(self, code: str):
+        entry = self.entries.pop(code, None)
+        if entry is None:
+            return
+        codes = self.codes_by_variant.get(entry.variant_id)
+        if codes is not None:
+            codes.discard(code)
+            if not codes:
+                del self.codes_by_variant[entry.variant_id]
+                variants = self.variants_by_product.get(entry.product_id)
+                if variants is not None:
+                    variants.discard(entry.variant_id)
+                    if not variants:
+                        del self.variants_by_product[entry.product_id]
+
+    def drop_variant(self, variant_id: str):
+        for code in list(self.codes_by_variant.get(variant_id, ())):
+            self._drop_code(code)
+
+    def drop_product(self, product_id: str):
+        for variant_id in list(self.variants_by_product.get(product_id, ())):
+            self.drop_variant(variant_id)
+
+    def clear(self):
+        self.entries.clear()
+        self.codes_by_variant.clear()
+        self.variants_by_product.clear()
+
+
+_cache = _ScanCache(POS_SCAN_CACHE_SIZE)
+
+
+def main_image_url():
+    """Correlated subquery: the variant's product main image (else the first by display order)."""
+    return (
+        select(ProductImage.image_url)
+        .where(ProductImage.product_id == ProductVariant.product_id)
+        .order_by(ProductImage.is_main.desc(), ProductImage.display_order, ProductImage.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+async def lookup_scan_code(session: AsyncSession, code: str) -> Optional[ScanEntry]:
+    """
+    Exact match on barcode, then SKU (both indexed). Cached per code.
+    Returns None when nothing matches.
+    """
+    code = (code or "").strip()
+    if not code:
+        return None
+
+    entry = _cache.get(code)
+    if entry is not None:
+        return entry
+
+    stmt = (
+        select(
+            ProductVariant.id,
+            ProductVariant.product_id,
+            ProductVariant.sku,
+            ProductVariant.barcode,
+            Product.name,
+            ProductVariant.price,
+            main_image_url(),
+            ProductVariant.quantity
+        )
+        .join(Product, Product.id == ProductVariant.product_id)
+        .where(or_(ProductVariant.barcode == code, ProductVariant.sku == code))
+        # A barcode that happens to equal another variant's SKU wins
+        .order_by(case((ProductVariant.barcode == code, 0), else_=1))
+        .limit(1)
+    )
+    row = (await session.execute(stmt)).first()
+    if row is None:
+        return None
+
+    entry = ScanEntry(*row)
+    _cache.put(code, entry)
+    return entry
+
+
+def invalidate_scan_variants(variant_ids: Iterable[str]):
+    """Call when variants' price, codes or stock change."""
+    for variant_id in variant_ids:
+        _cache.drop_variant(variant_id)
+
+
+def invalidate_scan_variants_on_commit(session: AsyncSession, variant_ids: Iterable[str]):
+    """
+    For writes inside a caller's transaction: the variants are dropped once
+    the session commits (nothing happens on rollback), so a scan between the
+    write and the commit can't cache the old values again.
+    """
+    info = session.sync_session.info
+    if "scan_variants" not in info:
+        info["scan_variants"] = set()
+        event.listen(session.sync_session, "after_commit", _invalidate_committed)
+        event.listen(session.sync_session, "after_rollback", _discard_uncommitted)
+    info["scan_variants"].update(variant_ids)
+
+
+def _invalidate_committed(sync_session):
+    invalidate_scan_variants(sync_session.info.get("scan_variants", ()))
+    _discard_uncommitted(sync_session)
+
+
+def _discard_uncommitted(sync_session):
+    sync_session.info.get("scan_variants", set()).clear()
+
+
+def invalidate_scan_products(product_ids: Iterable[str]):
+    """Call when products (name, images, variants) change or are deleted."""
+    for product_id in product_ids:
+        _cache.drop_product(product_id)
+
+
+def clear_scan_cache():
+    _cache.clear()
+
+
+def scan_cache_stats() -> Dict:
+    return {"entries": len(_cache.entries), "size": _cache.size, "hits": _cache.hits, "misses": _cache.misses}
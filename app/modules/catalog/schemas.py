@@ -60,10 +60,11 @@ class CategoryResponse(CategoryBase):
 
 class CategoryListResponse(BaseModel):
     items: List[CategoryResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class CategoryTreeItem(CategoryResponse):
@@ -295,10 +296,11 @@ class ProductFilters(BaseModel):
 class ProductListResponse(BaseModel):
     """Paginated product list response"""
     items: List[ProductListItem]
-    total: int
+    total: Optional[int] = None  # None when requested with count=none
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Keyset cursor for the next page (None on the last page)
 
 
 # ----------------------------------------------------------------------
@@ -0,0 +1,289 @@
+"""
+Product Search Index
+Normalized per-product search documents with a backend-specific index:
+- Postgres: GIN index on to_tsvector('simple', document) for prefix matching
+  and ranking, plus a pg_trgm index for infix matches when the extension is available
+- SQLite: FTS5 virtual table mirroring the documents (local runs)
+- Anything else: LIKE over the normalized documents
+"""
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, insert, delete, exists, func, and_, or_, text, table, column, literal, literal_column
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.modules.catalog.models import Product, ProductVariant, ProductSearchDocument
+
+# Products per IN (...) list when (re)indexing
+SEARCH_INDEX_CHUNK = 500
+# pg_advisory_xact_lock key serializing ensure_search_index across workers
+SEARCH_INDEX_LOCK_ID = 0x5EA4C1
+
+FTS_TABLE = "product_search_fts"
+_fts = table(FTS_TABLE, column("product_id"), column("document"), column("rank"))
+
+
+class _SearchState:
+    backend: str = "like"  # "postgres", "postgres_trgm", "fts5" or "like"; set by ensure_search_index
+    fts_table: bool = False  # FTS5 mirror seen in this database (job workers and scripts never run ensure_search_index)
+
+
+_state = _SearchState()
+
+
+# ----------------------------------------------------------------------
+# Normalization
+# ----------------------------------------------------------------------
+
+_DIGITS = str.maketrans("٠١٢٣٤٥٦٧٨٩۰۱۲۳۴۵۶۷۸۹", "01234567890123456789")
+_LETTERS = str.maketrans({
+    "ٱ": "ا",  # alef wasla -> alef (أ إ آ fold to alef via NFKD)
+    "ى": "ي",  # alef maqsura -> ya
+    "ة": "ه",  # ta marbuta -> ha
+    "ـ": None,      # tatweel
+})
+_WORD = re.compile(r"\w+")
+
+
+def normalize_search_text(value: Optional[str]) -> str:
+    """
+    Case-folds and strips diacritics (Arabic harakat and Latin accents),
+    folds alef/hamza forms, ya/alef maqsura and ta marbuta, and maps
+    Arabic-Indic digits to ASCII. Returns space-separated tokens.
+    """
+    if not value:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(value).casefold())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    folded = stripped.translate(_LETTERS).translate(_DIGITS)
+    return " ".join(_WORD.findall(folded))
+
+
+def search_tokens(term: Optional[str]) -> List[str]:
+    return normalize_search_text(term).split()
+
+
+def build_document(name: Optional[str], slug: Optional[str], codes: Iterable[Optional[str]]) -> str:
+    """Search text for one product. SKUs/barcodes are also indexed without separators ("SKU-0042" -> "sku0042")."""
+    parts = [normalize_search_text(name), normalize_search_text(slug)]
+    for code in codes:
+        tokens = normalize_search_text(code)
+        if tokens:
+            parts.append(tokens)
+            if " " in tokens:
+                parts.append(tokens.replace(" ", ""))
+    return " ".join(part for part in parts if part)
+
+
+# ----------------------------------------------------------------------
+# Index maintenance
+# ----------------------------------------------------------------------
+
+async def ensure_search_index(conn: AsyncConnection):
+    """
+    Creates the backend-specific index objects (idempotent), picks the
+    query backend and indexes products that have no document yet. Run at
+    startup, after create_all, inside a transaction: on Postgres workers
+    starting together take turns on an advisory lock, so only the first
+    one has anything to index.
+    """
+    dialect = conn.dialect.name
+
+    if dialect == "postgresql":
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": SEARCH_INDEX_LOCK_ID})
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_product_search_documents_tsv "
+            "ON product_search_documents USING gin (to_tsvector('simple', document))"
+        ))
+        _state.backend = "postgres"
+        try:
+            async with conn.begin_nested():
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                await conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_product_search_documents_trgm "
+                    "ON product_search_documents USING gin (document gin_trgm_ops)"
+                ))
+            _state.backend = "postgres_trgm"
+        except DBAPIError:
+            # No permission to create the extension: tsvector prefix search only
+            pass
+
+    elif dialect == "sqlite":
+        try:
+            await conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(product_id UNINDEXED, document, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+            _state.backend = "fts5"
+        except DBAPIError:
+            # SQLite built without FTS5
+            _state.backend = "like"
+
+    else:
+        _state.backend = "like"
+
+    # First run, an upgrade, or products written around the catalog API
+    await _index_missing(conn)
+
+    if _state.backend == "fts5":
+        _state.fts_table = True
+        await _sync_fts(conn)
+
+
+async def _sync_fts(conn: AsyncConnection):
+    """
+    Brings the FTS5 mirror in line with the documents by content: drops rows
+    that are stale, orphaned or repeated, then adds the documents that are
+    missing. Matching counts don't mean matching text.
+    """
+    await conn.execute(text(
+        f"DELETE FROM {FTS_TABLE} WHERE rowid IN ("
+        f"SELECT f.rowid FROM {FTS_TABLE} f "
+        "LEFT JOIN product_search_documents d ON d.product_id = f.product_id "
+        "WHERE d.document IS NOT f.document"
+        f") OR rowid NOT IN (SELECT min(rowid) FROM {FTS_TABLE} GROUP BY product_id)"
+    ))
+    await conn.execute(text(
+        f"INSERT INTO {FTS_TABLE} (product_id, document) "
+        "SELECT product_id, document FROM product_search_documents "
+        f"WHERE product_id NOT IN (SELECT product_id FROM {FTS_TABLE})"
+    ))
+
+
+async def _has_fts(executor) -> bool:
+    """
+    Whether writes must keep the FTS5 mirror current. Checked against the
+    database rather than the backend this process picked, so a process that
+    never ran ensure_search_index still updates the mirror.
+    """
+    if _state.backend == "fts5" or _state.fts_table:
+        return True
+    dialect = executor.dialect if isinstance(executor, AsyncConnection) else executor.get_bind().dialect
+    if dialect.name != "sqlite":
+        return False
+    _state.fts_table = bool((await executor.execute(
+        text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    )).scalar())
+    return _state.fts_table
+
+
+async def _index_missing(executor):
+    """Writes documents for products without one and drops documents of deleted products; existing ones are kept."""
+    orphaned = ~exists().where(Product.id == ProductSearchDocument.product_id)
+    await executor.execute(delete(ProductSearchDocument).where(orphaned))
+
+    missing = (await executor.execute(
+        select(Product.id)
+        .where(~exists().where(ProductSearchDocument.product_id == Product.id))
+        .order_by(Product.id)
+    )).scalars().all()
+    for start in range(0, len(missing), SEARCH_INDEX_CHUNK):
+        await _write_documents(executor, missing[start:start + SEARCH_INDEX_CHUNK])
+
+
+async def _write_documents(executor, product_ids: List[str]):
+    """Recomputes documents for the given products; products that no longer exist are dropped."""
+    rows = await executor.execute(
+        select(Product.id, Product.name, Product.slug).where(Product.id.in_(product_ids))
+    )
+    products = {pid: (name, slug) for pid, name, slug in rows.all()}
+
+    codes = {pid: [] for pid in products}
+    rows = await executor.execute(
+        select(ProductVariant.product_id, ProductVariant.sku, ProductVariant.barcode)
+        .where(ProductVariant.product_id.in_(product_ids))
+    )
+    for pid, sku, barcode in rows.all():
+        codes[pid].extend((sku, barcode))
+
+    documents = [
+        {"product_id": pid, "document": build_document(name, slug, codes[pid])}
+        for pid, (name, slug) in products.items()
+    ]
+
+    await executor.execute(delete(ProductSearchDocument).where(ProductSearchDocument.product_id.in_(product_ids)))
+    if documents:
+        await executor.execute(insert(ProductSearchDocument), documents)
+
+    if await _has_fts(executor):
+        await executor.execute(delete(_fts).where(_fts.c.product_id.in_(product_ids)))
+        if documents:
+            await executor.execute(insert(_fts), documents)
+
+
+async def index_products(session: AsyncSession, product_ids: Iterable[str]):
+    """
+    Keeps the search index in sync after product create/update/delete/import.
+    Call before committing; the changes ride in the same transaction.
+    """
+    ids = list(dict.fromkeys(pid for pid in product_ids if pid))
+    if not ids:
+        return
+    await session.flush()
+    for start in range(0, len(ids), SEARCH_INDEX_CHUNK):
+        await _write_documents(session, ids[start:start + SEARCH_INDEX_CHUNK])
+
+
+async def _rebuild(executor):
+    await executor.execute(delete(ProductSearchDocument))
+    if await _has_fts(executor):
+        await executor.execute(delete(_fts))
+
+    ids = (await executor.execute(select(Product.id).order_by(Product.id))).scalars().all()
+    for start in range(0, len(ids), SEARCH_INDEX_CHUNK):
+        await _write_documents(executor, ids[start:start + SEARCH_INDEX_CHUNK])
+
+
+async def rebuild_search_index(session: AsyncSession) -> int:
+    """Rebuilds every document from scratch. Returns the number of products indexed. Commits."""
+    await _rebuild(session)
+    await session.commit()
+    return (await session.execute(select(func.count()).select_from(ProductSearchDocument))).scalar()
+
+
+# ----------------------------------------------------------------------
+# Querying
+# ----------------------------------------------------------------------
+
+def search_matches(term: Optional[str]):
+    """
+    Select of (product_id, score) for products matching every token of `term`
+    as a prefix (type-ahead). Lower score = better match.
+    Returns None when the term has no searchable characters.
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return None
+
+    if _state.backend == "fts5":
+        # Tokens are \w+ only; quoting keeps FTS5 syntax characters literal
+        expression = " ".join(f'"{token}"*' for token in tokens)
+        return (
+            select(_fts.c.product_id.label("product_id"), _fts.c.rank.label("score"))
+            .where(_fts.c.document.op("MATCH")(expression))
+        )
+
+    document = ProductSearchDocument.document
+
+    if _state.backend in ("postgres", "postgres_trgm"):
+        # Literal config (not a bound parameter) so the expression matches the GIN index
+        config = literal_column("'simple'::regconfig")
+        vector = func.to_tsvector(config, document)
+        query = func.to_tsquery(config, " & ".join(f"{token}:*" for token in tokens))
+        matched = vector.op("@@")(query)
+        score = -func.ts_rank(vector, query)
+        if _state.backend == "postgres_trgm":
+            # Trigram index also serves infix matches ("0042" inside "sku0042")
+            phrase = " ".join(tokens)
+            matched = or_(matched, document.ilike(f"%{phrase}%"))
+            score = score - func.similarity(document, phrase)
+        return select(ProductSearchDocument.product_id.label("product_id"), score.label("score")).where(matched)
+
+    # Portable fallback: every token must appear at a word start
+    conditions = [
+        or_(document.like(f"{token}%"), document.like(f"% {token}%"))
+        for token in tokens
+    ]
+    return select(ProductSearchDocument.product_id.label("product_id"), literal(0).label("score")).where(and_(*conditions))
@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, update
 from sqlalchemy.orm import selectinload
 
+from app.core.pagination import fetch_page, count_rows, total_pages
 from app.modules.catalog.models import Category, Product, Attribute, AttributeValue
 from app.modules.catalog.schemas import (
     CategoryCreate, CategoryUpdate,
@@ -28,28 +29,35 @@ class CategoryService:
         result = await self.db.execute(query)
         return result.scalars().all()
 
-    async def get_list(self, page: int = 1, page_size: int = 20, search: Optional[str] = None) -> Dict[str, Any]:
-        """Get paginated category list with search"""
+    async def get_list(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        search: Optional[str] = None,
+        cursor: Optional[str] = None,
+        count: str = "exact"
+    ) -> Dict[str, Any]:
+        """Get paginated category list with search (keyset paging with `cursor`)"""
         query = select(Category)
         
         if search:
             query = query.where(Category.name.ilike(f"%{search}%"))
             
-        # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total = (await self.db.execute(count_query)).scalar()
+        total = await count_rows(self.db, query, count, table="categories")
         
-        # Paginate
-        query = query.order_by(Category.sort_order).offset((page - 1) * page_size).limit(page_size)
-        result = await self.db.execute(query)
-        items = result.scalars().all()
+        # Paginate by (sort_order, id)
+        items, next_cursor = await fetch_page(
+            self.db, query, sort_key=Category.sort_order, id_column=Category.id, descending=False,
+            cursor=cursor, page=page, page_size=page_size
+        )
         
         return {
             "items": items,
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            "total_pages": total_pages(total, page_size),
+            "next_cursor": next_cursor
         }
 
     async def get_tree(self) -> List[Dict[str, Any]]:
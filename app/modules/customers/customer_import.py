@@ -0,0 +1,201 @@
+"""
+Customer CSV Import
+Background job that streams a customer CSV: rows are parsed incrementally
+(the file is never held in memory), validated, checked against existing
+customers by email (case-insensitive) and mobile through indexed lookups and
+against earlier rows of the same file, then bulk-inserted
+CUSTOMER_IMPORT_CHUNK_SIZE rows at a time with one commit per chunk.
+Rejected rows go to an error CSV, which is the job's download.
+"""
+import csv
+import itertools
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import AsyncSessionLocal
+from app.modules.jobs.runner import job_handler, JobContext
+from .models import Customer, CustomerType, Gender
+from .schemas import normalize_mobile
+from .segments import invalidate_segment_counts
+
+# Rows inserted (and committed) per chunk
+CUSTOMER_IMPORT_CHUNK_SIZE = int(os.getenv("CUSTOMER_IMPORT_CHUNK_SIZE", "1000"))
+
+ERROR_REPORT_NAME = "customer_import_errors.csv"
+ERROR_REPORT_COLUMNS = ["Row", "Name", "Email", "Mobile", "Error"]
+
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+CUSTOMER_TYPES = {t.value for t in CustomerType}
+GENDERS = {g.value for g in Gender}
+
+
+def normalize_email(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip().lower()
+    return value or None
+
+
+def _clean(row: Dict, column: str, default: Optional[str] = None) -> Optional[str]:
+    value = (row.get(column) or "").strip()
+    return value or default
+
+
+def parse_customer_row(row: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """CSV row (export column names) -> (insert values, None) or (None, error)."""
+    name = _clean(row, "Name", "")
+    if len(name) < 2:
+        return None, "Name is required (at least 2 characters)"
+    if len(name) > 100:
+        return None, "Name is longer than 100 characters"
+
+    email = normalize_email(row.get("Email"))
+    if email and (len(email) > 255 or not EMAIL_PATTERN.match(email)):
+        return None, "Invalid email"
+
+    mobile = normalize_mobile(row.get("Mobile"))
+    if mobile and len(mobile) > 20:
+        return None, "Mobile is longer than 20 characters"
+
+    customer_type = _clean(row, "Type", CustomerType.INDIVIDUAL.value).lower()
+    if customer_type not in CUSTOMER_TYPES:
+        return None, f"Type must be one of: {', '.join(sorted(CUSTOMER_TYPES))}"
+
+    gender = (_clean(row, "Gender") or "").lower() or None
+    if gender and gender not in GENDERS:
+        return None, f"Gender must be one of: {', '.join(sorted(GENDERS))}"
+
+    return {
+        "name": name,
+        "email": email,
+        "mobile": mobile,
+        "country": _clean(row, "Country", "Saudi Arabia"),
+        "city": _clean(row, "City"),
+        "customer_type": CustomerType(customer_type),
+        "gender": Gender(gender) if gender else None,
+        "channel": _clean(row, "Channel", "Store"),
+    }, None
+
+
+def count_csv_rows(path: str) -> int:
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        return max(sum(1 for _ in csv.reader(source)) - 1, 0)
+
+
+async def existing_contacts(session: AsyncSession, emails: Set[str], mobiles: Set[str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Which of these (normalized) emails / mobiles already belong to a customer.
+    Stored mobiles are normalized too (the customer schemas on every write,
+    migration 0017 for older rows), so they're compared as-is on the index.
+    """
+    found_emails: Set[str] = set()
+    found_mobiles: Set[str] = set()
+    if emails:
+        email_key = func.lower(Customer.email)
+        found_emails.update((await session.execute(
+            select(email_key).where(email_key.in_(list(emails)))
+        )).scalars().all())
+    if mobiles:
+        found_mobiles.update((await session.execute(
+            select(Customer.mobile).where(Customer.mobile.in_(list(mobiles)))
+        )).scalars().all())
+    return found_emails, found_mobiles
+
+
+@job_handler("customer_import")
+async def run_customer_import(ctx: JobContext):
+    upload_path = os.path.join(ctx.directory, ctx.params["upload"])
+    report_path = ctx.path(ERROR_REPORT_NAME)
+    checkpoint = {"rows": 0, "imported": 0, "skipped": 0, "report_offset": 0, **ctx.checkpoint}
+
+    if ctx.rows_total is None:
+        await ctx.set_total(await run_in_threadpool(count_csv_rows, upload_path))
+
+    # Contacts seen earlier in this run; rows imported by an earlier attempt are in the database
+    seen_emails: Set[str] = set()
+    seen_mobiles: Set[str] = set()
+
+    with open(upload_path, newline="", encoding="utf-8-sig") as source, \
+            open(report_path, "a+", newline="", encoding="utf-8") as report_file:
+        reader = csv.DictReader(source)
+        if not reader.fieldnames or "Name" not in reader.fieldnames:
+            raise ValueError("Missing required column: Name")
+
+        # Drop report lines written after the last committed chunk
+        report_file.truncate(checkpoint["report_offset"])
+        report_file.seek(checkpoint["report_offset"])
+        report = csv.writer(report_file)
+        if checkpoint["report_offset"] == 0:
+            report_file.write("\ufeff")  # Excel opens it as UTF-8
+            report.writerow(ERROR_REPORT_COLUMNS)
+
+        rows = itertools.islice(reader, checkpoint["rows"], None)
+        while True:
+            chunk = list(itertools.islice(rows, CUSTOMER_IMPORT_CHUNK_SIZE))
+            if not chunk:
+                break
+            # Spreadsheet-style row numbers: the header is row 1
+            first_row = checkpoint["rows"] + 2
+
+            errors: List[Tuple[int, Dict, str]] = []
+            parsed: List[Tuple[int, Dict, Dict]] = []
+            for offset, raw in enumerate(chunk):
+                values, error = parse_customer_row(raw)
+                if error:
+                    errors.append((first_row + offset, raw, error))
+                else:
+                    parsed.append((first_row + offset, raw, values))
+
+            async with AsyncSessionLocal() as session:
+                taken_emails, taken_mobiles = await existing_contacts(
+                    session,
+                    {values["email"] for _, _, values in parsed if values["email"]},
+                    {values["mobile"] for _, _, values in parsed if values["mobile"]},
+                )
+
+                new_customers = []
+                for row_number, raw, values in parsed:
+                    email, mobile = values["email"], values["mobile"]
+                    if email and (email in taken_emails or email in seen_emails):
+                        errors.append((row_number, raw, "Duplicate email"))
+                        continue
+                    if mobile and (mobile in taken_mobiles or mobile in seen_mobiles):
+                        errors.append((row_number, raw, "Duplicate mobile"))
+                        continue
+                    if email:
+                        seen_emails.add(email)
+                    if mobile:
+                        seen_mobiles.add(mobile)
+                    new_customers.append(values)
+
+                if new_customers:
+                    await session.execute(insert(Customer), new_customers)
+
+                errors.sort(key=lambda error: error[0])
+                report.writerows(
+                    (row_number, raw.get("Name") or "", raw.get("Email") or "", raw.get("Mobile") or "", error)
+                    for row_number, raw, error in errors
+                )
+                report_file.flush()
+
+                checkpoint["rows"] += len(chunk)
+                checkpoint["imported"] += len(new_customers)
+                checkpoint["skipped"] += len(errors)
+                checkpoint["report_offset"] = report_file.tell()
+                # The checkpoint commits with the chunk: a resumed job never repeats or skips rows
+                await ctx.progress(checkpoint["rows"], checkpoint, session=session)
+                await session.commit()
+            if new_customers:
+                invalidate_segment_counts()
+
+    ctx.result = {
+        "imported": checkpoint["imported"],
+        "skipped": checkpoint["skipped"],
+        "message": f"Imported {checkpoint['imported']} customers, {checkpoint['skipped']} rows skipped",
+    }
+    if checkpoint["skipped"]:
+        ctx.artifact_path = report_path
+        ctx.artifact_name = ERROR_REPORT_NAME
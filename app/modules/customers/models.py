@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, DateTime, Enum, Boolean, JSON
+from sqlalchemy import String, Integer, DateTime, Enum, Boolean, JSON, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List
 from app.core.models import TimeStampedModel
@@ -20,7 +20,7 @@ class Customer(TimeStampedModel):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100))
     email: Mapped[str] = mapped_column(String(255), nullable=True)
-    mobile: Mapped[str] = mapped_column(String(20), nullable=True)
+    mobile: Mapped[str] = mapped_column(String(20), nullable=True, index=True)
     
     # Address
     country: Mapped[str] = mapped_column(String(100), default="Saudi Arabia")
@@ -43,6 +43,9 @@ class Customer(TimeStampedModel):
     orders: Mapped[List["app.modules.sales.models.Order"]] = relationship("app.modules.sales.models.Order", back_populates="customer")
     carts: Mapped[List["app.modules.sales.models.AbandonedCart"]] = relationship("app.modules.sales.models.AbandonedCart", back_populates="customer")
 
+# Duplicate checks (CSV import) match emails case-insensitively
+Index("ix_customers_email_lower", func.lower(Customer.email))
+
 class CustomerGroup(TimeStampedModel):
     __tablename__ = "customer_groups"
     
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, Query, Request, Form, UploadFile, File
-from fastapi.responses import HTMLResponse, Response
+import os
+import shutil
+from fastapi import APIRouter, Depends, Query, Request, Form, UploadFile, File, HTTPException
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.core.database import get_db
-from . import service, schemas
+from starlette.concurrency import run_in_threadpool
+from app.dependencies import get_current_user
+from app.modules.auth.models import User
+from app.modules.jobs.runner import submit_job, new_job_id, job_directory
+from . import service, schemas, customer_import  # customer_import registers the "customer_import" job
 from .models import CustomerType, Gender
 from datetime import datetime
 
@@ -220,6 +226,8 @@ async def list_customers(
     orders_value: Optional[int] = None,
     page: int = 1,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    count: str = "exact",
     db: AsyncSession = Depends(get_db)
 ):
     """Advanced customer listing with filtering"""
@@ -237,7 +245,9 @@ async def list_customers(
         orders_condition=orders_condition,
         orders_value=orders_value,
         skip=skip,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        count=count
     )
 
 @router.put("/api/customers/{customer_id}", response_model=schemas.CustomerResponse)
@@ -273,25 +283,38 @@ async def get_customer_stats(customer_id: int, db: AsyncSession = Depends(get_db
 
 # --- Export/Import ---
 @router.get("/api/customers/export")
-async def export_customers(db: AsyncSession = Depends(get_db)):
-    """Export all customers to CSV"""
-    csv_content = await service.export_customers_csv(db)
-    return Response(
-        content=csv_content,
+async def export_customers():
+    """Export all customers to CSV (streamed; large exports should use /api/jobs/exports)"""
+    return StreamingResponse(
+        service.stream_customers_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=customers.csv"}
     )
 
-@router.post("/api/customers/import")
+@router.post("/api/customers/import", status_code=202)
 async def import_customers(
     file: UploadFile = File(...),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
 ):
-    """Import customers from CSV"""
-    content = await file.read()
-    file_content = content.decode('utf-8')
-    result = await service.import_customers_csv(db, file_content)
-    return result
+    """
+    Import customers from CSV as a background job.
+    Poll /api/jobs/{job_id}; when done, its download is the per-row error report.
+    """
+    if not (file.filename or "").lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV files are supported")
+
+    # The upload goes straight to the job's directory, without being held in memory
+    job_id = new_job_id()
+    os.makedirs(job_directory(job_id), exist_ok=True)
+    with open(os.path.join(job_directory(job_id), "upload.csv"), "wb") as upload:
+        await run_in_threadpool(shutil.copyfileobj, file.file, upload)
+
+    job = await submit_job(
+        db, "customer_import", {"upload": "upload.csv", "filename": file.filename},
+        created_by=current_user.id, job_id=job_id
+    )
+    return {"message": "Import started", "job_id": job.id, "status": job.status}
 
 # --- Groups Routes ---
 @router.get("/customers/groups/list", response_class=HTMLResponse)
@@ -317,5 +340,22 @@ async def list_customer_groups_api(db: AsyncSession = Depends(get_db)):
     """API endpoint to get all customer groups"""
     return await service.get_customer_groups(db)
 
+@router.get("/api/customers/groups/{group_id}/customers")
+async def list_customer_group_members(
+    group_id: int,
+    page: int = 1,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    db: AsyncSession = Depends(get_db)
+):
+    """Customers matching the group's criteria"""
+    members = await service.get_group_members(
+        db, group_id, skip=(page - 1) * limit, limit=limit, cursor=cursor, count=count
+    )
+    if members is None:
+        raise HTTPException(status_code=404, detail="Customer group not found")
+    return members
+
 
 
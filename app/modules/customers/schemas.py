@@ -4,6 +4,16 @@ from datetime import datetime
 from .models import CustomerType, Gender
 import re
 
+# Stripped from mobiles on every write, so dedupe can compare stored values directly
+MOBILE_NOISE = re.compile(r"[\s\-().]")
+
+
+def normalize_mobile(value: Optional[str]) -> Optional[str]:
+    """Drops spaces, dashes, dots and brackets: "050 123-4567" -> "0501234567"."""
+    value = MOBILE_NOISE.sub("", value or "")
+    return value or None
+
+
 class CustomerBase(BaseModel):
     name: str = Field(..., min_length=2, max_length=100)
     email: Optional[EmailStr] = None  # EmailStr validates format automatically
@@ -15,6 +25,11 @@ class CustomerBase(BaseModel):
     dob: Optional[datetime] = None
     channel: Optional[str] = "Store"
 
+    @field_validator("mobile")
+    @classmethod
+    def _normalize_mobile(cls, value):
+        return normalize_mobile(value)
+
 class CustomerCreate(CustomerBase):
     pass
 
@@ -27,6 +42,11 @@ class CustomerUpdate(BaseModel):
     gender: Optional[Gender] = None
     dob: Optional[datetime] = None
 
+    @field_validator("mobile")
+    @classmethod
+    def _normalize_mobile(cls, value):
+        return normalize_mobile(value)
+
 class CustomerResponse(CustomerBase):
     id: int
     created_at: datetime
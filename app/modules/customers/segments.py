@@ -0,0 +1,182 @@
+"""
+Customer Segments
+Compiles a customer group's JSON criteria ({"min_orders": 5, "city": "Riyadh"})
+into one SQL predicate over `customers`, so membership is decided by the
+database. The groups page gets every group's count from a single
+SUM(CASE WHEN <predicate> THEN 1 ELSE 0 END) pass, and member listing uses
+the same predicate as its WHERE clause. Marketing segments, which qualify on
+actual orders (count, amount spent), compile to GROUP BY ... HAVING over orders.
+"""
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, func, case, and_, true, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from .models import Customer, Gender
+
+# Seconds a group count is trusted. Customer writes through the service and the
+# importer invalidate immediately; the TTL only bounds staleness for changes
+# made elsewhere (other workers, scripts).
+SEGMENT_COUNT_CACHE_TTL = float(os.getenv("SEGMENT_COUNT_CACHE_TTL", "300"))
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _attribute_predicates(criteria: dict) -> Optional[List[ColumnElement]]:
+    """
+    Soft-deleted customers never qualify (as in /api/customers), plus the
+    city / gender predicates; None when a value is malformed.
+    """
+    predicates = [Customer.deleted_at.is_(None)]
+    if criteria.get("city"):
+        predicates.append(Customer.city == criteria["city"])
+    if criteria.get("gender"):
+        try:
+            predicates.append(Customer.gender == Gender(criteria["gender"]))
+        except ValueError:
+            return None
+    return predicates
+
+
+def compile_criteria(criteria: Optional[dict]) -> ColumnElement:
+    """
+    Criteria -> WHERE predicate on Customer. Supported keys: min_orders,
+    max_orders (against the customer's total_orders), city, gender; unknown
+    keys are ignored, empty criteria match every customer that isn't
+    soft-deleted and a malformed value matches no one.
+    """
+    criteria = criteria or {}
+    predicates = _attribute_predicates(criteria)
+    if predicates is None:
+        return false()
+
+    if criteria.get("min_orders"):
+        min_orders = _int(criteria["min_orders"])
+        if min_orders is None:
+            return false()
+        predicates.append(Customer.total_orders >= min_orders)
+
+    if criteria.get("max_orders"):
+        max_orders = _int(criteria["max_orders"])
+        if max_orders is None:
+            return false()
+        predicates.append(Customer.total_orders <= max_orders)
+
+    return and_(true(), *predicates)
+
+
+def order_segment_stmt(criteria: Optional[dict]):
+    """
+    Ids of customers qualifying on their order history: SELECT orders.customer_id
+    ... GROUP BY orders.customer_id HAVING count >= min_orders AND sum >= min_spent,
+    with soft-deleted customers and city / gender filtered out on the joined
+    customer first. Only customers with at least one order qualify. Page it
+    with fetch_page / iter_chunks on Order.customer_id.
+    """
+    from app.modules.sales.models import Order
+
+    criteria = criteria or {}
+    stmt = select(Order.customer_id).group_by(Order.customer_id)
+
+    predicates = _attribute_predicates(criteria)
+    if predicates is None:
+        return stmt.where(false())
+    stmt = stmt.join(Customer, Customer.id == Order.customer_id).where(*predicates)
+
+    having = []
+    if criteria.get("min_orders") is not None:
+        min_orders = _int(criteria["min_orders"])
+        if min_orders is None:
+            return stmt.where(false())
+        having.append(func.count(Order.id) >= min_orders)
+    if criteria.get("min_spent") is not None:
+        min_spent = _float(criteria["min_spent"])
+        if min_spent is None:
+            return stmt.where(false())
+        having.append(func.coalesce(func.sum(Order.total_amount), 0) >= min_spent)
+    if having:
+        stmt = stmt.having(and_(*having))
+    return stmt
+
+
+def criteria_key(criteria: Optional[dict]) -> str:
+    """Canonical form, so groups with the same criteria share a cached count."""
+    return json.dumps(criteria or {}, sort_keys=True, default=str)
+
+
+class _CountCache:
+    """Member counts keyed by canonical criteria, each with its load time."""
+
+    def __init__(self):
+        self.counts: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, key: str) -> Optional[int]:
+        cached = self.counts.get(key)
+        if cached is None or (time.monotonic() - cached[1]) >= SEGMENT_COUNT_CACHE_TTL:
+            return None
+        return cached[0]
+
+    def put(self, key: str, count: int):
+        self.counts[key] = (count, time.monotonic())
+
+    def clear(self):
+        self.counts.clear()
+
+
+_cache = _CountCache()
+
+
+async def count_segments(session: AsyncSession, criteria_list: Iterable[Optional[dict]]) -> Dict[str, int]:
+    """
+    Member counts for many criteria, keyed by criteria_key(). Cached counts are
+    reused; all the others come from one scan of `customers`.
+    """
+    counts: Dict[str, int] = {}
+    missing: Dict[str, ColumnElement] = {}
+    for criteria in criteria_list:
+        key = criteria_key(criteria)
+        if key in counts or key in missing:
+            continue
+        cached = _cache.get(key)
+        if cached is not None:
+            counts[key] = cached
+        else:
+            missing[key] = compile_criteria(criteria)
+
+    if missing:
+        stmt = select(*[
+            func.coalesce(func.sum(case((predicate, 1), else_=0)), 0)
+            for predicate in missing.values()
+        ]).select_from(Customer)
+        row = (await session.execute(stmt)).one()
+        for key, count in zip(missing, row):
+            counts[key] = int(count)
+            _cache.put(key, int(count))
+
+    return counts
+
+
+def segment_members_stmt(criteria: Optional[dict]):
+    """Customers matching the criteria (no ordering; page it with fetch_page)."""
+    return select(Customer).where(compile_criteria(criteria))
+
+
+def invalidate_segment_counts():
+    """Call after customers are created, changed or deleted."""
+    _cache.clear()
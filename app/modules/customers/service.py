@@ -1,9 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from app.core.pagination import fetch_page, count_rows, total_pages, iter_chunks
 from .models import Customer
 from . import schemas, models
+from .segments import count_segments, criteria_key, segment_members_stmt, invalidate_segment_counts
 from .schemas import CustomerCreate, CustomerUpdate
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
 async def get_customers(session: AsyncSession, skip: int = 0, limit: int = 100) -> List[Customer]:
     stmt = select(Customer).where(Customer.is_active == True).offset(skip).limit(limit)
@@ -18,6 +20,7 @@ async def create_customer(session: AsyncSession, customer_in: CustomerCreate) ->
     customer = Customer(**customer_in.model_dump())
     session.add(customer)
     await session.commit()
+    invalidate_segment_counts()
     await session.refresh(customer)
     return customer
 
@@ -31,6 +34,7 @@ async def update_customer(session: AsyncSession, customer_id: int, customer_in:
         setattr(customer, field, value)
         
     await session.commit()
+    invalidate_segment_counts()
     await session.refresh(customer)
     return customer
 
@@ -44,38 +48,54 @@ async def create_customer_group(session: AsyncSession, group_in: schemas.Custome
 async def get_customer_groups(session: AsyncSession):
     result = await session.execute(select(models.CustomerGroup))
     groups = result.scalars().all()
-    
-    groups_with_counts = []
+
+    # Every group's count from one pass over customers (cached)
+    counts = await count_segments(session, [group.criteria for group in groups])
     for group in groups:
-        count = await count_customers_in_group(session, group.criteria)
-        group.customer_count = count
-        groups_with_counts.append(group)
-        
-    return groups_with_counts
+        group.customer_count = counts[criteria_key(group.criteria)]
 
-async def count_customers_in_group(session: AsyncSession, criteria: dict) -> int:
-    query = select(func.count(models.Customer.id))
-    
-    if criteria.get("min_orders"):
-        query = query.where(models.Customer.total_orders >= int(criteria["min_orders"]))
-    
-    if criteria.get("max_orders"):
-         query = query.where(models.Customer.total_orders <= int(criteria["max_orders"]))
-         
-    if criteria.get("city"):
-        query = query.where(models.Customer.city == criteria["city"])
-        
-    if criteria.get("gender"):
-        query = query.where(models.Customer.gender == criteria["gender"])
+    return groups
 
-    result = await session.execute(query)
-    return result.scalar()
+async def get_group_members(
+    session: AsyncSession,
+    group_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: str = None,
+    count: str = "exact"
+):
+    """Customers matching a group's criteria (keyset paging by id with `cursor`); None if no such group"""
+    group = await session.get(models.CustomerGroup, group_id)
+    if not group:
+        return None
+
+    query = segment_members_stmt(group.criteria)
+    total = await count_rows(session, query, count)
+
+    page = (skip // limit) + 1
+    customers, next_cursor = await fetch_page(
+        session, query, sort_key=Customer.id, id_column=Customer.id, descending=False,
+        cursor=cursor, page=page, page_size=limit
+    )
+
+    return {
+        "group": {"id": group.id, "name": group.name, "criteria": group.criteria},
+        "customers": customers,
+        "total": total,
+        "page": page,
+        "pages": total_pages(total, limit),
+        "next_cursor": next_cursor
+    }
 
 async def delete_customer_group(session: AsyncSession, group_id: int) -> bool:
     result = await session.execute(select(models.CustomerGroup).where(models.CustomerGroup.id == group_id))
     group = result.scalar_one_or_none()
     
     if group:
+        from sqlalchemy import delete
+        from app.modules.marketing.models import SegmentMember
+        # SQLite doesn't enforce the ON DELETE CASCADE
+        await session.execute(delete(SegmentMember).where(SegmentMember.group_id == group_id))
         await session.delete(group)
         await session.commit()
         return True
@@ -95,9 +115,11 @@ async def get_customers_with_filters(
     orders_condition: str = None,
     orders_value: int = None,
     skip: int = 0,
-    limit: int = 20
+    limit: int = 20,
+    cursor: str = None,
+    count: str = "exact"
 ):
-    """Get customers with advanced filtering"""
+    """Get customers with advanced filtering (keyset paging by id with `cursor`)"""
     query = select(Customer).where(Customer.deleted_at == None)
     
     # Status filter
@@ -143,21 +165,20 @@ async def get_customers_with_filters(
         elif orders_condition == 'eq':
             query = query.where(Customer.total_orders == orders_value)
     
-    # Count total
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await session.execute(count_query)
-    total = total_result.scalar()
+    total = await count_rows(session, query, count)
     
-    # Apply pagination
-    query = query.offset(skip).limit(limit)
-    result = await session.execute(query)
-    customers = result.scalars().all()
+    page = (skip // limit) + 1
+    customers, next_cursor = await fetch_page(
+        session, query, sort_key=Customer.id, id_column=Customer.id, descending=False,
+        cursor=cursor, page=page, page_size=limit
+    )
     
     return {
         "customers": customers,
         "total": total,
-        "page": (skip // limit) + 1,
-        "pages": (total + limit - 1) // limit
+        "page": page,
+        "pages": total_pages(total, limit),
+        "next_cursor": next_cursor
     }
 
 # --- Soft Delete ---
@@ -170,6 +191,7 @@ async def soft_delete_customer(session: AsyncSession, customer_id: int) -> bool:
     
     customer.deleted_at = datetime.utcnow()
     await session.commit()
+    invalidate_segment_counts()
     return True
 
 # --- Customer Orders ---
@@ -216,69 +238,55 @@ async def get_customer_stats(session: AsyncSession, customer_id: int):
     }
 
 # --- Export/Import (CSV) ---
-async def export_customers_csv(session: AsyncSession):
-    """Export all customers to CSV"""
+# Customers fetched per round trip when exporting
+CUSTOMER_EXPORT_CHUNK_SIZE = 2000
+CUSTOMER_EXPORT_COLUMNS = ('ID', 'Name', 'Email', 'Mobile', 'Country', 'City', 'Type', 'Gender', 'Channel', 'Points', 'Total Orders')
+
+def customer_export_stmt():
+    """Active customers, in the export column order (no ORDER BY)."""
+    return select(
+        Customer.id,
+        Customer.name,
+        Customer.email,
+        Customer.mobile,
+        Customer.country,
+        Customer.city,
+        Customer.customer_type,
+        Customer.gender,
+        Customer.channel,
+        Customer.points,
+        Customer.total_orders
+    ).where(Customer.is_active == True)
+
+async def iter_customer_rows(
+    chunk_size: int = CUSTOMER_EXPORT_CHUNK_SIZE,
+    cursor: Optional[str] = None
+) -> AsyncIterator[Tuple[List[Tuple], Optional[str]]]:
+    """Yields (rows, next_cursor) in id order, one short-lived session per chunk."""
+    async for rows, cursor in iter_chunks(
+        customer_export_stmt(), sort_key=Customer.id, id_column=Customer.id,
+        descending=False, cursor=cursor, chunk_size=chunk_size
+    ):
+        yield [
+            (
+                customer_id, name, email or '', mobile or '', country, city or '',
+                customer_type.value, gender.value if gender else '', channel, points, total_orders
+            )
+            for customer_id, name, email, mobile, country, city, customer_type, gender, channel, points, total_orders in rows
+        ], cursor
+
+async def stream_customers_csv() -> AsyncIterator[bytes]:
+    """Export all customers to CSV, one encoded chunk per database chunk"""
     import csv
     import io
-    
-    customers = await get_customers(session, skip=0, limit=100000)
-    
+
     output = io.StringIO()
     writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(['ID', 'Name', 'Email', 'Mobile', 'Country', 'City', 'Type', 'Gender', 'Channel', 'Points', 'Total Orders'])
-    
-    # Data
-    for customer in customers:
-        writer.writerow([
-            customer.id,
-            customer.name,
-            customer.email or '',
-            customer.mobile or '',
-            customer.country,
-            customer.city or '',
-            customer.customer_type.value,
-            customer.gender.value if customer.gender else '',
-            customer.channel,
-            customer.points,
-            customer.total_orders
-        ])
-    
-    return output.getvalue()
+    writer.writerow(CUSTOMER_EXPORT_COLUMNS)
+    yield output.getvalue().encode('utf-8')
 
-async def import_customers_csv(session: AsyncSession, file_content: str):
-    """Import customers from CSV"""
-    import csv
-    import io
-    
-    reader = csv.DictReader(io.StringIO(file_content))
-    imported_count = 0
-    errors = []
-    
-    for row in reader:
-        try:
-            customer_data = {
-                "name": row['Name'],
-                "email": row.get('Email') or None,
-                "mobile": row.get('Mobile') or None,
-                "country": row.get('Country', 'Saudi Arabia'),
-                "city": row.get('City') or None,
-                "customer_type": row.get('Type', 'individual'),
-                "gender": row.get('Gender') or None,
-                "channel": row.get('Channel', 'Store')
-            }
-            
-            customer = Customer(**customer_data)
-            session.add(customer)
-            imported_count += 1
-        except Exception as e:
-            errors.append(f"Row {reader.line_num}: {str(e)}")
-    
-    if not errors:
-        await session.commit()
-    
-    return {
-        "imported": imported_count,
-        "errors": errors
-    }
+    async for rows, _ in iter_customer_rows():
+        output.seek(0)
+        output.truncate(0)
+        writer.writerows(rows)
+        yield output.getvalue().encode('utf-8')
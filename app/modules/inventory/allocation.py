@@ -0,0 +1,219 @@
+"""
+Multi-Warehouse Allocation Engine
+Plans withdrawals for a whole basket from one stock snapshot, then applies
+them with a single conditional UPDATE and bulk stock movements.
+"""
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update, case, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.inventory.models import InventoryItem, Warehouse, StockMovement, StockMovementReason
+from app.modules.inventory.service import reserve_stock_bulk, adjust_variant_stock_totals
+
+# How many priority steps one kilometre is worth when a delivery location is given.
+# 0.01 -> a warehouse 100 km closer beats one priority step.
+ALLOCATION_DISTANCE_WEIGHT = float(os.getenv("ALLOCATION_DISTANCE_WEIGHT", "0.01"))
+
+
+class StockLocation:
+    """One warehouse's stock of one variant, as read in the snapshot."""
+
+    __slots__ = ("warehouse_id", "warehouse_name", "priority_index", "latitude", "longitude", "quantity")
+
+    def __init__(self, warehouse_id, warehouse_name, priority_index, latitude, longitude, quantity):
+        self.warehouse_id = warehouse_id
+        self.warehouse_name = warehouse_name
+        self.priority_index = priority_index or 0
+        self.latitude = latitude
+        self.longitude = longitude
+        self.quantity = quantity
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+async def load_stock_snapshot(session: AsyncSession, variant_ids: List[str]) -> Dict[str, List[StockLocation]]:
+    """
+    One query for every variant in the basket: positive stock in active warehouses,
+    in priority order.
+    """
+    if not variant_ids:
+        return {}
+
+    stmt = (
+        select(
+            InventoryItem.variant_id,
+            Warehouse.id,
+            Warehouse.name,
+            Warehouse.priority_index,
+            Warehouse.latitude,
+            Warehouse.longitude,
+            InventoryItem.quantity
+        )
+        .join(Warehouse, Warehouse.id == InventoryItem.warehouse_id)
+        .where(
+            InventoryItem.variant_id.in_(variant_ids),
+            InventoryItem.quantity > 0,
+            Warehouse.is_active == True
+        )
+        .order_by(Warehouse.priority_index.asc(), Warehouse.id.asc())
+    )
+    result = await session.execute(stmt)
+
+    snapshot: Dict[str, List[StockLocation]] = {}
+    for variant_id, *location in result.all():
+        snapshot.setdefault(variant_id, []).append(StockLocation(*location))
+    return snapshot
+
+
+def _rank(locations: List[StockLocation], origin: Optional[Tuple[float, float]]) -> List[StockLocation]:
+    """Priority order, or priority + weighted distance when a delivery location is known."""
+    if not origin:
+        return locations
+
+    def score(loc: StockLocation):
+        if loc.latitude is None or loc.longitude is None:
+            # Warehouses without coordinates go after located ones
+            return (1, loc.priority_index)
+        distance = haversine_km(origin[0], origin[1], loc.latitude, loc.longitude)
+        return (0, loc.priority_index + distance * ALLOCATION_DISTANCE_WEIGHT)
+
+    return sorted(locations, key=score)
+
+
+def plan_allocation(
+    quantities: Dict[str, int],
+    snapshot: Dict[str, List[StockLocation]],
+    origin: Optional[Tuple[float, float]] = None
+) -> Tuple[Dict[str, List[Dict]], Dict[str, int]]:
+    """
+    Greedy withdrawal per variant over the snapshot (no database access).
+
+    Returns:
+        (plan, shortages)
+        plan: {variant_id: [{"warehouse_id", "warehouse_name", "take_qty"}, ...]}
+        shortages: {variant_id: missing_qty} for variants that can't be fully covered
+    """
+    plan: Dict[str, List[Dict]] = {}
+    shortages: Dict[str, int] = {}
+
+    for variant_id, requested_qty in quantities.items():
+        remaining_qty = requested_qty
+        lines = []
+        for loc in _rank(snapshot.get(variant_id, []), origin):
+            if remaining_qty <= 0:
+                break
+            take_qty = min(loc.quantity, remaining_qty)
+            lines.append({
+                "warehouse_id": loc.warehouse_id,
+                "warehouse_name": loc.warehouse_name,
+                "take_qty": take_qty
+            })
+            remaining_qty -= take_qty
+
+        if remaining_qty > 0:
+            shortages[variant_id] = remaining_qty
+        else:
+            plan[variant_id] = lines
+
+    return plan, shortages
+
+
+async def apply_allocation(
+    session: AsyncSession,
+    plan: Dict[str, List[Dict]],
+    reason: StockMovementReason,
+    related_id: Optional[int] = None
+) -> List[Dict]:
+    """
+    Deducts every planned line in one conditional UPDATE and logs the movements.
+    If stock changed since the snapshot, nothing is deducted and the failed
+    lines are returned (see reserve_stock_bulk). Does not commit.
+    """
+    lines = [
+        {"variant_id": variant_id, "warehouse_id": line["warehouse_id"], "qty": line["take_qty"]}
+        for variant_id, variant_lines in plan.items()
+        for line in variant_lines
+    ]
+    failed = await reserve_stock_bulk(session, lines)
+    if failed:
+        return failed
+
+    session.add_all([
+        StockMovement(
+            variant_id=line["variant_id"],
+            warehouse_id=line["warehouse_id"],
+            qty_change=-line["qty"],
+            reason=reason,
+            related_id=related_id
+        )
+        for line in lines
+    ])
+    return []
+
+
+async def load_order_allocation(session: AsyncSession, order_id: int) -> Dict[str, List[Dict]]:
+    """Rebuilds where an order's stock was taken from, using its NEW_ORDER movements."""
+    stmt = (
+        select(StockMovement.variant_id, StockMovement.warehouse_id, StockMovement.qty_change)
+        .where(StockMovement.related_id == order_id, StockMovement.reason == StockMovementReason.NEW_ORDER)
+        .order_by(StockMovement.id)
+    )
+    result = await session.execute(stmt)
+
+    plan: Dict[str, List[Dict]] = {}
+    for variant_id, warehouse_id, qty_change in result.all():
+        plan.setdefault(variant_id, []).append({"warehouse_id": warehouse_id, "take_qty": -qty_change})
+    return plan
+
+
+async def release_allocation(
+    session: AsyncSession,
+    plan: Dict[str, List[Dict]],
+    reason: StockMovementReason,
+    related_id: Optional[int] = None
+):
+    """
+    Puts planned quantities back (cancellations/returns) with one UPDATE,
+    creating inventory rows that no longer exist. Does not commit.
+    """
+    totals: Dict[Tuple[str, int], int] = {}
+    for variant_id, variant_lines in plan.items():
+        for line in variant_lines:
+            key = (variant_id, line["warehouse_id"])
+            totals[key] = totals.get(key, 0) + line["take_qty"]
+    if not totals:
+        return
+
+    def row_match(variant_id, warehouse_id):
+        return and_(InventoryItem.variant_id == variant_id, InventoryItem.warehouse_id == warehouse_id)
+
+    increment = case(*[(row_match(v, w), qty) for (v, w), qty in totals.items()], else_=0)
+    stmt = (
+        update(InventoryItem)
+        .where(or_(*[row_match(v, w) for v, w in totals]))
+        .values(quantity=InventoryItem.quantity + increment)
+        .returning(InventoryItem.variant_id, InventoryItem.warehouse_id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = {(v, w) for v, w in (await session.execute(stmt)).all()}
+
+    session.add_all([
+        InventoryItem(variant_id=v, warehouse_id=w, quantity=qty)
+        for (v, w), qty in totals.items() if (v, w) not in updated
+    ])
+    session.add_all([
+        StockMovement(variant_id=v, warehouse_id=w, qty_change=qty, reason=reason, related_id=related_id)
+        for (v, w), qty in totals.items()
+    ])
+
+    variant_totals: Dict[str, int] = {}
+    for (v, _), qty in totals.items():
+        variant_totals[v] = variant_totals.get(v, 0) + qty
+    await adjust_variant_stock_totals(session, variant_totals)
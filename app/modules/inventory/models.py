@@ -1,7 +1,7 @@
 
 from typing import List, Optional
 from enum import Enum as PyEnum
-from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, Text, Enum, JSON, UniqueConstraint
+from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, Text, Enum, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.models import TimeStampedModel
 
@@ -50,7 +50,11 @@ class Warehouse(TimeStampedModel):
 
 class InventoryItem(TimeStampedModel):
     __tablename__ = "inventory_items"
-    __table_args__ = (UniqueConstraint('variant_id', 'warehouse_id', name='uq_variant_warehouse'),)
+    __table_args__ = (
+        UniqueConstraint('variant_id', 'warehouse_id', name='uq_variant_warehouse'),
+        # Per-warehouse reads (stock taking, warehouse stock, matrix filter)
+        Index('ix_inventory_items_warehouse_id', 'warehouse_id', 'variant_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     variant_id: Mapped[str] = mapped_column(String(36), ForeignKey("product_variants.id"))
@@ -62,6 +66,14 @@ class InventoryItem(TimeStampedModel):
 
 class StockMovement(TimeStampedModel):
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # Movement log (newest first, keyset paging) and per-variant history
+        Index('ix_stock_movements_created_at_id', 'created_at', 'id'),
+        Index('ix_stock_movements_variant_id_created_at', 'variant_id', 'created_at'),
+        Index('ix_stock_movements_warehouse_id', 'warehouse_id'),
+        # Order allocation lookups on cancel/return
+        Index('ix_stock_movements_related_id', 'related_id'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     variant_id: Mapped[str] = mapped_column(String(36), ForeignKey("product_variants.id"))
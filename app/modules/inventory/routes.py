@@ -1,16 +1,17 @@
 
-from fastapi import APIRouter, Depends, Request, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, Request, HTTPException, Query, Response
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.dependencies import get_current_user
 from app.modules.inventory.models import Product, ProductVariant, Warehouse, InventoryItem, StockMovement, StockMovementReason, Category, StockTaking
 from app.modules.inventory.service import get_withdrawal_plan, create_stock_movement
+from app.modules.inventory.stock_matrix import get_stock_matrix_page, stream_stock_matrix_json
 from app.modules.auth.models import User
 
 router = APIRouter(tags=["Inventory"])
@@ -23,28 +24,28 @@ async def dashboard_page(request: Request):
 
 # API
 @router.get("/api/inventory")
-async def get_inventory(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
-    stmt = select(ProductVariant).options(joinedload(ProductVariant.product))
-    result = await db.execute(stmt)
-    variants = result.scalars().all()
-    
-    data = []
-    for v in variants:
-        # Get stock per warehouse
-        stmt_stock = select(InventoryItem, Warehouse).join(Warehouse).where(InventoryItem.variant_id == v.id)
-        res_stock = await db.execute(stmt_stock)
-        stock_lines = res_stock.all()
-        
-        total = sum(item.quantity for item, _ in stock_lines)
-        
-        data.append({
-            "id": v.id,
-            "product_name": v.product.name,
-            "sku": v.sku,
-            "total_stock": total,
-            "locations": [{"wh_id": wh.id, "wh": wh.name, "qty": item.quantity} for item, wh in stock_lines]
-        })
-    return data
+async def get_inventory(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    warehouse_id: Optional[int] = None,
+    search: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stock matrix: one row per variant with total stock and per-warehouse locations.
+    With `limit` a single page is returned and the next cursor is sent in X-Next-Cursor;
+    without it the whole matrix is streamed as a JSON array.
+    """
+    if limit:
+        data, next_cursor = await get_stock_matrix_page(db, limit, cursor, warehouse_id, search)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return JSONResponse(content=data, headers=headers)
+
+    return StreamingResponse(
+        stream_stock_matrix_json(after=cursor, warehouse_id=warehouse_id, search=search),
+        media_type="application/json"
+    )
 
 @router.post("/api/move-stock")
 async def move_stock(
@@ -72,14 +73,18 @@ async def inventory_logs_page(request: Request):
 
 @router.get("/api/movements")
 async def list_movements(
-    limit: int = 50,
-    offset: int = 0,
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """API to fetch movement history"""
+    """API to fetch movement history (next page cursor in the X-Next-Cursor header)"""
     from app.modules.inventory.service import get_stock_movements
-    movements = await get_stock_movements(db, limit, offset)
+    movements, next_cursor = await get_stock_movements(db, limit, offset, cursor)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     data = []
     for m in movements:
@@ -148,11 +153,18 @@ async def inventory_management_page(request: Request):
 async def batch_update_api(data: BatchInventoryUpdate, db: AsyncSession = Depends(get_db)):
     """API: Batch update stock"""
     try:
-        await batch_update_inventory(db, data)
-        return {"status": "success"}
+        stats = await batch_update_inventory(db, data)
+        return {"status": "success", "stats": stats}
     except Exception as e:
         raise HTTPException(400, f"Batch update failed: {str(e)}")
 
+@router.post("/api/inventory/reconcile-totals")
+async def reconcile_totals_api(db: AsyncSession = Depends(get_db)):
+    """API: Rebuild per-variant stock totals from inventory rows"""
+    from app.modules.inventory.service import reconcile_variant_stock_totals
+    fixed = await reconcile_variant_stock_totals(db)
+    return {"status": "success", "corrected": fixed}
+
 # ----------------------------------------------------------------------
 # Stock Taking (Audit)
 # ----------------------------------------------------------------------
@@ -195,8 +207,11 @@ async def update_item_api(id: int, data: StockTakingItemUpdate, db: AsyncSession
 
 @router.post("/api/stock-taking/{id}/finalize")
 async def finalize_stock_taking_api(id: int, db: AsyncSession = Depends(get_db)):
-    await finalize_stock_taking(db, id)
-    return {"status": "success"}
+    try:
+        stats = await finalize_stock_taking(db, id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return {"status": "success", "stats": stats}
 
 # ----------------------------------------------------------------------
 # Transfer Requests
@@ -1,11 +1,15 @@
 
 
-from sqlalchemy import select, update, func
+from sqlalchemy import select, update, insert, func, case, and_, or_, bindparam
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Optional
 from datetime import datetime
+import time
 from app.modules.inventory.models import InventoryItem, Warehouse, StockMovement, StockMovementReason
+from app.modules.catalog.models import ProductVariant
+from app.modules.catalog.scan_cache import invalidate_scan_variants_on_commit, clear_scan_cache
+from app.core.pagination import fetch_page
 
 
 async def get_withdrawal_plan(session: AsyncSession, variant_id: str, requested_qty: int) -> List[Dict]:
@@ -15,39 +19,18 @@ async def get_withdrawal_plan(session: AsyncSession, variant_id: str, requested_
     2. Sort by Warehouse Priority (High priority first? Index 0 is usually highest priority).
        Let's assume priority_index ASC (0, 1, 2...) = First, Second, Third.
     3. Fulfill requested_qty greedily.
+    Single-variant wrapper around the allocation engine (inventory/allocation.py).
     """
-    stmt = (
-        select(InventoryItem)
-        .join(Warehouse)
-        .where(InventoryItem.variant_id == variant_id)
-        .where(InventoryItem.quantity > 0)
-        .order_by(Warehouse.priority_index.asc())
-    )
-    
-    result = await session.execute(stmt)
-    inventory_items = result.scalars().all()
-    
-    plan = []
-    remaining_qty = requested_qty
+    from app.modules.inventory.allocation import load_stock_snapshot, plan_allocation
+
+    snapshot = await load_stock_snapshot(session, [variant_id])
+    plan, shortages = plan_allocation({variant_id: requested_qty}, snapshot)
     
-    for item in inventory_items:
-        if remaining_qty <= 0:
-            break
-            
-        take_qty = min(item.quantity, remaining_qty)
-        plan.append({
-            "warehouse_id": item.warehouse_id,
-            "warehouse_name": item.warehouse.name, # Assumes lazy load or joined load needs options if async
-            "take_qty": take_qty
-        })
-        
-        remaining_qty -= take_qty
-        
-    if remaining_qty > 0:
+    if variant_id in shortages:
         # Not enough stock
-        return [{"error": "Insufficient stock", "missing": remaining_qty}]
+        return [{"error": "Insufficient stock", "missing": shortages[variant_id]}]
         
-    return plan
+    return plan[variant_id]
 
 async def create_stock_movement(
     session: AsyncSession, 
@@ -71,50 +54,361 @@ async def create_stock_movement(
     session.add(movement)
     
     # 2. Update Inventory
-    # Check if item exists
-    stmt = select(InventoryItem).where(InventoryItem.variant_id == variant_id, InventoryItem.warehouse_id == warehouse_id)
+    # Relative update in SQL so concurrent movements on the same row can't lose writes
+    stmt = (
+        update(InventoryItem)
+        .where(InventoryItem.variant_id == variant_id, InventoryItem.warehouse_id == warehouse_id)
+        .values(quantity=InventoryItem.quantity + qty_change)
+    )
     result = await session.execute(stmt)
-    item = result.scalar_one_or_none()
     
-    if item:
-        item.quantity += qty_change
-    else:
+    if result.rowcount == 0:
         # Create new if adding stock
         if qty_change > 0:
             new_item = InventoryItem(variant_id=variant_id, warehouse_id=warehouse_id, quantity=qty_change)
             session.add(new_item)
         else:
             raise ValueError("Cannot deduct stock from non-existent inventory item")
+    
+    await adjust_variant_stock_totals(session, {variant_id: qty_change})
             
     await session.commit()
 
+# ----------------------------------------------------------------------
+# Per-Variant Stock Totals (ProductVariant.quantity)
+# ----------------------------------------------------------------------
+# ProductVariant.quantity is a denormalized SUM(inventory_items.quantity)
+# for the variant. Every function here that changes InventoryItem quantities
+# also applies the same delta to it in the same transaction, so listings and
+# availability checks can read it directly. reconcile_variant_stock_totals
+# rebuilds it from inventory_items if it ever drifts.
+
+async def adjust_variant_stock_totals(session: AsyncSession, deltas: Dict[str, int]):
+    """
+    Applies {variant_id: delta} to ProductVariant.quantity with one relative
+    UPDATE. Does not commit; the scan cache drops the variants when the
+    caller does.
+    """
+    deltas = {variant_id: delta for variant_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    if len(deltas) == 1:
+        change = next(iter(deltas.values()))
+    else:
+        change = case(deltas, value=ProductVariant.id, else_=0)
+
+    await session.execute(
+        update(ProductVariant)
+        .where(ProductVariant.id.in_(list(deltas)))
+        .values(quantity=ProductVariant.quantity + change)
+        .execution_options(synchronize_session=False)
+    )
+    invalidate_scan_variants_on_commit(session, deltas)
+
+async def reconcile_variant_stock_totals(session: AsyncSession, variant_ids: Optional[List[str]] = None) -> int:
+    """
+    Rebuilds ProductVariant.quantity from inventory_items (all variants, or only `variant_ids`).
+    Returns the number of variants whose total was wrong. Commits.
+    """
+    actual = (
+        select(func.coalesce(func.sum(InventoryItem.quantity), 0))
+        .where(InventoryItem.variant_id == ProductVariant.id)
+        .scalar_subquery()
+    )
+    stmt = (
+        update(ProductVariant)
+        .where(ProductVariant.quantity != actual)
+        .values(quantity=actual)
+        .execution_options(synchronize_session=False)
+    )
+    if variant_ids is not None:
+        stmt = stmt.where(ProductVariant.id.in_(variant_ids))
+
+    result = await session.execute(stmt)
+    await session.commit()
+    if result.rowcount:
+        clear_scan_cache()
+    return result.rowcount
+
+async def get_stock_by_warehouse_for_variants(
+    session: AsyncSession,
+    variant_ids: List[str]
+) -> Dict[str, List[Dict]]:
+    """
+    get_variant_stock_by_warehouse for many variants in one query.
+    Returns {variant_id: [...same dicts...]}; variants without stock map to [].
+    """
+    distribution: Dict[str, List[Dict]] = {variant_id: [] for variant_id in variant_ids}
+    if not variant_ids:
+        return distribution
+
+    stmt = (
+        select(InventoryItem, Warehouse)
+        .join(Warehouse)
+        .where(InventoryItem.variant_id.in_(variant_ids))
+        .order_by(Warehouse.priority_index)
+    )
+    result = await session.execute(stmt)
+
+    for item, wh in result.all():
+        distribution[item.variant_id].append({
+            "warehouse_id": item.warehouse_id,
+            "warehouse_name": wh.name,
+            "warehouse_name_en": wh.name_en,
+            "quantity": item.quantity,
+            "branch_type": wh.branch_type.value
+        })
+    return distribution
+
+# ----------------------------------------------------------------------
+# Bulk Stock Movements
+# ----------------------------------------------------------------------
+
+# Keys per IN (...) list when prefetching inventory rows
+BULK_PREFETCH_CHUNK = 1000
+
+async def prefetch_inventory(session: AsyncSession, keys: List[tuple]) -> Dict[tuple, int]:
+    """Current quantity for each (variant_id, warehouse_id) that has a row, in as few queries as possible."""
+    wanted = set(keys)
+    variant_ids = list({variant_id for variant_id, _ in wanted})
+    warehouse_ids = list({warehouse_id for _, warehouse_id in wanted})
+
+    current: Dict[tuple, int] = {}
+    for start in range(0, len(variant_ids), BULK_PREFETCH_CHUNK):
+        stmt = select(InventoryItem.variant_id, InventoryItem.warehouse_id, InventoryItem.quantity).where(
+            InventoryItem.variant_id.in_(variant_ids[start:start + BULK_PREFETCH_CHUNK]),
+            InventoryItem.warehouse_id.in_(warehouse_ids)
+        )
+        for variant_id, warehouse_id, quantity in (await session.execute(stmt)).all():
+            if (variant_id, warehouse_id) in wanted:
+                current[(variant_id, warehouse_id)] = quantity
+    return current
+
+def _upsert_inventory_stmt(dialect_name: str):
+    """INSERT ... ON CONFLICT (variant_id, warehouse_id) DO UPDATE SET quantity = quantity + excluded.quantity"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    table = InventoryItem.__table__
+    stmt = dialect_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.variant_id, table.c.warehouse_id],
+        set_={"quantity": table.c.quantity + stmt.excluded.quantity, "updated_at": func.now()}
+    )
+
+async def apply_stock_movements_bulk(
+    session: AsyncSession,
+    movements: List[Dict],
+    reason: StockMovementReason,
+    related_id: Optional[int] = None,
+    current: Optional[Dict[tuple, int]] = None
+) -> Dict:
+    """
+    Bulk version of create_stock_movement.
+    
+    Args:
+        movements: [{"variant_id": ..., "warehouse_id": ..., "qty_change": ...}, ...]
+        current: Prefetched quantities (see prefetch_inventory), loaded here if not given.
+    
+    Applies every InventoryItem change as one executemany upsert and logs every
+    StockMovement as one executemany insert. Raises ValueError before writing
+    anything if a deduction targets a missing inventory row. Does not commit.
+    """
+    deltas: Dict[tuple, int] = {}
+    for movement in movements:
+        if movement["qty_change"] == 0:
+            continue
+        key = (movement["variant_id"], movement["warehouse_id"])
+        deltas[key] = deltas.get(key, 0) + movement["qty_change"]
+
+    if current is None:
+        current = await prefetch_inventory(session, list(deltas))
+
+    missing = [key for key, delta in deltas.items() if key not in current and delta < 0]
+    if missing:
+        raise ValueError(f"Cannot deduct stock from non-existent inventory item ({len(missing)} rows)")
+
+    if not deltas:
+        return {"movements": 0}
+
+    params = [{"variant_id": v, "warehouse_id": w, "quantity": delta} for (v, w), delta in deltas.items()]
+    upsert = _upsert_inventory_stmt(session.get_bind().dialect.name)
+    if upsert is not None:
+        await session.execute(upsert, params)
+    else:
+        # No native upsert: executemany relative UPDATE for existing rows, INSERT for the rest
+        table = InventoryItem.__table__
+        existing = [p for p in params if (p["variant_id"], p["warehouse_id"]) in current]
+        new = [p for p in params if (p["variant_id"], p["warehouse_id"]) not in current]
+        if existing:
+            stmt = (
+                update(table)
+                .where(table.c.variant_id == bindparam("b_variant_id"), table.c.warehouse_id == bindparam("b_warehouse_id"))
+                .values(quantity=table.c.quantity + bindparam("b_quantity"))
+            )
+            await session.execute(stmt, [
+                {"b_variant_id": p["variant_id"], "b_warehouse_id": p["warehouse_id"], "b_quantity": p["quantity"]}
+                for p in existing
+            ])
+        if new:
+            await session.execute(insert(table), new)
+
+    await session.execute(insert(StockMovement.__table__), [
+        {"variant_id": v, "warehouse_id": w, "qty_change": delta, "reason": reason, "related_id": related_id}
+        for (v, w), delta in deltas.items()
+    ])
+
+    totals: Dict[str, int] = {}
+    for (v, _), delta in deltas.items():
+        totals[v] = totals.get(v, 0) + delta
+    await adjust_variant_stock_totals(session, totals)
+    return {"movements": len(deltas)}
+
+def _throughput(rows: int, changed: int, started: float) -> Dict:
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "changed": changed,
+        "unchanged": rows - changed,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else None
+    }
+
+# ----------------------------------------------------------------------
+# Stock Reservation (atomic conditional decrement)
+# ----------------------------------------------------------------------
+
+async def reserve_stock(session: AsyncSession, variant_id: str, warehouse_id: int, qty: int) -> bool:
+    """
+    Decrements stock only if enough is available, in a single statement:
+    UPDATE inventory_items SET quantity = quantity - :qty WHERE ... AND quantity >= :qty
+    Returns False (and changes nothing) when stock is insufficient or the row doesn't exist.
+    Does not commit.
+    """
+    stmt = (
+        update(InventoryItem)
+        .where(
+            InventoryItem.variant_id == variant_id,
+            InventoryItem.warehouse_id == warehouse_id,
+            InventoryItem.quantity >= qty
+        )
+        .values(quantity=InventoryItem.quantity - qty)
+    )
+    result = await session.execute(stmt)
+    if result.rowcount != 1:
+        return False
+    await adjust_variant_stock_totals(session, {variant_id: -qty})
+    return True
+
+async def reserve_stock_bulk(
+    session: AsyncSession,
+    lines: List[Dict],
+    all_or_nothing: bool = True
+) -> List[Dict]:
+    """
+    Multi-row version of reserve_stock.
+    
+    Args:
+        lines: [{"variant_id": ..., "warehouse_id": ..., "qty": ...}, ...]
+               Repeated (variant, warehouse) pairs are summed.
+        all_or_nothing: If any line fails, give back the lines that succeeded.
+    
+    Returns:
+        The failed lines with the quantity that was available, e.g.
+        [{"variant_id": "...", "warehouse_id": 1, "requested": 5, "available": 2}]
+        An empty list means every line was reserved. Does not commit.
+    """
+    requested: Dict[tuple, int] = {}
+    for line in lines:
+        if line["qty"] <= 0:
+            continue
+        key = (line["variant_id"], line["warehouse_id"])
+        requested[key] = requested.get(key, 0) + line["qty"]
+
+    if not requested:
+        return []
+
+    def row_match(variant_id, warehouse_id):
+        return and_(InventoryItem.variant_id == variant_id, InventoryItem.warehouse_id == warehouse_id)
+
+    # One UPDATE for every line; each row only matches if it has enough stock for its own line
+    decrement = case(*[(row_match(v, w), qty) for (v, w), qty in requested.items()], else_=0)
+    stmt = (
+        update(InventoryItem)
+        .where(or_(*[and_(row_match(v, w), InventoryItem.quantity >= qty) for (v, w), qty in requested.items()]))
+        .values(quantity=InventoryItem.quantity - decrement)
+        .returning(InventoryItem.variant_id, InventoryItem.warehouse_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(stmt)
+    reserved = {(v, w) for v, w in result.all()}
+
+    failed_keys = [key for key in requested if key not in reserved]
+    if not failed_keys or not all_or_nothing:
+        totals: Dict[str, int] = {}
+        for v, w in reserved:
+            totals[v] = totals.get(v, 0) - requested[(v, w)]
+        await adjust_variant_stock_totals(session, totals)
+    if not failed_keys:
+        return []
+
+    if all_or_nothing and reserved:
+        restore = case(*[(row_match(v, w), requested[(v, w)]) for v, w in reserved], else_=0)
+        await session.execute(
+            update(InventoryItem)
+            .where(or_(*[row_match(v, w) for v, w in reserved]))
+            .values(quantity=InventoryItem.quantity + restore)
+            .execution_options(synchronize_session=False)
+        )
+
+    # Report what was actually there for the failed lines
+    stmt = select(InventoryItem.variant_id, InventoryItem.warehouse_id, InventoryItem.quantity).where(
+        or_(*[row_match(v, w) for v, w in failed_keys])
+    )
+    available = {(v, w): q for v, w, q in (await session.execute(stmt)).all()}
+
+    return [
+        {
+            "variant_id": v,
+            "warehouse_id": w,
+            "requested": requested[(v, w)],
+            "available": available.get((v, w), 0)
+        }
+        for v, w in failed_keys
+    ]
+
 async def get_stock_movements(
     session: AsyncSession, 
     limit: int = 50, 
-    offset: int = 0
-) -> List[StockMovement]:
+    offset: int = 0,
+    cursor: Optional[str] = None
+):
     """
-    Fetch stock movements with related Variant, Product, and Warehouse.
+    Fetch stock movements (newest first) with related Variant, Product, and Warehouse.
+    Returns (movements, next_cursor); pass `cursor` instead of a deep `offset`.
     """
     stmt = (
         select(StockMovement)
         .join(StockMovement.variant)
         .join(StockMovement.warehouse)
-        .order_by(StockMovement.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-        # Using selectinload (async friendly) if relationships are lazy
-        # But here we used joins, so we can access them if eager loaded or we might need explicit options
-        # For simplicity in this stack, let's assume lazy loading might fit or update query to eager load
     )
+    if not cursor and offset:
+        stmt = stmt.offset(offset)
     # Eager loading optimization
     stmt = stmt.options(
         joinedload(StockMovement.warehouse),
         joinedload(StockMovement.variant).joinedload(ProductVariant.product)
     )
     
-    result = await session.execute(stmt)
-    return result.scalars().all()
+    return await fetch_page(
+        session, stmt, sort_key=StockMovement.created_at, id_column=StockMovement.id,
+        descending=True, cursor=cursor, page_size=limit
+    )
 
 # ----------------------------------------------------------------------
 # Helper Functions for Stock Management
@@ -247,6 +541,7 @@ async def sync_variant_to_inventory(
         reason=StockMovementReason.MANUAL_EDIT
     )
     session.add(movement)
+    await adjust_variant_stock_totals(session, {variant_id: quantity})
 
 # ----------------------------------------------------------------------
 # Warehouse Service
@@ -288,41 +583,38 @@ async def update_warehouse(session: AsyncSession, warehouse_id: int, data: Wareh
 # Batch Inventory Operations
 # ----------------------------------------------------------------------
 
-async def batch_update_inventory(session: AsyncSession, batch_data: BatchInventoryUpdate):
+async def batch_update_inventory(session: AsyncSession, batch_data: BatchInventoryUpdate) -> Dict:
     """
     Process multiple stock updates in a single transaction.
     Calculates the qty_change needed to reach the new_quantity.
+    Returns a throughput report (rows, changed, elapsed_ms, rows_per_sec).
     """
+    started = time.perf_counter()
     updates = batch_data.updates
     reason = batch_data.reason
     
-    for update in updates:
-        # 1. Get current stock for this variant/warehouse
-        stmt = select(InventoryItem).where(
-            InventoryItem.variant_id == update.variant_id, 
-            InventoryItem.warehouse_id == update.warehouse_id
-        )
-        result = await session.execute(stmt)
-        item = result.scalar_one_or_none()
-        
-        current_qty = item.quantity if item else 0
-        qty_change = update.new_quantity - current_qty
-        
-        if qty_change == 0:
-            continue
-            
-        # 2. Use existing create_stock_movement logic which handles logging and updating
-        # Note: Avoid double commit by managing transaction at controller level ideally, 
-        # but create_stock_movement commits. For batch, we might want to flush instead.
-        # But to reuse code without refactoring create_stock_movement heavily, we call it.
-        # It's slightly inefficient (N commits) but safe for now.
-        await create_stock_movement(
-            session, 
-            variant_id=update.variant_id, 
-            warehouse_id=update.warehouse_id, 
-            qty_change=qty_change, 
-            reason=reason
-        )
+    # 1. The last new_quantity per (variant, warehouse) wins, as if applied row by row;
+    #    deltas against one shared prefetch must not be summed for repeated keys
+    targets: Dict[tuple, int] = {}
+    for u in updates:
+        targets[(u.variant_id, u.warehouse_id)] = u.new_quantity
+
+    # 2. One prefetch for every key, then deltas in Python
+    current = await prefetch_inventory(session, list(targets))
+    movements = [
+        {
+            "variant_id": variant_id,
+            "warehouse_id": warehouse_id,
+            "qty_change": new_quantity - current.get((variant_id, warehouse_id), 0)
+        }
+        for (variant_id, warehouse_id), new_quantity in targets.items()
+    ]
+    
+    # 3. All upserts and movement rows in one transaction
+    result = await apply_stock_movements_bulk(session, movements, reason, current=current)
+    await session.commit()
+    
+    return _throughput(len(updates), result["movements"], started)
 
 # ----------------------------------------------------------------------
 # Stock Taking Service
@@ -405,31 +697,30 @@ async def update_stock_taking_item(session: AsyncSession, st_id: int, variant_id
     
     await session.commit()
 
-async def finalize_stock_taking(session: AsyncSession, st_id: int):
-    st = await get_stock_taking(session, st_id)
+async def finalize_stock_taking(session: AsyncSession, st_id: int) -> Dict:
+    """Applies all count differences in one transaction. Returns a throughput report."""
+    started = time.perf_counter()
+    st = await session.get(StockTaking, st_id)
     if not st or st.status != StockTakingStatus.DRAFT:
         raise ValueError("Invalid stock taking session")
-        
-    # Apply adjustments for all counted items
-    for item in st.items:
-        if item.counted_qty is None:
-            continue # Skip uncounted? Or treat as 0? Usually skip in partial.
-            
-        diff = item.counted_qty - item.expected_qty
-        if diff != 0:
-            await create_stock_movement(
-                session,
-                variant_id=item.variant_id,
-                warehouse_id=st.warehouse_id,
-                qty_change=diff,
-                reason=StockMovementReason.STOCK_TAKE,
-                related_id=st.id
-            )
+    
+    # Only the counted figures are needed, not the full item graph
+    stmt = select(StockTakingItem.variant_id, StockTakingItem.counted_qty, StockTakingItem.expected_qty).where(
+        StockTakingItem.stock_taking_id == st_id
+    )
+    rows = (await session.execute(stmt)).all()
+    
+    # Apply adjustments for all counted items (uncounted items are skipped, as in a partial count)
+    movements = [
+        {"variant_id": variant_id, "warehouse_id": st.warehouse_id, "qty_change": counted - expected}
+        for variant_id, counted, expected in rows if counted is not None
+    ]
+    result = await apply_stock_movements_bulk(session, movements, StockMovementReason.STOCK_TAKE, related_id=st.id)
             
     st.status = StockTakingStatus.COMPLETED
     st.completed_at = datetime.now().isoformat()
     await session.commit()
-    return st
+    return _throughput(len(movements), result["movements"], started)
 
 # ----------------------------------------------------------------------
 # Transfer Request Service
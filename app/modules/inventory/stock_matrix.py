@@ -0,0 +1,124 @@
+"""
+Stock Matrix Query Layer
+Builds the variant x warehouse stock grid used by the inventory dashboard and bulk editor
+"""
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.inventory.models import InventoryItem, Warehouse
+
+# Variants fetched per round trip when streaming the full matrix
+STOCK_MATRIX_CHUNK_SIZE = 500
+
+
+def _stock_matrix_stmt(
+    limit: int,
+    after: Optional[str] = None,
+    warehouse_id: Optional[int] = None,
+    search: Optional[str] = None
+):
+    """
+    One query per page: pick the next `limit` variants by id (keyset),
+    then outer-join their inventory rows so variants without stock still appear.
+    """
+    page = select(ProductVariant.id).join(Product, Product.id == ProductVariant.product_id)
+    if after:
+        page = page.where(ProductVariant.id > after)
+    if search:
+        term = f"%{search}%"
+        page = page.where(or_(ProductVariant.sku.ilike(term), Product.name.ilike(term)))
+    page = page.order_by(ProductVariant.id).limit(limit).subquery()
+
+    inv_join = InventoryItem.variant_id == ProductVariant.id
+    if warehouse_id is not None:
+        inv_join = and_(inv_join, InventoryItem.warehouse_id == warehouse_id)
+
+    return (
+        select(
+            ProductVariant.id,
+            ProductVariant.sku,
+            Product.name,
+            Warehouse.id,
+            Warehouse.name,
+            InventoryItem.quantity
+        )
+        .join(page, page.c.id == ProductVariant.id)
+        .join(Product, Product.id == ProductVariant.product_id)
+        .outerjoin(InventoryItem, inv_join)
+        .outerjoin(Warehouse, Warehouse.id == InventoryItem.warehouse_id)
+        .order_by(ProductVariant.id, Warehouse.priority_index, Warehouse.id)
+    )
+
+
+def _fold_rows(rows) -> List[Dict]:
+    """Collapse ordered (variant, warehouse) rows into one dict per variant with totals."""
+    data = []
+    current = None
+    for variant_id, sku, product_name, wh_id, wh_name, qty in rows:
+        if current is None or current["id"] != variant_id:
+            current = {
+                "id": variant_id,
+                "product_name": product_name,
+                "sku": sku,
+                "total_stock": 0,
+                "locations": []
+            }
+            data.append(current)
+        if wh_id is not None:
+            current["total_stock"] += qty or 0
+            current["locations"].append({"wh_id": wh_id, "wh": wh_name, "qty": qty or 0})
+    return data
+
+
+async def get_stock_matrix_page(
+    session: AsyncSession,
+    limit: int,
+    after: Optional[str] = None,
+    warehouse_id: Optional[int] = None,
+    search: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Returns one page of the stock matrix and the cursor for the next page
+    (None when this was the last page).
+    """
+    result = await session.execute(_stock_matrix_stmt(limit, after, warehouse_id, search))
+    data = _fold_rows(result.all())
+    next_cursor = data[-1]["id"] if len(data) == limit else None
+    return data, next_cursor
+
+
+async def iter_stock_matrix(
+    after: Optional[str] = None,
+    warehouse_id: Optional[int] = None,
+    search: Optional[str] = None,
+    chunk_size: int = STOCK_MATRIX_CHUNK_SIZE
+) -> AsyncIterator[Dict]:
+    """
+    Walks the whole matrix chunk by chunk.
+    Each chunk uses its own short-lived session so no connection is held
+    while the client is reading the response.
+    """
+    cursor = after
+    while True:
+        async with AsyncSessionLocal() as session:
+            data, cursor = await get_stock_matrix_page(session, chunk_size, cursor, warehouse_id, search)
+        for row in data:
+            yield row
+        if cursor is None:
+            break
+
+
+async def stream_stock_matrix_json(**filters) -> AsyncIterator[bytes]:
+    """Encodes iter_stock_matrix as a JSON array, one element at a time."""
+    yield b"["
+    first = True
+    async for row in iter_stock_matrix(**filters):
+        prefix = b"" if first else b","
+        first = False
+        yield prefix + json.dumps(row, ensure_ascii=False).encode("utf-8")
+    yield b"]"
@@ -0,0 +1,110 @@
+"""
+Job Artifact Rendering
+Turns a job's row spool (one JSON array per line) into the downloadable file.
+Runs in the job worker processes, so this module imports nothing from the
+app: no database, no models, just the file formats.
+"""
+import csv
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Sequence
+
+import xlsxwriter
+
+# Column kinds understood by the renderers
+TEXT, NUMBER, DATETIME = "text", "number", "datetime"
+
+CSV_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def spool_default(value):
+    """json.dumps fallback for the values export rows carry."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return getattr(value, "value", str(value))
+
+
+def encode_spool_rows(rows: List[Sequence]) -> bytes:
+    return "".join(
+        json.dumps(list(row), default=spool_default, ensure_ascii=False) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+def _as_datetime(value):
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _iter_spool(spool_path: str):
+    with open(spool_path, "r", encoding="utf-8") as spool:
+        for line in spool:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _render_csv(spool_path: str, out_path: str, columns: Sequence[str], kinds: Sequence[str]) -> int:
+    datetime_columns = [i for i, kind in enumerate(kinds) if kind == DATETIME]
+    count = 0
+    # BOM so Excel opens Arabic text as UTF-8
+    with open(out_path, "w", encoding="utf-8-sig", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in _iter_spool(spool_path):
+            for i in datetime_columns:
+                parsed = _as_datetime(row[i])
+                row[i] = parsed.strftime(CSV_DATETIME_FORMAT) if parsed else (row[i] or "")
+            writer.writerow(["" if value is None else value for value in row])
+            count += 1
+    return count
+
+
+def _render_xlsx(spool_path: str, out_path: str, columns: Sequence[str], kinds: Sequence[str], sheet_name: str) -> int:
+    # constant_memory: each row is flushed to disk as soon as the next one starts
+    workbook = xlsxwriter.Workbook(out_path, {"constant_memory": True, "remove_timezone": True})
+    try:
+        sheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({"bold": True})
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm"})
+        sheet.write_row(0, 0, columns, header_format)
+
+        count = 0
+        for row_number, row in enumerate(_iter_spool(spool_path), start=1):
+            for col, (value, kind) in enumerate(zip(row, kinds)):
+                if value is None or value == "":
+                    continue
+                if kind == NUMBER and isinstance(value, (int, float)):
+                    sheet.write_number(row_number, col, value)
+                    continue
+                parsed = _as_datetime(value) if kind == DATETIME else None
+                if parsed:
+                    sheet.write_datetime(row_number, col, parsed, date_format)
+                else:
+                    sheet.write_string(row_number, col, str(value))
+            count = row_number
+    finally:
+        workbook.close()
+    return count
+
+
+def render_export(spool_path: str, out_path: str, fmt: str, columns: Sequence[str], kinds: Sequence[str], sheet_name: str = "Sheet1") -> int:
+    """
+    Writes the spooled rows as CSV or XLSX to `out_path` and returns the row count.
+    The file appears under its final name only once complete.
+    """
+    partial_path = out_path + ".partial"
+    if fmt == "csv":
+        count = _render_csv(spool_path, partial_path, columns, kinds)
+    elif fmt == "xlsx":
+        count = _render_xlsx(spool_path, partial_path, columns, kinds, sheet_name)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.replace(partial_path, out_path)
+    return count
@@ -0,0 +1,136 @@
+"""
+Export Jobs
+Orders, products and customers exported in the background. Rows are read in
+keyset chunks and appended to a spool file, with the cursor and spool offset
+checkpointed after each chunk; the finished spool is rendered to CSV/XLSX in
+the job worker pool. A resumed job truncates the spool back to its last
+checkpoint and continues from the stored cursor.
+"""
+import os
+from typing import Any, AsyncIterator, Callable, Dict, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import select, func
+
+from app.core.database import AsyncSessionLocal
+from app.modules.catalog.product_export import (
+    PRODUCT_EXPORT_COLUMNS, iter_product_rows, product_export_count_stmt
+)
+from app.modules.customers.service import CUSTOMER_EXPORT_COLUMNS, iter_customer_rows, customer_export_stmt
+from app.modules.jobs.artifacts import TEXT, NUMBER, DATETIME, encode_spool_rows, render_export
+from app.modules.jobs.runner import job_handler, JobContext
+from app.modules.sales.order_export import EXPORT_COLUMNS as ORDER_EXPORT_COLUMNS, iter_order_rows, order_export_stmt
+
+EXPORT_FORMATS = ("csv", "xlsx")
+ORDER_FILTERS = ("status", "payment_status", "date_from", "date_to", "search")
+
+
+class ExportSource(NamedTuple):
+    filename: str
+    sheet: str
+    columns: Sequence[str]
+    kinds: Sequence[str]
+    filters: Sequence[str]
+    count_stmt: Callable[[Dict], Any]
+    iter_rows: Callable[[Dict, Optional[str]], AsyncIterator]
+
+
+def _count_of(stmt):
+    return select(func.count()).select_from(stmt.subquery())
+
+
+EXPORT_SOURCES: Dict[str, ExportSource] = {
+    "orders": ExportSource(
+        filename="orders_export",
+        sheet="Orders",
+        columns=ORDER_EXPORT_COLUMNS,
+        kinds=(NUMBER, DATETIME, TEXT, TEXT, TEXT, NUMBER),
+        filters=ORDER_FILTERS,
+        count_stmt=lambda filters: _count_of(order_export_stmt(filters)),
+        iter_rows=lambda filters, cursor: iter_order_rows(filters, cursor=cursor),
+    ),
+    "products": ExportSource(
+        filename="products_export",
+        sheet="Products",
+        columns=PRODUCT_EXPORT_COLUMNS,
+        kinds=(TEXT, TEXT, TEXT, NUMBER, NUMBER, NUMBER, TEXT, TEXT, TEXT, TEXT),
+        filters=("ids",),
+        count_stmt=lambda filters: product_export_count_stmt(filters.get("ids")),
+        iter_rows=lambda filters, cursor: iter_product_rows(filters.get("ids"), cursor=cursor),
+    ),
+    "customers": ExportSource(
+        filename="customers",
+        sheet="Customers",
+        columns=CUSTOMER_EXPORT_COLUMNS,
+        kinds=(NUMBER,) + (TEXT,) * 8 + (NUMBER, NUMBER),
+        filters=(),
+        count_stmt=lambda filters: _count_of(customer_export_stmt()),
+        iter_rows=lambda filters, cursor: iter_customer_rows(cursor=cursor),
+    ),
+}
+
+
+def export_job_params(source: str, fmt: str, filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Validated job params for an export; unknown sources/formats/filters are a 400."""
+    if source not in EXPORT_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown export source: {source}")
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    allowed = EXPORT_SOURCES[source].filters
+    unknown = [key for key in filters if key not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown filters for {source}: {', '.join(unknown)}")
+    # "all" / empty values are no filter at all
+    filters = {key: value for key, value in filters.items() if value not in (None, "", "all", [])}
+    if isinstance(filters.get("ids"), str):
+        filters["ids"] = [product_id for product_id in filters["ids"].split(",") if product_id]
+    return {"source": source, "format": fmt, "filters": filters}
+
+
+@job_handler("export")
+async def run_export(ctx: JobContext):
+    source = EXPORT_SOURCES[ctx.params["source"]]
+    fmt = ctx.params["format"]
+    filters = ctx.params.get("filters") or {}
+    artifact_name = f"{source.filename}.{fmt}"
+    artifact_path = ctx.path(artifact_name)
+    spool_path = ctx.path("rows.jsonl")
+
+    if ctx.rows_total is None:
+        async with AsyncSessionLocal() as session:
+            await ctx.set_total((await session.execute(source.count_stmt(filters))).scalar() or 0)
+
+    checkpoint = ctx.checkpoint
+    offset = checkpoint.get("offset", 0)
+    spool_size = os.path.getsize(spool_path) if os.path.exists(spool_path) else None
+    # Crashed after rendering but before the job was marked completed
+    already_rendered = spool_size is None and checkpoint.get("spooled") and os.path.exists(artifact_path)
+
+    if not already_rendered and (not checkpoint.get("spooled") or spool_size is None or spool_size < offset):
+        if spool_size is None or spool_size < offset:
+            # The spool is gone (or shorter than recorded): start over
+            checkpoint, offset = {}, 0
+        cursor = checkpoint.get("cursor")
+        rows_done = ctx.rows_done if offset else 0
+
+        with open(spool_path, "ab") as spool:
+            # Drop anything written after the last checkpoint
+            spool.truncate(offset)
+            async for rows, cursor in source.iter_rows(filters, cursor):
+                spool.write(encode_spool_rows(rows))
+                spool.flush()
+                rows_done += len(rows)
+                await ctx.progress(rows_done, {"cursor": cursor, "offset": spool.tell(), "spooled": cursor is None})
+            # Also covers no rows at all, and a last chunk that filled a whole page
+            await ctx.progress(rows_done, {"cursor": None, "offset": spool.tell(), "spooled": True})
+
+    if not already_rendered:
+        await ctx.run_cpu(
+            render_export, spool_path, artifact_path, fmt,
+            list(source.columns), list(source.kinds), source.sheet
+        )
+        os.remove(spool_path)
+
+    ctx.artifact_path = artifact_path
+    ctx.artifact_name = artifact_name
+    ctx.result = {"rows": ctx.rows_done, "bytes": os.path.getsize(artifact_path)}
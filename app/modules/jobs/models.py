@@ -0,0 +1,54 @@
+"""
+Background Job Models
+A row per long-running job (exports, imports): status, row progress, the
+checkpoint it resumes from, and the artifact it produced.
+"""
+from sqlalchemy import String, Integer, DateTime, Enum, JSON, Text, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+import enum
+import uuid
+
+from app.core.database import Base
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Startup recovery (queued / stale running jobs) and the per-user job list
+        Index("ix_jobs_status_heartbeat_at", "status", "heartbeat_at"),
+        Index("ix_jobs_created_by_created_at", "created_by", "created_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind: Mapped[str] = mapped_column(String(50))
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), default=JobStatus.QUEUED)
+    params: Mapped[dict] = mapped_column(JSON, default=dict)
+
+    # Progress
+    rows_done: Mapped[int] = mapped_column(Integer, default=0)
+    rows_total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Handler-defined resume point (keyset cursor, spool offset, ...)
+    checkpoint: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+
+    # Outcome
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    artifact_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    artifact_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_by: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    # Touched on every progress report; a running job whose heartbeat goes
+    # stale belonged to a worker that died and is picked up again
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,117 @@
+"""
+Background Job API
+Submit export jobs, poll their progress, download the finished file,
+resume a failed job or cancel a running one.
+"""
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.dependencies import get_current_user, get_current_claims
+from app.modules.auth.models import User, UserRole
+from app.modules.jobs import exports
+from app.modules.jobs.models import Job, JobStatus
+from app.modules.jobs.runner import submit_job, resume_job, cancel_job, delete_job
+from app.modules.jobs.schemas import ExportJobCreate, JobResponse
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+MEDIA_TYPES = {
+    ".csv": "text/csv; charset=utf-8",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+async def _get_job(db: AsyncSession, job_id: str, user: User) -> Job:
+    job = await db.get(Job, job_id)
+    # Jobs are private to whoever submitted them (admins see all)
+    if not job or (user.role != UserRole.ADMIN and job.created_by != user.id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/exports", response_model=JobResponse, status_code=202)
+async def create_export_job(
+    payload: ExportJobCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Queues an export; poll GET /api/jobs/{id} and download when completed."""
+    params = exports.export_job_params(payload.source, payload.format, payload.filters)
+    return await submit_job(db, "export", params, created_by=current_user.id)
+
+
+@router.get("", response_model=List[JobResponse])
+async def list_jobs(
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    stmt = select(Job).order_by(Job.created_at.desc()).limit(min(max(limit, 1), 100))
+    if current_user.role != UserRole.ADMIN:
+        stmt = stmt.where(Job.created_by == current_user.id)
+    return (await db.execute(stmt)).scalars().all()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    """Status and row progress (rows_done / rows_total)."""
+    return await _get_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/download")
+async def download_job_artifact(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    job = await _get_job(db, job_id, current_user)
+    if job.status != JobStatus.COMPLETED or not job.artifact_path:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}, nothing to download yet")
+    if not os.path.exists(job.artifact_path):
+        raise HTTPException(status_code=410, detail="The file has expired")
+    extension = os.path.splitext(job.artifact_path)[1]
+    return FileResponse(
+        job.artifact_path,
+        media_type=MEDIA_TYPES.get(extension, "application/octet-stream"),
+        filename=job.artifact_name
+    )
+
+
+@router.post("/{job_id}/resume", response_model=JobResponse)
+async def resume(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Requeues a failed job; it continues from its last checkpoint."""
+    return await resume_job(db, await _get_job(db, job_id, current_user))
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await cancel_job(db, await _get_job(db, job_id, current_user))
+
+
+@router.delete("/{job_id}")
+async def delete(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Removes a finished job and its file."""
+    await delete_job(db, await _get_job(db, job_id, current_user))
+    return {"message": "Job deleted"}
@@ -0,0 +1,366 @@
+"""
+Background Job Runner
+Runs registered job handlers outside the request/response cycle. Each worker
+process runs at most JOB_MAX_CONCURRENT jobs at a time; CPU-heavy steps
+(rendering workbooks, parsing files) go to a small process pool. Handlers
+report row progress together with a checkpoint after every chunk, so a job
+that failed or whose worker died resumes from where it stopped.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, delete, func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.modules.jobs.models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Jobs running at once per worker process; more submissions wait their turn
+JOB_MAX_CONCURRENT = int(os.getenv("JOB_MAX_CONCURRENT", "2"))
+# Processes for CPU-heavy job steps (0 runs them in threads instead)
+JOB_WORKER_PROCESSES = int(os.getenv("JOB_WORKER_PROCESSES", "1"))
+# A running job with no progress report for this long is treated as abandoned
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "120"))
+JOB_HEARTBEAT_SECONDS = JOB_STALE_SECONDS / 4
+# Where job artifacts live, one directory per job
+JOB_DIR = os.getenv("JOB_DIR", os.path.join("var", "jobs"))
+# Finished jobs (and their files) are purged after this long
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "72"))
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+JobHandler = Callable[["JobContext"], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+_tasks: Set[asyncio.Task] = set()
+_running: Set[str] = set()
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool: Optional[Executor] = None
+
+
+def job_handler(kind: str):
+    """Registers `handler(ctx)` as the runner for jobs of `kind`."""
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        return handler
+    return register
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was cancelled while running."""
+
+
+def new_job_id() -> str:
+    return str(uuid.uuid4())
+
+
+def job_directory(job_id: str) -> str:
+    return os.path.join(JOB_DIR, job_id)
+
+
+def _remove_job_files(job_id: str):
+    shutil.rmtree(job_directory(job_id), ignore_errors=True)
+
+
+def _limiter() -> asyncio.Semaphore:
+    # One semaphore per event loop (tests and scripts start several loops)
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(max(JOB_MAX_CONCURRENT, 1))
+        _semaphore_loop = loop
+    return _semaphore
+
+
+def _executor() -> Optional[Executor]:
+    global _pool
+    if JOB_WORKER_PROCESSES <= 0:
+        return None  # the loop's default thread pool
+    if _pool is None:
+        # spawn: the workers must not inherit the event loop, connections or locks
+        _pool = ProcessPoolExecutor(
+            max_workers=JOB_WORKER_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+class JobContext:
+    """What a handler sees of its job: params, resume point and progress reporting."""
+
+    def __init__(self, job: Job):
+        self.id = job.id
+        self.kind = job.kind
+        self.params: Dict[str, Any] = dict(job.params or {})
+        self.checkpoint: Dict[str, Any] = dict(job.checkpoint or {})
+        self.rows_done = job.rows_done or 0
+        self.rows_total = job.rows_total
+        self.directory = job_directory(job.id)
+        # Set by the handler before it returns
+        self.result: Optional[Dict[str, Any]] = None
+        self.artifact_path: Optional[str] = None
+        self.artifact_name: Optional[str] = None
+
+    def path(self, name: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, name)
+
+    async def _update(self, session: Optional[AsyncSession] = None, **values):
+        values["heartbeat_at"] = datetime.utcnow()
+        stmt = update(Job).where(Job.id == self.id, Job.status == JobStatus.RUNNING).values(**values)
+        if session is not None:
+            # Part of the caller's transaction; the caller commits
+            result = await session.execute(stmt)
+        else:
+            async with AsyncSessionLocal() as own_session:
+                result = await own_session.execute(stmt)
+                await own_session.commit()
+        if result.rowcount == 0:
+            raise JobCancelled(self.id)
+
+    async def set_total(self, rows_total: Optional[int]):
+        self.rows_total = rows_total
+        await self._update(rows_total=rows_total)
+
+    async def progress(
+        self,
+        rows_done: int,
+        checkpoint: Optional[Dict[str, Any]] = None,
+        session: Optional[AsyncSession] = None
+    ):
+        """
+        Records progress; the checkpoint is what a resumed run starts from.
+        With `session`, the update joins that transaction so the checkpoint
+        commits (or rolls back) together with the chunk it describes.
+        """
+        self.rows_done = rows_done
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        await self._update(session, rows_done=rows_done, checkpoint=self.checkpoint)
+
+    async def heartbeat(self):
+        await self._update()
+
+    async def run_cpu(self, fn: Callable, *args):
+        """Runs fn(*args) in the job worker pool, keeping the heartbeat fresh meanwhile."""
+        future = asyncio.get_running_loop().run_in_executor(_executor(), fn, *args)
+        while True:
+            done, _ = await asyncio.wait({future}, timeout=JOB_HEARTBEAT_SECONDS)
+            if done:
+                return future.result()
+            await self.heartbeat()
+
+
+# ----------------------------------------------------------------------
+# Running
+# ----------------------------------------------------------------------
+
+async def _claim(job_id: str) -> Optional[JobContext]:
+    """QUEUED -> RUNNING, atomically; None if another worker got there first."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        claimed = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.QUEUED)
+            .values(
+                status=JobStatus.RUNNING, started_at=func.coalesce(Job.started_at, now),
+                heartbeat_at=now, attempts=Job.attempts + 1, error=None
+            )
+        )
+        await session.commit()
+        if claimed.rowcount == 0:
+            return None
+        return JobContext(await session.get(Job, job_id))
+
+
+async def _finish(job_id: str, status: JobStatus, **values) -> bool:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.RUNNING)
+            .values(status=status, finished_at=datetime.utcnow(), heartbeat_at=datetime.utcnow(), **values)
+        )
+        await session.commit()
+    return result.rowcount > 0
+
+
+async def _run(job_id: str):
+    async with _limiter():
+        ctx = await _claim(job_id)
+        if ctx is None:
+            return
+        _running.add(job_id)
+        try:
+            handler = _handlers.get(ctx.kind)
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind '{ctx.kind}'")
+            await handler(ctx)
+        except JobCancelled:
+            _remove_job_files(job_id)
+            return
+        except asyncio.CancelledError:
+            # Worker shutting down; shutdown_jobs() requeues it
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job_id, ctx.kind)
+            try:
+                await _finish(job_id, JobStatus.FAILED, error=str(exc) or exc.__class__.__name__)
+            except Exception:
+                logger.exception("Could not record failure of job %s", job_id)
+            return
+        finally:
+            _running.discard(job_id)
+
+        completed = await _finish(
+            job_id, JobStatus.COMPLETED, rows_done=ctx.rows_done, result=ctx.result,
+            artifact_path=ctx.artifact_path, artifact_name=ctx.artifact_name
+        )
+        if not completed:
+            # Cancelled between the last progress report and now
+            _remove_job_files(job_id)
+
+
+def _schedule(job_id: str):
+    task = asyncio.create_task(_run(job_id))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+# ----------------------------------------------------------------------
+# Public API (routes, startup/shutdown)
+# ----------------------------------------------------------------------
+
+async def submit_job(
+    session: AsyncSession,
+    kind: str,
+    params: Dict[str, Any],
+    created_by: Optional[int] = None,
+    job_id: Optional[str] = None
+) -> Job:
+    """
+    Queues a job and schedules it on this worker. Pass `job_id` (see new_job_id)
+    when input files have to be placed in job_directory() before the job starts.
+    """
+    if kind not in _handlers:
+        raise HTTPException(status_code=400, detail=f"Unknown job kind: {kind}")
+    job = Job(kind=kind, params=params, created_by=created_by, status=JobStatus.QUEUED, rows_done=0, attempts=0)
+    if job_id:
+        job.id = job_id
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    _schedule(job.id)
+    return job
+
+
+def _is_stale(job: Job) -> bool:
+    cutoff = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    return job.status == JobStatus.RUNNING and (job.heartbeat_at is None or job.heartbeat_at < cutoff)
+
+
+async def resume_job(session: AsyncSession, job: Job) -> Job:
+    """Requeues a failed (or abandoned running) job; it continues from its checkpoint."""
+    if job.status == JobStatus.RUNNING and job.id in _running:
+        raise HTTPException(status_code=409, detail="Job is running")
+    if job.status not in (JobStatus.FAILED, JobStatus.QUEUED) and not _is_stale(job):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value} and cannot be resumed")
+
+    await session.execute(
+        update(Job).where(Job.id == job.id, Job.status == job.status).values(status=JobStatus.QUEUED, error=None)
+    )
+    await session.commit()
+    await session.refresh(job)
+    _schedule(job.id)
+    return job
+
+
+async def cancel_job(session: AsyncSession, job: Job) -> Job:
+    """Cancels a queued/running job (a running one stops at its next progress report)."""
+    if job.status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status.value}")
+    was_queued = job.status == JobStatus.QUEUED
+    await session.execute(
+        update(Job).where(Job.id == job.id, Job.status.in_(ACTIVE_STATUSES))
+        .values(status=JobStatus.CANCELLED, finished_at=datetime.utcnow())
+    )
+    await session.commit()
+    await session.refresh(job)
+    if was_queued or job.id not in _running:
+        _remove_job_files(job.id)
+    return job
+
+
+async def delete_job(session: AsyncSession, job: Job):
+    """Removes a finished job and its files."""
+    if job.status in ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail="Cancel the job before deleting it")
+    await session.delete(job)
+    await session.commit()
+    _remove_job_files(job.id)
+
+
+async def recover_jobs():
+    """
+    Startup: purges expired finished jobs, then picks up queued jobs and
+    running jobs whose worker stopped reporting (they resume from their checkpoint).
+    """
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        expired = (await session.execute(
+            select(Job.id).where(
+                Job.status.notin_(ACTIVE_STATUSES),
+                Job.finished_at < now - timedelta(hours=JOB_RETENTION_HOURS)
+            )
+        )).scalars().all()
+        if expired:
+            await session.execute(delete(Job).where(Job.id.in_(expired)))
+            await session.commit()
+            for job_id in expired:
+                _remove_job_files(job_id)
+
+        stale_cutoff = now - timedelta(seconds=JOB_STALE_SECONDS)
+        await session.execute(
+            update(Job)
+            .where(Job.status == JobStatus.RUNNING, or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < stale_cutoff))
+            .values(status=JobStatus.QUEUED)
+        )
+        await session.commit()
+        pending = (await session.execute(
+            select(Job.id).where(Job.status == JobStatus.QUEUED).order_by(Job.created_at)
+        )).scalars().all()
+
+    for job_id in pending:
+        _schedule(job_id)
+    return len(pending)
+
+
+async def shutdown_jobs():
+    """Stops this worker's jobs and puts them back in the queue for the next start."""
+    interrupted = list(_running)
+    tasks = list(_tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if interrupted:
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(Job).where(Job.id.in_(interrupted), Job.status == JobStatus.RUNNING)
+                .values(status=JobStatus.QUEUED)
+            )
+            await session.commit()
+
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field, computed_field
+from typing import Any, Dict, Literal, Optional
+from datetime import datetime
+from .models import JobStatus
+
+class ExportJobCreate(BaseModel):
+    source: Literal["orders", "products", "customers"]
+    format: Literal["csv", "xlsx"] = "xlsx"
+    # Source filters: orders take the list filters (status, payment_status,
+    # date_from, date_to, search), products take ids
+    filters: Dict[str, Any] = Field(default_factory=dict)
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    params: Dict[str, Any]
+    rows_done: int
+    rows_total: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None
+    artifact_name: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @computed_field
+    @property
+    def progress(self) -> Optional[float]:
+        """Percent of rows done, when the total is known."""
+        if self.status == JobStatus.COMPLETED:
+            return 100.0
+        if not self.rows_total:
+            return None
+        return round(min(self.rows_done / self.rows_total, 1.0) * 100, 1)
+
+    class Config:
+        from_attributes = True
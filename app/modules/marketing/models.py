@@ -5,7 +5,7 @@ from sqlalchemy import String, Integer, Float, Boolean, ForeignKey, DateTime, En
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
-from app.core.models import TimeStampedModel
+from app.core.models import TimeStampedModel, Base
 
 class DiscountType(str, PyEnum):
     PERCENTAGE = "percentage"
@@ -60,3 +60,14 @@ class Campaign(TimeStampedModel):
     
     group_id: Mapped[Optional[int]] = mapped_column(ForeignKey("customer_groups.id"))
     group: Mapped["app.modules.customers.models.CustomerGroup"] = relationship("app.modules.customers.models.CustomerGroup")
+
+class SegmentMember(Base):
+    """
+    Materialized membership of a customer group, for campaigns that target big
+    segments. Refreshed incrementally by DiscountCalculator.refresh_segment_members.
+    """
+    __tablename__ = "segment_members"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("customer_groups.id", ondelete="CASCADE"), primary_key=True)
+    customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id", ondelete="CASCADE"), primary_key=True)
+    added_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
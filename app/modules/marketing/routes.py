@@ -5,6 +5,7 @@ from typing import List
 
 from app.core.database import get_db
 from app.modules.marketing.models import Coupon
+from app.modules.marketing.service import DiscountCalculator
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/api/marketing", tags=["Marketing"])
@@ -24,3 +25,11 @@ async def list_coupons(db: AsyncSession = Depends(get_db)):
     stmt = select(Coupon).where(Coupon.is_active == True)
     result = await db.execute(stmt)
     return result.scalars().all()
+
+@router.post("/segments/{group_id}/refresh")
+async def refresh_segment(group_id: int, db: AsyncSession = Depends(get_db)):
+    """Refresh the materialized membership of a customer group (for big campaigns)."""
+    result = await DiscountCalculator(db).refresh_segment_members(group_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Customer group not found")
+    return result
@@ -1,10 +1,18 @@
 
+import os
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from app.modules.marketing.models import Coupon, AutomaticDiscount, DiscountType, CustomerGroup, Affiliate, Campaign
+from sqlalchemy import select, func, insert, delete, literal
+from app.core.pagination import iter_chunks
+from app.modules.marketing.models import Coupon, AutomaticDiscount, DiscountType, Affiliate, Campaign, SegmentMember
+from app.modules.customers.models import CustomerGroup
+from app.modules.customers.segments import order_segment_stmt
 from app.modules.auth.models import User
 from app.modules.sales.models import Order
 from datetime import datetime
+from typing import AsyncIterator, List
+
+# Customer ids per batch when streaming a segment
+SEGMENT_BATCH_SIZE = int(os.getenv("SEGMENT_BATCH_SIZE", "5000"))
 
 class DiscountCalculator:
     def __init__(self, session: AsyncSession):
@@ -75,40 +83,70 @@ class DiscountCalculator:
     async def get_segment_members(self, group_id: int):
         """
         Dynamic Customer Segmentation Engine.
-        Translates JSON criteria to SQL.
+        Translates JSON criteria (min_orders, min_spent, city, gender) to one
+        GROUP BY ... HAVING query; only the qualifying ids leave the database.
         """
-        stmt = select(CustomerGroup).where(CustomerGroup.id == group_id)
-        result = await self.db.execute(stmt)
-        group = result.scalar_one_or_none()
-        
+        group = await self.db.get(CustomerGroup, group_id)
         if not group:
             return []
-            
-        criteria = group.criteria # { "min_orders": 5 }
-        
-        # 1. Fetch Key Stats per customer
-        stmt_stats = (
-            select(
-                Order.customer_id, 
-                func.count(Order.id).label("count"), 
-                func.sum(Order.total_amount).label("spent")
+
+        result = await self.db.execute(order_segment_stmt(group.criteria))
+        return result.scalars().all()
+
+    async def iter_segment_member_ids(
+        self,
+        group_id: int,
+        batch_size: int = SEGMENT_BATCH_SIZE,
+        materialized: bool = False
+    ) -> AsyncIterator[List[int]]:
+        """
+        Streams the segment as batches of customer ids (keyset on customer id,
+        a short-lived session per batch). `materialized` reads segment_members
+        instead of evaluating the criteria; refresh it first.
+        """
+        if materialized:
+            stmt = select(SegmentMember.customer_id).where(SegmentMember.group_id == group_id)
+            key = SegmentMember.customer_id
+        else:
+            group = await self.db.get(CustomerGroup, group_id)
+            if not group:
+                return
+            stmt = order_segment_stmt(group.criteria)
+            key = Order.customer_id
+
+        async for ids, _ in iter_chunks(
+            stmt, sort_key=key, id_column=key, descending=False, chunk_size=batch_size, scalars=True
+        ):
+            yield ids
+
+    async def refresh_segment_members(self, group_id: int):
+        """
+        Brings the materialized membership (segment_members) in line with the
+        group's criteria. Incremental: only customers who left are deleted and
+        only new ones inserted, both decided in SQL. None if no such group.
+        """
+        group = await self.db.get(CustomerGroup, group_id)
+        if not group:
+            return None
+
+        current = order_segment_stmt(group.criteria).subquery()
+        stored = select(SegmentMember.customer_id).where(SegmentMember.group_id == group_id)
+
+        removed = await self.db.execute(
+            delete(SegmentMember).where(
+                SegmentMember.group_id == group_id,
+                SegmentMember.customer_id.not_in(select(current.c.customer_id))
             )
-            .group_by(Order.customer_id)
         )
-        result = await self.db.execute(stmt_stats)
-        stats = result.all() # [(id, count, spent), ...]
-        
-        qualified_ids = []
-        for row in stats:
-            cid, count, spent = row
-            match = True
-            
-            if "min_orders" in criteria and count < criteria["min_orders"]:
-                match = False
-            if "min_spent" in criteria and (spent or 0) < criteria["min_spent"]:
-                match = False
-                
-            if match:
-                qualified_ids.append(cid)
-                
-        return qualified_ids
+        added = await self.db.execute(
+            insert(SegmentMember).from_select(
+                ["group_id", "customer_id"],
+                select(literal(group_id), current.c.customer_id).where(current.c.customer_id.not_in(stored))
+            )
+        )
+        await self.db.commit()
+
+        members = (await self.db.execute(
+            select(func.count()).select_from(SegmentMember).where(SegmentMember.group_id == group_id)
+        )).scalar()
+        return {"group_id": group_id, "added": added.rowcount, "removed": removed.rowcount, "members": members}
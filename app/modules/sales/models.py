@@ -1,7 +1,7 @@
 
 from typing import List, Optional
 from enum import Enum as PyEnum
-from sqlalchemy import String, Float, Boolean, ForeignKey, Text, Enum, JSON, Integer
+from sqlalchemy import String, Float, Boolean, ForeignKey, Text, Enum, JSON, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.models import TimeStampedModel, Base
 # We reference other modules by string to avoid circular imports at module level
@@ -44,6 +44,15 @@ class AbandonedCart(TimeStampedModel):
 
 class Order(TimeStampedModel):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order list: sort (keyset on sort key + id) and status filters
+        Index('ix_orders_created_at_id', 'created_at', 'id'),
+        Index('ix_orders_total_amount_id', 'total_amount', 'id'),
+        Index('ix_orders_status_created_at', 'status', 'created_at', 'id'),
+        Index('ix_orders_payment_status_created_at', 'payment_status', 'created_at', 'id'),
+        # Customer order history and stats
+        Index('ix_orders_customer_id_created_at', 'customer_id', 'created_at'),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id"))
@@ -74,7 +83,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), index=True)
     variant_id: Mapped[int] = mapped_column(ForeignKey("product_variants.id"))
     
     quantity: Mapped[int] = mapped_column(Integer, default=1)
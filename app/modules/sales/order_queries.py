@@ -0,0 +1,38 @@
+"""
+Order Query Filters
+Filter set shared by the order list (/api/orders_list) and the order exports,
+so an export always contains exactly what the list shows.
+"""
+from app.modules.sales.models import Order
+from app.modules.customers.models import Customer
+
+
+def apply_order_filters(
+    stmt,
+    status: str = "all",
+    payment_status: str = "all",
+    date_from: str = None,
+    date_to: str = None,
+    search: str = None
+):
+    """Adds the list filters to a select that already joins Customer."""
+    if status and status != "all":
+        stmt = stmt.where(Order.status == status)
+
+    if payment_status and payment_status != "all":
+        stmt = stmt.where(Order.payment_status == payment_status)
+
+    if date_from:
+        stmt = stmt.where(Order.created_at >= date_from)
+
+    if date_to:
+        stmt = stmt.where(Order.created_at <= date_to)
+
+    if search:
+        # Search ID or Customer Name
+        if search.isdigit():
+            stmt = stmt.where(Order.id == int(search))
+        else:
+            stmt = stmt.where(Customer.name.ilike(f"%{search}%"))
+
+    return stmt
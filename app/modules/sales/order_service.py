@@ -0,0 +1,181 @@
+"""
+Order Placement Service
+Creates an order in a fixed number of queries regardless of basket size:
+variants and a stock snapshot across all active warehouses are bulk-loaded
+once, the allocation engine plans which branches fulfil each line, the
+plan is reserved with one conditional UPDATE (so concurrent checkouts
+can't oversell), and the order, items, stock movements and history are
+written in a single transaction.
+"""
+import datetime
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.schemas import OrderCreate
+from app.modules.sales.models import Order, OrderItem, OrderStatus, OrderStatusHistory
+from app.modules.customers.models import Customer
+from app.modules.catalog.models import ProductVariant, Product
+from app.modules.inventory.models import Warehouse, StockMovementReason
+from app.modules.inventory.allocation import load_stock_snapshot, plan_allocation, apply_allocation
+from app.modules.settings.service import ConfigurationService
+
+
+class OrderPlacementService:
+
+    @staticmethod
+    def basket_quantities(order: OrderCreate) -> "OrderedDict[str, int]":
+        """Total requested quantity per variant (a variant may appear on several lines)."""
+        totals: "OrderedDict[str, int]" = OrderedDict()
+        for item in order.items:
+            totals[item.variant_id] = totals.get(item.variant_id, 0) + item.quantity
+        return totals
+
+    @staticmethod
+    async def load_variants(db: AsyncSession, variant_ids: List[str]) -> Dict[str, Tuple[ProductVariant, Product]]:
+        stmt = select(ProductVariant, Product).join(Product).where(ProductVariant.id.in_(variant_ids))
+        result = await db.execute(stmt)
+        return {variant.id: (variant, product) for variant, product in result.all()}
+
+    @staticmethod
+    async def load_fulfilment_warehouse(db: AsyncSession) -> Optional[Warehouse]:
+        stmt = select(Warehouse).where(Warehouse.is_active == True).order_by(Warehouse.priority_index.asc()).limit(1)
+        result = await db.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def validate_constraints(db: AsyncSession, order: OrderCreate, subtotal: float):
+        from app.modules.settings.constraints_validator import ConstraintsValidator
+
+        # Collect product IDs from order
+        product_ids = [item.variant_id for item in order.items]
+
+        # Validate shipping constraints if shipping company is specified
+        if order.shipping_company:
+            shipping_validation = await ConstraintsValidator.validate_shipping_constraints(
+                db=db,
+                shipping_company_id=order.shipping_company,
+                cart_total=subtotal,
+                product_ids=product_ids
+            )
+            if not shipping_validation["allowed"]:
+                raise HTTPException(status_code=400, detail=shipping_validation["error_message"])
+
+        # Validate payment constraints (only if payment_method is numeric ID)
+        # For simple methods like "cod", "transfer" we skip constraint validation
+        if order.payment_method and isinstance(order.payment_method, int):
+            payment_validation = await ConstraintsValidator.validate_payment_constraints(
+                db=db,
+                payment_method_id=order.payment_method,
+                cart_total=subtotal,
+                product_ids=product_ids
+            )
+            if not payment_validation["allowed"]:
+                raise HTTPException(status_code=400, detail=payment_validation["error_message"])
+
+    @staticmethod
+    def stock_error(
+        variant_ids: List[str],
+        available: Dict[str, int],
+        variants: Dict[str, Tuple[ProductVariant, Product]]
+    ) -> HTTPException:
+        """One 400 listing every short line."""
+        errors = []
+        for variant_id in variant_ids:
+            variant, product = variants[variant_id]
+            errors.append(f"Insufficient stock for {product.name} ({variant.sku}). Available: {available.get(variant_id, 0)}")
+        return HTTPException(status_code=400, detail="; ".join(errors))
+
+    @staticmethod
+    async def place_order(db: AsyncSession, order: OrderCreate, changed_by: str = "System") -> Order:
+        if not order.items:
+            raise HTTPException(status_code=400, detail="Order must contain at least one item")
+
+        quantities = OrderPlacementService.basket_quantities(order)
+        variant_ids = list(quantities.keys())
+
+        # 1. Bulk reads (one query each)
+        variants = await OrderPlacementService.load_variants(db, variant_ids)
+        warehouse = await OrderPlacementService.load_fulfilment_warehouse(db)  # None -> stock isn't tracked
+
+        subtotal = 0.0
+        total_weight = 0.0
+        for item in order.items:
+            if item.variant_id not in variants:
+                continue
+            variant, product = variants[item.variant_id]
+            subtotal += variant.price * item.quantity
+            if product.weight:
+                total_weight += product.weight * item.quantity
+
+        # 2. Validate, then plan withdrawals across warehouses from one snapshot
+        await OrderPlacementService.validate_constraints(db, order, subtotal)
+        allocation = None
+        if warehouse:
+            stocked = {variant_id: qty for variant_id, qty in quantities.items() if variant_id in variants}
+            snapshot = await load_stock_snapshot(db, list(stocked))
+            origin = None
+            if order.shipping_latitude is not None and order.shipping_longitude is not None:
+                origin = (order.shipping_latitude, order.shipping_longitude)
+            allocation, shortages = plan_allocation(stocked, snapshot, origin)
+            if shortages:
+                available = {v: sum(loc.quantity for loc in snapshot.get(v, [])) for v in shortages}
+                raise OrderPlacementService.stock_error(list(shortages), available, variants)
+
+        # 3. Pricing
+        config = await ConfigurationService.get_config(db)
+        shipping_cost = config.shipping_cost(subtotal, total_weight)
+        taxable_base = subtotal + shipping_cost
+        tax_res = ConfigurationService.calculate_tax(taxable_base, config)
+
+        # 4. Customer
+        customer = None
+        if order.customer_id:
+            result = await db.execute(select(Customer).where(Customer.id == order.customer_id))
+            customer = result.scalar_one_or_none()
+        if not customer:
+            customer = Customer(name="Guest", email=f"guest_order_{order.items[0].variant_id}@store.com") # Simplified
+            db.add(customer)
+
+        # 5. Order, items and history
+        new_order = Order(
+            customer=customer,
+            status=OrderStatus.COMPLETED,
+            payment_status="paid",
+            payment_method="multi",
+            payment_details=order.payment_details or {},
+            shipping_cost=shipping_cost,
+            tax_amount=tax_res['tax_amount'],
+            total_amount=taxable_base if config.tax_inclusive else taxable_base + tax_res['tax_amount']
+        )
+        new_order.items = [
+            OrderItem(variant_id=item.variant_id, quantity=item.quantity, unit_price=variants[item.variant_id][0].price)
+            for item in order.items if item.variant_id in variants
+        ]
+        new_order.history = [
+            OrderStatusHistory(
+                old_status=None,
+                new_status=OrderStatus.COMPLETED.value,
+                changed_by=changed_by,
+                created_at=datetime.datetime.now().isoformat()
+            )
+        ]
+        db.add(new_order)
+        await db.flush()  # Assigns order id for movement references
+
+        # 6. Stock deduction: one conditional UPDATE for every planned line, bulk movements
+        if allocation:
+            failed = await apply_allocation(db, allocation, StockMovementReason.NEW_ORDER, related_id=new_order.id)
+            if failed:
+                # Stock moved between the snapshot and the reservation
+                short = list(dict.fromkeys(line["variant_id"] for line in failed))
+                available = {v: sum(l["available"] for l in failed if l["variant_id"] == v) for v in short}
+                error = OrderPlacementService.stock_error(short, available, variants)
+                await db.rollback()
+                raise error
+
+        await db.commit()
+        return new_order
@@ -0,0 +1,74 @@
+"""
+Cart Pricing Engine
+Prices one or many carts in a fixed number of queries: every variant across
+all carts is resolved with one IN query (price and product weight), and
+shipping and tax come from the cached checkout configuration (config_cache),
+so a cart update costs no configuration queries at all.
+"""
+import os
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.settings.config_cache import ConfigSnapshot
+from app.modules.settings.service import ConfigurationService
+
+# Carts accepted by one batch pricing request
+PRICING_MAX_CARTS = int(os.getenv("PRICING_MAX_CARTS", "500"))
+# Variant ids per IN query
+PRICING_LOOKUP_CHUNK = 5000
+
+CartLines = Sequence[Tuple[str, int]]  # (variant_id, quantity)
+
+
+async def load_variant_prices(db: AsyncSession, variant_ids: Iterable[str]) -> Dict[str, Tuple[float, float]]:
+    """{variant_id: (price, product weight)}; unknown ids are left out."""
+    ids = list(dict.fromkeys(variant_ids))
+    prices = {}
+    for start in range(0, len(ids), PRICING_LOOKUP_CHUNK):
+        stmt = (
+            select(ProductVariant.id, ProductVariant.price, Product.weight)
+            .join(Product, Product.id == ProductVariant.product_id)
+            .where(ProductVariant.id.in_(ids[start:start + PRICING_LOOKUP_CHUNK]))
+        )
+        for variant_id, price, weight in (await db.execute(stmt)).all():
+            prices[variant_id] = (price or 0.0, weight or 0.0)
+    return prices
+
+
+def price_cart(lines: CartLines, prices: Dict[str, Tuple[float, float]], config: ConfigSnapshot) -> Dict:
+    """Subtotal, shipping, tax and total of one cart; lines with unknown variants are skipped."""
+    subtotal = 0.0
+    total_weight = 0.0
+    for variant_id, quantity in lines:
+        known = prices.get(variant_id)
+        if known is None:
+            continue
+        price, weight = known
+        subtotal += price * quantity
+        total_weight += weight * quantity
+
+    shipping_cost = config.shipping_cost(subtotal, total_weight)
+    taxable_base = subtotal + shipping_cost
+    tax_res = ConfigurationService.calculate_tax(taxable_base, config)
+
+    total = taxable_base
+    if not config.tax_inclusive:
+        total += tax_res['tax_amount']
+
+    return {
+        "subtotal": subtotal,
+        "shipping": shipping_cost,
+        "tax": tax_res['tax_amount'],
+        "total": total,
+        "weight": total_weight
+    }
+
+
+async def price_carts(db: AsyncSession, carts: Sequence[CartLines]) -> List[Dict]:
+    """Prices every cart with one variant lookup shared by all of them, in the given order."""
+    prices = await load_variant_prices(db, (variant_id for lines in carts for variant_id, _ in lines))
+    config = await ConfigurationService.get_config(db)
+    return [price_cart(lines, prices, config) for lines in carts]
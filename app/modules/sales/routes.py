@@ -1,5 +1,5 @@
 
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException, Header, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -7,14 +7,15 @@ from typing import List
 
 from app.core.database import get_db
 from app.core.schemas import OrderCreate, OrderResponse
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_claims
 from app.modules.sales.models import Order, OrderItem, OrderStatus, OrderStatusHistory
 from app.modules.customers.models import Customer
 from app.modules.catalog.models import ProductVariant, Product
-from app.modules.inventory.models import Warehouse, InventoryItem, StockMovement, StockMovementReason
+from app.modules.inventory.models import Warehouse, StockMovement, StockMovementReason
 from app.modules.auth.models import User
-from app.modules.settings.service import ConfigurationService
 from app.modules.sales.payment_service import PaymentService
+from app.modules.sales.order_service import OrderPlacementService
+from app.modules.sales.order_queries import apply_order_filters
 
 from pydantic import BaseModel, HttpUrl
 from typing import List, Optional
@@ -33,7 +34,7 @@ async def get_pos_products(
     search: str = "", 
     category_id: str = "all", 
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_claims)
 ):
     from sqlalchemy.orm import joinedload, selectinload
     from app.modules.catalog.models import ProductImage
@@ -48,10 +49,15 @@ async def get_pos_products(
     )
     
     if search:
-        stmt = stmt.where(
-            Product.name.ilike(f"%{search}%") | 
-            ProductVariant.sku.ilike(f"%{search}%")
-        )
+        # Indexed prefix search (name, SKU, barcode), best matches first
+        from app.modules.catalog.search import search_matches
+        matches = search_matches(search)
+        if matches is not None:
+            matches = matches.subquery()
+            stmt = (
+                stmt.join(matches, matches.c.product_id == ProductVariant.product_id)
+                .order_by(matches.c.score, ProductVariant.sku)
+            )
     
     if category_id != "all":
         try:
@@ -77,6 +83,48 @@ async def get_pos_products(
         for v in variants
     ]
 
+@router.get("/api/pos/scan/{code}")
+async def scan_pos_code(
+    code: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    """Exact barcode/SKU lookup for scanners (cached per code)."""
+    from app.modules.catalog.scan_cache import lookup_scan_code
+
+    entry = await lookup_scan_code(db, code)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="No product with this barcode or SKU")
+    return entry.as_dict()
+
+@router.get("/api/pos/catalog")
+async def get_pos_catalog(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    """Full POS catalog snapshot for local search; 304 when the terminal's copy is current."""
+    from app.modules.catalog.pos_catalog import get_catalog_snapshot, catalog_version, etag_matches
+
+    headers = {"Cache-Control": "private, no-cache"}
+    if if_none_match:
+        version = await catalog_version(db)
+        if etag_matches(if_none_match, version):
+            return Response(status_code=304, headers={**headers, "ETag": f'"{version}"'})
+
+    version, body = await get_catalog_snapshot(db)
+    return Response(content=body, media_type="application/json", headers={**headers, "ETag": f'"{version}"'})
+
+@router.get("/api/pos/catalog/changes")
+async def get_pos_catalog_changes(
+    since: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    """Variants changed since a snapshot/delta version (reset=True -> reload the snapshot)."""
+    from app.modules.catalog.pos_catalog import get_catalog_changes
+    return await get_catalog_changes(db, since)
+
 # --- Calculation Schema ---
 class CartItem(BaseModel):
     variant_id: str  # UUID string
@@ -86,52 +134,63 @@ class CalculationRequest(BaseModel):
     items: List[CartItem]
     city: str = ""
 
+class BatchCalculationRequest(BaseModel):
+    carts: List[CalculationRequest]
+
 @router.post("/api/orders/calculate")
 async def calculate_order(
     req: CalculationRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_claims)
 ):
-    subtotal = 0.0
-    total_weight = 0.0
-    
-    # 1. Calculate Items Total & Weight
-    for item in req.items:
-        from sqlalchemy.orm import joinedload
-        
-        stmt = (
-            select(ProductVariant)
-            .join(Product)
-            .where(ProductVariant.id == item.variant_id)
-            .options(joinedload(ProductVariant.product))
-        )
-        res = await db.execute(stmt)
-        variant = res.unique().scalar_one_or_none()
-        if not variant: 
-            continue
-        
-        subtotal += variant.price * item.quantity
-        if variant.product and variant.product.weight:
-            total_weight += variant.product.weight * item.quantity
-            
-    # 2. Shipping & Tax
-    settings = await ConfigurationService.get_settings(db)
-    shipping_cost = await ConfigurationService.calculate_shipping(db, subtotal, total_weight)
-    
-    taxable_base = subtotal + shipping_cost
-    tax_res = ConfigurationService.calculate_tax(taxable_base, settings)
-    
-    total = taxable_base
-    if not settings.tax_inclusive:
-        total += tax_res['tax_amount']
-        
-    return {
-        "subtotal": subtotal,
-        "shipping": shipping_cost,
-        "tax": tax_res['tax_amount'],
-        "total": total,
-        "weight": total_weight
-    }
+    from app.modules.sales.pricing import price_carts
+
+    # One IN query for the items; shipping and tax from the cached config
+    return (await price_carts(db, [[(item.variant_id, item.quantity) for item in req.items]]))[0]
+
+@router.post("/api/orders/calculate/batch")
+async def calculate_orders_batch(
+    req: BatchCalculationRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    """Prices many carts (abandoned-cart previews, quote comparison) in one round trip, in request order."""
+    from app.modules.sales.pricing import price_carts, PRICING_MAX_CARTS
+
+    if len(req.carts) > PRICING_MAX_CARTS:
+        raise HTTPException(status_code=400, detail=f"At most {PRICING_MAX_CARTS} carts per request")
+    results = await price_carts(db, [[(item.variant_id, item.quantity) for item in cart.items] for cart in req.carts])
+    return {"carts": results}
+
+class CheckoutOptionsRequest(BaseModel):
+    items: List[CartItem]
+    city: str = ""
+    shipping_company_ids: Optional[List[str]] = None  # None -> every constrained company
+    payment_method_ids: Optional[List[str]] = None
+
+@router.post("/api/orders/checkout-options")
+async def get_checkout_options(
+    req: CheckoutOptionsRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_claims)
+):
+    """Which shipping companies and payment methods this cart may use (one constraint pass for all of them)."""
+    from app.modules.settings.constraints_validator import ConstraintsValidator
+    from app.modules.sales.pricing import load_variant_prices
+
+    variant_ids = [item.variant_id for item in req.items]
+    prices = await load_variant_prices(db, variant_ids)
+    subtotal = sum(prices[item.variant_id][0] * item.quantity for item in req.items if item.variant_id in prices)
+
+    options = await ConstraintsValidator.evaluate_options(
+        db,
+        cart_total=subtotal,
+        product_ids=variant_ids,
+        customer_location=req.city or None,
+        shipping_company_ids=req.shipping_company_ids,
+        payment_method_ids=req.payment_method_ids
+    )
+    return {"subtotal": subtotal, **options}
 
 @router.post("/api/orders", response_model=OrderResponse)
 async def create_order(
@@ -141,143 +200,11 @@ async def create_order(
     current_user: User = Depends(get_current_user)
 ):
     # Includes Checkout Logic (Tax, Shipping etc) migrated from old main.py
-    
-    # 1. Customer
-    customer = None
-    if order.customer_id:
-        result = await db.execute(select(Customer).where(Customer.id == order.customer_id))
-        customer = result.scalar_one_or_none()
-    
-    if not customer:
-        customer = Customer(name="Guest", email=f"guest_order_{order.items[0].variant_id}@store.com") # Simplified
-        db.add(customer)
-        await db.commit()
-    
-    # 2. Setup Order
-    new_order = Order(
-        customer_id=customer.id,
-        status=OrderStatus.NEW,
-        payment_status="pending",
-        payment_method="multi",
-        payment_details=order.payment_details or {},
-        total_amount=0.0
+    new_order = await OrderPlacementService.place_order(
+        db, order, changed_by=current_user.email if current_user else "System"
     )
-    db.add(new_order)
-    await db.commit()
-    await db.refresh(new_order)
-    
-    subtotal = 0.0
-    total_weight = 0.0
-    
-    # 3. Items
-    for item in order.items:
-        stmt = select(ProductVariant, Product).join(Product).where(ProductVariant.id == item.variant_id)
-        res = await db.execute(stmt)
-        row = res.first()
-        if not row: continue
-        variant, product = row
-        
-        if product.weight:
-            total_weight += product.weight * item.quantity
-            
-        # Add Item
-        db.add(OrderItem(order_id=new_order.id, variant_id=variant.id, quantity=item.quantity, unit_price=variant.price))
-        subtotal += variant.price * item.quantity
-    
-    # Validate Constraints BEFORE deducting stock
-    from app.modules.settings.constraints_validator import ConstraintsValidator
-    
-    # Collect product IDs from order
-    product_ids = [item.variant_id for item in order.items]
-    
-    # Validate shipping constraints if shipping company is specified
-    if order.shipping_company:
-        shipping_validation = await ConstraintsValidator.validate_shipping_constraints(
-            db=db,
-            shipping_company_id=order.shipping_company,
-            cart_total=subtotal,
-            product_ids=product_ids
-        )
-        if not shipping_validation["allowed"]:
-            raise HTTPException(status_code=400, detail=shipping_validation["error_message"])
     
-    
-    # Validate payment constraints (only if payment_method is numeric ID)
-    # For simple methods like "cod", "transfer" we skip constraint validation
-    if order.payment_method and isinstance(order.payment_method, int):
-        payment_validation = await ConstraintsValidator.validate_payment_constraints(
-            db=db,
-            payment_method_id=order.payment_method,
-            cart_total=subtotal,
-            product_ids=product_ids
-        )
-        if not payment_validation["allowed"]:
-            raise HTTPException(status_code=400, detail=payment_validation["error_message"])
-    
-    # Now deduct stock (after validation passes)
-    for item in order.items:
-        stmt = select(ProductVariant, Product).join(Product).where(ProductVariant.id == item.variant_id)
-        res = await db.execute(stmt)
-        row = res.first()
-        if not row: continue
-        variant, product = row
-        
-        # Deduct Stock (Main Implementation)
-        stmt_wh = select(Warehouse).where(Warehouse.is_active == True).order_by(Warehouse.priority_index.asc()).limit(1)
-        res_wh = await db.execute(stmt_wh)
-        wh = res_wh.scalar_one_or_none()
-        
-        if wh:
-            inv_stmt = select(InventoryItem).where(InventoryItem.variant_id == variant.id, InventoryItem.warehouse_id == wh.id)
-            inv_res = await db.execute(inv_stmt)
-            inv_item = inv_res.scalar_one_or_none()
-            
-            # STRICT VALIDATION
-            current_qty = inv_item.quantity if inv_item else 0
-            if current_qty < item.quantity:
-                # Rollback handled by FastAPI dependency exception usually, but explicit here is safer if we committed earlier
-                # However, for this simplified flow, we raise error. 
-                # Ideally check all stock BEFORE creating order. For now, we assume check passed in UI or we fail here.
-                raise HTTPException(status_code=400, detail=f"Insufficient stock for {product.name} ({variant.sku}). Available: {current_qty}")
-
-            if inv_item: inv_item.quantity -= item.quantity
-            else: db.add(InventoryItem(variant_id=variant.id, warehouse_id=wh.id, quantity=-item.quantity))
-            
-            db.add(StockMovement(variant_id=variant.id, warehouse_id=wh.id, qty_change=-item.quantity, reason=StockMovementReason.NEW_ORDER, related_id=new_order.id))
-
-    # 4. Settings Apply
-    settings = await ConfigurationService.get_settings(db)
-    shipping_cost = await ConfigurationService.calculate_shipping(db, subtotal, total_weight)
-    
-    taxable_base = subtotal + shipping_cost
-    tax_res = ConfigurationService.calculate_tax(taxable_base, settings)
-    
-    new_order.shipping_cost = shipping_cost
-    new_order.tax_amount = tax_res['tax_amount']
-    
-    if settings.tax_inclusive:
-        new_order.total_amount = taxable_base
-    else:
-        new_order.total_amount = taxable_base + tax_res['tax_amount']
-        
-    new_order.status = OrderStatus.COMPLETED
-    new_order.payment_status = "paid"
-    
-    # 5. History Log
-    history_entry = OrderStatusHistory(
-        order_id=new_order.id,
-        old_status=None,
-        new_status=new_order.status.value,
-        changed_by=current_user.email if current_user else "System",
-        created_at=datetime.datetime.now().isoformat()
-    )
-    db.add(history_entry)
-    
-    await db.commit()
-    await db.commit()
-    await db.commit()
-    
-    # 6. Notifications
+    # Notifications
     try:
         # Refresh order with customer relationship loaded to avoid "MissingGreenlet" or hangs
         stmt = select(Order).options(selectinload(Order.customer)).where(Order.id == new_order.id)
@@ -318,59 +245,37 @@ async def list_orders(
     date_to: str = None,
     search: str = None,
     sort: str = "newest",
+    cursor: str = None,
+    count: str = "exact",
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
     response: Request = None # To set headers
 ):
-    offset = (page - 1) * limit
+    from app.core.pagination import fetch_page, count_rows, total_pages
     
     # Base Query
     stmt = select(Order).join(Customer).options(selectinload(Order.customer), selectinload(Order.items))
     
-    # Filters
-    if status and status != "all":
-        stmt = stmt.where(Order.status == status)
-        
-    if payment_status and payment_status != "all":
-        stmt = stmt.where(Order.payment_status == payment_status)
-
-    if date_from:
-         stmt = stmt.where(Order.created_at >= date_from)
-         
-    if date_to:
-         stmt = stmt.where(Order.created_at <= date_to)
-
-    if search:
-        # Search ID or Customer Name
-        if search.isdigit():
-            stmt = stmt.where(Order.id == int(search))
-        else:
-            stmt = stmt.where(Customer.name.ilike(f"%{search}%"))
+    # Filters (shared with the exports)
+    stmt = apply_order_filters(stmt, status, payment_status, date_from, date_to, search)
             
-    # Sorting
-    if sort == "newest":
-        stmt = stmt.order_by(Order.created_at.desc())
-    elif sort == "oldest":
-        stmt = stmt.order_by(Order.created_at.asc())
+    # Total (count=estimate reuses recent counts, count=none skips it)
+    total_count = await count_rows(db, stmt, count, table="orders")
+
+    # Sorting: (sort key, id), keyset paging with `cursor`
+    if sort == "oldest":
+        sort_key, descending = Order.created_at, False
     elif sort == "total_high":
-        stmt = stmt.order_by(Order.total_amount.desc())
+        sort_key, descending = Order.total_amount, True
     elif sort == "total_low":
-        stmt = stmt.order_by(Order.total_amount.asc())
-
-    # Count Query (Simplified)
-    # Ideally should run a separate count query or use window functions
-    # For now, we fetch all to count then slice (Not optimized for huge data, but fits prototype scope)
-    # Optimization: Use `func.count` separately.
-    from sqlalchemy import func
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    count_res = await db.execute(count_stmt)
-    total_count = count_res.scalar()
-    
-    # Apply Pagination
-    stmt = stmt.offset(offset).limit(limit)
-    
-    result = await db.execute(stmt)
-    orders = result.scalars().all()
+        sort_key, descending = Order.total_amount, False
+    else:
+        sort_key, descending = Order.created_at, True
+
+    orders, next_cursor = await fetch_page(
+        db, stmt, sort_key=sort_key, id_column=Order.id, descending=descending,
+        cursor=cursor, page=page, page_size=limit
+    )
     
     # Return with metadata (using dict to include meta, or headers)
     return {
@@ -393,7 +298,8 @@ async def list_orders(
             "page": page,
             "limit": limit,
             "total": total_count,
-            "pages": (total_count + limit - 1) // limit
+            "pages": total_pages(total_count, limit),
+            "next_cursor": next_cursor
         }
     }
 
@@ -464,33 +370,21 @@ async def update_order_status(order_id: int, update: StatusUpdate, db: AsyncSess
         product_settings = ps_result.scalar_one_or_none()
         
         if product_settings and product_settings.return_cancelled_quantity:
-            # Return stock to inventory
-            for item in order.items:
+            # Return stock to the warehouses it was taken from
+            from app.modules.inventory.allocation import load_order_allocation, release_allocation
+
+            allocation = await load_order_allocation(db, order.id)
+            untracked = [item for item in order.items if item.variant_id not in allocation]
+            if untracked:
+                # Orders without recorded withdrawals go back to the main warehouse
                 stmt_wh = select(Warehouse).where(Warehouse.is_active == True).order_by(Warehouse.priority_index.asc()).limit(1)
                 res_wh = await db.execute(stmt_wh)
                 wh = res_wh.scalar_one_or_none()
-                
                 if wh:
-                    inv_stmt = select(InventoryItem).where(
-                        InventoryItem.variant_id == item.variant_id,
-                        InventoryItem.warehouse_id == wh.id
-                    )
-                    inv_res = await db.execute(inv_stmt)
-                    inv_item = inv_res.scalar_one_or_none()
-                    
-                    if inv_item:
-                        inv_item.quantity += item.quantity
-                    else:
-                        db.add(InventoryItem(variant_id=item.variant_id, warehouse_id=wh.id, quantity=item.quantity))
-                    
-                    # Log stock movement
-                    db.add(StockMovement(
-                        variant_id=item.variant_id,
-                        warehouse_id=wh.id,
-                        qty_change=item.quantity,
-                        reason=StockMovementReason.ORDER_CANCELLED,
-                        related_id=order.id
-                    ))
+                    for item in untracked:
+                        allocation.setdefault(item.variant_id, []).append({"warehouse_id": wh.id, "take_qty": item.quantity})
+
+            await release_allocation(db, allocation, StockMovementReason.ORDER_CANCELLED, related_id=order.id)
     
     # Add History
     history = OrderStatusHistory(
@@ -557,36 +451,37 @@ async def update_order_status(order_id: int, update: StatusUpdate, db: AsyncSess
     return {"status": "updated"}
 
 # --- Export ---
-import pandas as pd
 from fastapi.responses import StreamingResponse
-import io
+from app.modules.sales.order_export import stream_orders_xlsx, stream_orders_csv, XLSX_MEDIA_TYPE
 
 @router.get("/api/orders/export/excel")
-async def export_orders_excel(db: AsyncSession = Depends(get_db)):
-    stmt = select(Order).join(Customer).order_by(Order.created_at.desc())
-    result = await db.execute(stmt)
-    orders = result.scalars().all()
-    
-    data = []
-    for o in orders:
-        data.append({
-            "Order ID": o.id,
-            "Date": o.created_at,
-            "Customer": o.customer.name,
-            "Status": o.status.value,
-            "Payment": o.payment_status,
-            "Total": o.total_amount
-        })
-        
-    df = pd.DataFrame(data)
-    stream = io.BytesIO()
-    with pd.ExcelWriter(stream) as writer:
-        df.to_excel(writer, index=False)
-    
-    stream.seek(0)
-    
+async def export_orders_excel(
+    status: str = "all",
+    payment_status: str = "all",
+    date_from: str = None,
+    date_to: str = None,
+    search: str = None
+):
+    """Streams the orders matching the list filters as XLSX (constant memory)."""
+    filters = dict(status=status, payment_status=payment_status, date_from=date_from, date_to=date_to, search=search)
     return StreamingResponse(
-        stream, 
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        stream_orders_xlsx(**filters),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": "attachment; filename=orders_export.xlsx"}
     )
+
+@router.get("/api/orders/export/csv")
+async def export_orders_csv(
+    status: str = "all",
+    payment_status: str = "all",
+    date_from: str = None,
+    date_to: str = None,
+    search: str = None
+):
+    """Streams the orders matching the list filters as CSV, chunk by chunk."""
+    filters = dict(status=status, payment_status=payment_status, date_from=date_from, date_to=date_to, search=search)
+    return StreamingResponse(
+        stream_orders_csv(**filters),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": "attachment; filename=orders_export.csv"}
+    )
@@ -0,0 +1,241 @@
+"""
+Checkout Configuration Cache
+Keeps an in-process, read-only copy of the configuration every cart
+calculation and checkout needs: tax policy, active shipping rules and active
+shipping/payment constraints. These change a few times a month but used to
+be queried on every cart update.
+
+The copy is versioned by the single-row config_versions counter. Settings
+writes bump it in their own transaction (commit_config_change), and every
+worker compares its copy's version with the table at most once per
+CONFIG_VERSION_CHECK_INTERVAL, so several uvicorn workers converge within
+that interval without any messaging between them. Concurrent checks share
+one query (and one reload), and a reload that overlaps a write in this worker
+is returned but not cached.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.database import AsyncSessionLocal
+from app.modules.settings.constraint_rules import (
+    ConstraintIndex, build_index, SHIPPING_BLOCKED_MESSAGE, PAYMENT_BLOCKED_MESSAGE
+)
+from app.modules.settings.models import (
+    ConfigVersion, StoreSettings, ShippingRule, ShippingConditionType, ShippingConstraint, PaymentConstraint
+)
+
+# Seconds between version checks (one primary-key read). Writes in this worker
+# invalidate immediately; the interval bounds staleness in the other workers.
+CONFIG_VERSION_CHECK_INTERVAL = float(os.getenv("CONFIG_VERSION_CHECK_INTERVAL", "1"))
+# Seconds before a copy is reloaded even though the version didn't change, for
+# rows edited outside the settings endpoints (scripts, manual SQL)
+CONFIG_CACHE_TTL = float(os.getenv("CONFIG_CACHE_TTL", "300"))
+
+CONFIG_VERSION_ID = 1
+
+# Shipping fallback when no rule matches the cart
+DEFAULT_SHIPPING_COST = 50.0
+
+ShippingRuleEntry = Tuple[str, ShippingConditionType, float, float]  # zone, condition, value, cost
+
+
+class ConfigSnapshot:
+    """Immutable checkout configuration; quacks like StoreSettings for calculate_tax."""
+
+    __slots__ = ("version", "loaded_at", "tax_rate", "tax_inclusive",
+                 "shipping_rules", "shipping_constraints", "payment_constraints")
+
+    def __init__(self, version: int, settings: Optional[StoreSettings], shipping_rules: List[ShippingRuleEntry],
+                 shipping_constraints: ConstraintIndex, payment_constraints: ConstraintIndex):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        columns = StoreSettings.__table__.c
+        self.tax_rate = settings.tax_rate if settings else columns.tax_rate.default.arg
+        self.tax_inclusive = settings.tax_inclusive if settings else columns.tax_inclusive.default.arg
+        self.shipping_rules = shipping_rules
+        self.shipping_constraints = shipping_constraints
+        self.payment_constraints = payment_constraints
+
+    def shipping_cost(self, cart_total: float, total_weight: float = 0.0, zone: str = "All") -> float:
+        """Cheapest rule for the zone (or "All") that the cart qualifies for."""
+        applicable_costs = []
+        for rule_zone, condition_type, condition_value, cost in self.shipping_rules:
+            if rule_zone != zone and rule_zone != "All":
+                continue
+            if condition_type == ShippingConditionType.FIXED:
+                applicable_costs.append(cost)
+            elif condition_type == ShippingConditionType.PRICE_BASED:
+                if cart_total >= condition_value:
+                    applicable_costs.append(cost)
+            elif condition_type == ShippingConditionType.WEIGHT_BASED:
+                if total_weight >= condition_value:
+                    applicable_costs.append(cost)
+
+        if not applicable_costs:
+            return DEFAULT_SHIPPING_COST
+        return min(applicable_costs)
+
+
+async def _load_snapshot(db: AsyncSession, version: int) -> ConfigSnapshot:
+    settings = (await db.execute(select(StoreSettings).limit(1))).scalar_one_or_none()
+
+    rules = (await db.execute(
+        select(ShippingRule.zone, ShippingRule.condition_type, ShippingRule.condition_value, ShippingRule.cost)
+        .where(ShippingRule.is_active == True)
+    )).all()
+
+    shipping_constraints = (await db.execute(
+        select(ShippingConstraint).where(ShippingConstraint.is_active == True)
+        .options(selectinload(ShippingConstraint.conditions))
+    )).scalars().all()
+
+    payment_constraints = (await db.execute(
+        select(PaymentConstraint).where(PaymentConstraint.is_active == True)
+        .options(selectinload(PaymentConstraint.conditions))
+    )).scalars().all()
+
+    return ConfigSnapshot(
+        version,
+        settings,
+        [tuple(rule) for rule in rules],
+        build_index(shipping_constraints, "shipping_company_ids", SHIPPING_BLOCKED_MESSAGE),
+        build_index(payment_constraints, "payment_method_ids", PAYMENT_BLOCKED_MESSAGE, location_rules=False)
+    )
+
+
+class _ConfigCache:
+    def __init__(self):
+        self.snapshot: Optional[ConfigSnapshot] = None
+        self.checked_at = 0.0
+        # Bumped by every invalidation; a reload started under an older one is not cached
+        self.generation = 0
+        self.loading: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.version_checks = 0
+        self.reloads = 0
+
+    def clear(self):
+        self.generation += 1
+        self.snapshot = None
+        self.checked_at = 0.0
+        # Later callers start a reload that sees the write instead of joining one that may not
+        self.loading = None
+
+    def expired(self, now: float) -> bool:
+        return self.snapshot is None or (now - self.snapshot.loaded_at) >= CONFIG_CACHE_TTL
+
+
+_cache = _ConfigCache()
+
+
+async def current_config_version(db: AsyncSession) -> int:
+    stmt = select(ConfigVersion.version).where(ConfigVersion.id == CONFIG_VERSION_ID)
+    return (await db.execute(stmt)).scalar() or 0
+
+
+async def _refresh(generation: int) -> ConfigSnapshot:
+    try:
+        now = time.monotonic()
+        async with AsyncSessionLocal() as db:
+            _cache.version_checks += 1
+            version = await current_config_version(db)
+            snapshot = _cache.snapshot
+            if not _cache.expired(now) and snapshot.version == version:
+                _cache.checked_at = now
+                _cache.hits += 1
+                return snapshot
+
+            # Read the version before the rows: a write committed in between only
+            # makes the next check reload again, never hides the change
+            snapshot = await _load_snapshot(db, version)
+
+        _cache.reloads += 1
+        if _cache.generation == generation:
+            _cache.snapshot = snapshot
+            _cache.checked_at = now
+        return snapshot
+    finally:
+        if _cache.loading is asyncio.current_task():
+            _cache.loading = None
+
+
+async def get_config_snapshot() -> ConfigSnapshot:
+    """Cached configuration; checks the shared version at most once per CONFIG_VERSION_CHECK_INTERVAL."""
+    now = time.monotonic()
+    if not _cache.expired(now) and (now - _cache.checked_at) < CONFIG_VERSION_CHECK_INTERVAL:
+        _cache.hits += 1
+        return _cache.snapshot
+
+    loop = asyncio.get_running_loop()
+    loading = _cache.loading
+    if loading is None or loading.get_loop() is not loop:
+        loading = _cache.loading = loop.create_task(_refresh(_cache.generation))
+    # A cancelled caller doesn't cancel the reload the others are waiting on
+    return await asyncio.shield(loading)
+
+
+def _upsert_version_stmt(dialect_name: str):
+    """INSERT ... ON CONFLICT (id) DO UPDATE SET version = version + 1"""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    table = ConfigVersion.__table__
+    stmt = dialect_insert(table).values(id=CONFIG_VERSION_ID, version=1)
+    return stmt.on_conflict_do_update(index_elements=[table.c.id], set_={"version": table.c.version + 1})
+
+
+async def ensure_config_version(db: AsyncSession):
+    """Seeds the counter row at startup (the migration does too); workers starting together may race on it."""
+    if await db.get(ConfigVersion, CONFIG_VERSION_ID) is not None:
+        return
+    db.add(ConfigVersion(id=CONFIG_VERSION_ID, version=0))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Another worker seeded it first
+        await db.rollback()
+
+
+async def bump_config_version(db: AsyncSession):
+    """Marks the configuration as changed for every worker; runs in the caller's transaction."""
+    upsert = _upsert_version_stmt(db.get_bind().dialect.name)
+    if upsert is not None:
+        await db.execute(upsert)
+        return
+    # Other databases: the row is seeded at startup (ensure_config_version)
+    await db.execute(
+        update(ConfigVersion).where(ConfigVersion.id == CONFIG_VERSION_ID).values(version=ConfigVersion.version + 1)
+    )
+
+
+async def commit_config_change(db: AsyncSession):
+    """Commit for writes to tax settings, shipping rules or constraints (instead of db.commit())."""
+    await bump_config_version(db)
+    await db.commit()
+    invalidate_config()
+
+
+def invalidate_config():
+    """Drops this worker's copy; other workers notice the bumped version."""
+    _cache.clear()
+
+
+def config_cache_stats() -> Dict:
+    snapshot = _cache.snapshot
+    return {
+        "version": snapshot.version if snapshot else None,
+        "hits": _cache.hits,
+        "version_checks": _cache.version_checks,
+        "reloads": _cache.reloads
+    }
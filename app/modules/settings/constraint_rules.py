@@ -0,0 +1,150 @@
+"""
+Constraint Rule Engine
+Active shipping/payment constraints compiled once per configuration version
+(see config_cache) into an index keyed by shipping company / payment method
+id. Each compiled constraint keeps only what a cart check needs:
+- CART_TOTAL conditions (GT, LT, BETWEEN) folded into one allowed interval
+- PRODUCT restrictions as a frozenset
+- LOCATION restrictions as a frozenset (shipping only)
+so checking a cart is a dict lookup plus a few comparisons and set
+intersections, independent of how many constraints target other options.
+
+Ids are compared as strings: constraints store them from JSON, while orders
+may carry numeric ids.
+"""
+import math
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+SHIPPING_BLOCKED_MESSAGE = "شركة الشحن المحددة غير متاحة لهذا الطلب"
+PAYMENT_BLOCKED_MESSAGE = "طريقة الدفع المحددة غير متاحة لهذا الطلب"
+
+# BETWEEN without a max used to mean "up to 999999"
+_DEFAULT_BETWEEN_MAX = 999999
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ids(values) -> FrozenSet[str]:
+    if not isinstance(values, (list, tuple, set, frozenset)):
+        return frozenset()
+    return frozenset(str(value) for value in values)
+
+
+class CompiledConstraint:
+    """One constraint: violated when any of its conditions is."""
+
+    __slots__ = ("low", "low_inclusive", "high", "high_inclusive", "products", "locations", "error_message")
+
+    def __init__(self, error_message: str):
+        # Allowed cart total interval; starts unbounded
+        self.low, self.low_inclusive = -math.inf, True
+        self.high, self.high_inclusive = math.inf, True
+        self.products: FrozenSet[str] = frozenset()
+        self.locations: FrozenSet[str] = frozenset()
+        self.error_message = error_message
+
+    def _raise_low(self, bound: float, inclusive: bool):
+        if bound > self.low or (bound == self.low and not inclusive):
+            self.low, self.low_inclusive = bound, inclusive
+
+    def _lower_high(self, bound: float, inclusive: bool):
+        if bound < self.high or (bound == self.high and not inclusive):
+            self.high, self.high_inclusive = bound, inclusive
+
+    def add_cart_total(self, operator: Optional[str], value: dict):
+        if operator == "GT":
+            amount = _float(value.get("amount", 0))
+            if amount is not None:
+                self._raise_low(amount, False)
+        elif operator == "LT":
+            amount = _float(value.get("amount", 0))
+            if amount is not None:
+                self._lower_high(amount, False)
+        elif operator == "BETWEEN":
+            low = _float(value.get("min", 0))
+            high = _float(value.get("max", _DEFAULT_BETWEEN_MAX))
+            if low is not None:
+                self._raise_low(low, True)
+            if high is not None:
+                self._lower_high(high, True)
+
+    def violated(self, cart_total: float, cart_products: FrozenSet[str], location: Optional[str]) -> bool:
+        if cart_total < self.low or (cart_total == self.low and not self.low_inclusive):
+            return True
+        if cart_total > self.high or (cart_total == self.high and not self.high_inclusive):
+            return True
+        if self.products and not self.products.isdisjoint(cart_products):
+            return True
+        return bool(location and location in self.locations)
+
+
+def compile_constraint(conditions: Iterable[Tuple[str, Optional[str], dict]], error_message: str,
+                       location_rules: bool = True) -> CompiledConstraint:
+    """conditions: (type, operator, value) rows. Unknown types never block, as before."""
+    compiled = CompiledConstraint(error_message)
+    products, locations = set(), set()
+    for condition_type, operator, value in conditions:
+        value = value if isinstance(value, dict) else {}
+        if condition_type == "CART_TOTAL":
+            compiled.add_cart_total(operator, value)
+        elif condition_type == "PRODUCT":
+            products |= _ids(value.get("product_ids"))
+        elif condition_type == "LOCATION" and location_rules:
+            locations |= _ids(value.get("locations"))
+    compiled.products = frozenset(products)
+    compiled.locations = frozenset(locations)
+    return compiled
+
+
+class ConstraintIndex:
+    """Compiled constraints by target id (shipping company or payment method), in definition order."""
+
+    __slots__ = ("by_target",)
+
+    def __init__(self, by_target: Dict[str, Tuple[CompiledConstraint, ...]]):
+        self.by_target = by_target
+
+    @property
+    def target_ids(self) -> List[str]:
+        return list(self.by_target)
+
+    def check(self, target_id, cart_total: float, cart_products: FrozenSet[str],
+              location: Optional[str] = None) -> Optional[str]:
+        """Error message of the first violated constraint for this target, None when allowed."""
+        for constraint in self.by_target.get(str(target_id), ()):
+            if constraint.violated(cart_total, cart_products, location):
+                return constraint.error_message
+        return None
+
+    def evaluate(self, target_ids: Iterable, cart_total: float, cart_products: FrozenSet[str],
+                 location: Optional[str] = None) -> List[Dict]:
+        """[{"id", "allowed", "error_message"}] for every target, in the given order."""
+        results = []
+        for target_id in target_ids:
+            error_message = self.check(target_id, cart_total, cart_products, location)
+            results.append({"id": target_id, "allowed": error_message is None, "error_message": error_message})
+        return results
+
+
+def build_index(constraints, target_attr: str, default_message: str, location_rules: bool = True) -> ConstraintIndex:
+    """Compiles active ShippingConstraint/PaymentConstraint rows (conditions loaded)."""
+    by_target: Dict[str, List[CompiledConstraint]] = {}
+    for constraint in constraints:
+        message = constraint.custom_error_message if constraint.is_custom_error_enabled else None
+        compiled = compile_constraint(
+            ((condition.type, condition.operator, condition.value) for condition in constraint.conditions),
+            message or default_message,
+            location_rules
+        )
+        for target_id in _ids(getattr(constraint, target_attr)):
+            by_target.setdefault(target_id, []).append(compiled)
+    return ConstraintIndex({target_id: tuple(compiled) for target_id, compiled in by_target.items()})
+
+
+def cart_product_ids(product_ids: Iterable) -> FrozenSet[str]:
+    return frozenset(str(product_id) for product_id in product_ids)
@@ -307,6 +307,17 @@ class PaymentConstraintCondition(TimeStampedModel):
 
     constraint: Mapped["PaymentConstraint"] = relationship("PaymentConstraint", back_populates="conditions")
 
+class ConfigVersion(TimeStampedModel):
+    """
+    Single-row counter bumped by every write to the checkout configuration
+    (store tax settings, shipping rules, shipping/payment constraints). Each
+    worker compares it with the version of its cached copy (config_cache).
+    """
+    __tablename__ = "config_versions"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0)
+
 class CountryTax(TimeStampedModel):
     __tablename__ = "country_taxes"
 
@@ -14,9 +14,12 @@ from app.dependencies import get_current_user
 from app.modules.settings.models import StoreSettings, PaymentConfig, ShippingRule, ShippingConditionType, StoreLanguage, Currency, CheckoutConfig, AddressCollectionMethod, GiftingConfig, InvoiceConfig, OrderSettings, ProductSettings, CountryTax, NotificationTemplate, NotificationChannel, NotificationEventType, LegalPage
 from app.modules.settings.schemas import CheckoutConfigUpdate, GiftingConfigUpdate, InvoiceConfigUpdate, OrderSettingsUpdate, ProductSettingsUpdate, StoreSettingsUpdate, CountryTaxCreate, CountryTaxUpdate, CountryTaxResponse, NotificationTemplateResponse, NotificationTemplateUpdate, LegalPageResponse, LegalPageUpdate, TeamMemberCreate, TeamMemberUpdate, TeamMemberResponse
 from app.modules.settings import schemas
+from app.modules.settings.settings_cache import invalidate_store_settings
+from app.modules.settings.config_cache import commit_config_change
 from app.modules.auth.models import User, UserRole
+from app.modules.auth.user_cache import invalidate_user, next_token_version
 from app.modules.auth import models as auth_models
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 router = APIRouter(tags=["Settings"])
 templates = Jinja2Templates(directory="templates")
@@ -80,6 +83,7 @@ async def get_general_settings(db: AsyncSession = Depends(get_db), current_user:
         settings = StoreSettings()
         db.add(settings)
         await db.commit()
+        invalidate_store_settings()
     return settings
 
     return settings
@@ -97,7 +101,8 @@ async def update_store_settings(data: StoreSettingsUpdate, db: AsyncSession = De
     for key, value in settings_data.items():
         setattr(settings, key, value)
     
-    await db.commit()
+    await commit_config_change(db)
+    invalidate_store_settings()
     await db.refresh(settings)
     return settings
 
@@ -123,7 +128,7 @@ async def create_shipping_rule(rule: dict, db: AsyncSession = Depends(get_db), c
         cost=float(rule['cost'])
     )
     db.add(new_rule)
-    await db.commit()
+    await commit_config_change(db)
     return new_rule
 
 # Languages & Currencies Page
@@ -487,7 +492,7 @@ async def create_shipping_constraint(data: ShippingConstraintCreate, db: AsyncSe
         )
         db.add(new_condition)
 
-    await db.commit()
+    await commit_config_change(db)
     # Refresh with relations
     stmt = select(ShippingConstraint).where(ShippingConstraint.id == new_constraint.id).options(selectinload(ShippingConstraint.conditions))
     result = await db.execute(stmt)
@@ -521,7 +526,7 @@ async def update_shipping_constraint(id: int, data: ShippingConstraintUpdate, db
             )
             constraint.conditions.append(new_condition)
 
-    await db.commit()
+    await commit_config_change(db)
     await db.refresh(constraint)
     return constraint
 
@@ -533,7 +538,7 @@ async def delete_shipping_constraint(id: int, db: AsyncSession = Depends(get_db)
         raise HTTPException(status_code=404, detail="Constraint not found")
     
     await db.delete(constraint)
-    await db.commit()
+    await commit_config_change(db)
     return {"message": "Constraint deleted"}
 
 
@@ -586,7 +591,7 @@ async def create_payment_constraint(data: PaymentConstraintCreate, db: AsyncSess
         )
         db.add(new_condition)
 
-    await db.commit()
+    await commit_config_change(db)
     stmt = select(PaymentConstraint).where(PaymentConstraint.id == new_constraint.id).options(selectinload(PaymentConstraint.conditions))
     result = await db.execute(stmt)
     return result.scalar_one()
@@ -616,7 +621,7 @@ async def update_payment_constraint(id: int, data: PaymentConstraintUpdate, db:
             )
             constraint.conditions.append(new_condition)
 
-    await db.commit()
+    await commit_config_change(db)
     await db.refresh(constraint)
     return constraint
 
@@ -627,7 +632,7 @@ async def delete_payment_constraint(id: int, db: AsyncSession = Depends(get_db),
         raise HTTPException(status_code=404, detail="Constraint not found")
     
     await db.delete(constraint)
-    await db.commit()
+    await commit_config_change(db)
     return {"message": "Constraint deleted"}
 
 # ----------------------------------------------------------------------
@@ -647,7 +652,8 @@ async def update_store_settings(data: StoreSettingsUpdate, db: AsyncSession = De
     for key, value in settings_data.items():
         setattr(settings, key, value)
     
-    await db.commit()
+    await commit_config_change(db)
+    invalidate_store_settings()
     await db.refresh(settings)
     return settings
 
@@ -763,7 +769,7 @@ async def create_team_member(data: TeamMemberCreate, db: AsyncSession = Depends(
     if result.scalar_one_or_none():
          raise HTTPException(status_code=400, detail="Username or Email already exists")
     
-    hashed_password = get_password_hash(data.password)
+    hashed_password = await get_password_hash_async(data.password)
     
     new_user = User(
         username=data.username,
@@ -773,7 +779,8 @@ async def create_team_member(data: TeamMemberCreate, db: AsyncSession = Depends(
         phone_number=data.phone_number,
         role=UserRole(data.role),
         group_id=data.group_id,
-        is_active=data.is_active
+        is_active=data.is_active,
+        token_version=next_token_version(data.username)
     )
     
     db.add(new_user)
@@ -817,12 +824,19 @@ async def update_team_member(user_id: int, data: TeamMemberUpdate, db: AsyncSess
         user.email = data.email
     
     if data.group_id is not None: user.group_id = data.group_id
-    if data.is_active is not None: user.is_active = data.is_active
+    if data.is_active is not None:
+        if user.is_active and not data.is_active:
+            # Deactivation revokes existing sessions, claims-only ones included
+            user.token_version += 1
+        user.is_active = data.is_active
     
     if data.password:
-        user.password_hash = get_password_hash(data.password)
+        user.password_hash = await get_password_hash_async(data.password)
+        # Signs the member out of their existing sessions
+        user.token_version += 1
         
     await db.commit()
+    invalidate_user(user.username, user.token_version)
     await db.refresh(user)
     return user
 
@@ -837,8 +851,11 @@ async def delete_team_member(user_id: int, db: AsyncSession = Depends(get_db), c
     if user.id == current_user.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
 
+    # Recorded as revoked so claims-only auth rejects the member's tokens too
+    revoked_version = user.token_version + 1
     await db.delete(user)
     await db.commit()
+    invalidate_user(user.username, revoked_version)
     return {"message": "User deleted"}
 
 # ----------------------------------------------------------------------
@@ -1,7 +1,9 @@
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.modules.settings.models import StoreSettings, ShippingRule, ShippingConditionType
+from app.modules.settings.models import StoreSettings
+from app.modules.settings.settings_cache import invalidate_store_settings
+from app.modules.settings.config_cache import ConfigSnapshot, get_config_snapshot
 
 class ConfigurationService:
     @staticmethod
@@ -16,10 +18,19 @@ class ConfigurationService:
             settings = StoreSettings()
             db.add(settings)
             await db.commit()
+            invalidate_store_settings()
             await db.refresh(settings)
             
         return settings
 
+    @staticmethod
+    async def get_config(db: AsyncSession) -> ConfigSnapshot:
+        """
+        Cached tax policy, shipping rules and constraints for cart calculations
+        (no queries while the shared config version is unchanged).
+        """
+        return await get_config_snapshot()
+
     @staticmethod
     def calculate_tax(amount: float, settings: StoreSettings) -> dict:
         """
@@ -50,29 +61,5 @@ class ConfigurationService:
         Finds the best matching shipping rule.
         Priority: Matches Zone -> Cheapest Valid Rule.
         """
-        # Fetch active rules for the zone or 'All'
-        stmt = select(ShippingRule).where(
-            ShippingRule.is_active == True,
-            (ShippingRule.zone == zone) | (ShippingRule.zone == "All")
-        )
-        result = await db.execute(stmt)
-        rules = result.scalars().all()
-        
-        applicable_costs = []
-        
-        for rule in rules:
-            if rule.condition_type == ShippingConditionType.FIXED:
-                applicable_costs.append(rule.cost)
-            
-            elif rule.condition_type == ShippingConditionType.PRICE_BASED:
-                if cart_total >= rule.condition_value:
-                    applicable_costs.append(rule.cost)
-                    
-            elif rule.condition_type == ShippingConditionType.WEIGHT_BASED:
-                if total_weight >= rule.condition_value:
-                    applicable_costs.append(rule.cost)
-        
-        if not applicable_costs:
-            return 50.0 # Default fallback cost if no rules match
-            
-        return min(applicable_costs) # Return the best rate for the customer
+        config = await get_config_snapshot()
+        return config.shipping_cost(cart_total, total_weight, zone)
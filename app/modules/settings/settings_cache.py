@@ -0,0 +1,144 @@
+"""
+Store Settings Snapshot Cache
+Keeps an in-process, read-only copy of StoreSettings so hot paths
+(maintenance checks on every request) don't hit the database. Concurrent
+misses share one reload, and a reload that overlaps a write is not cached.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.modules.settings.models import StoreSettings
+
+# Seconds a snapshot is trusted before it is reloaded. Writes through the
+# settings endpoints invalidate immediately; the TTL only bounds staleness
+# for changes made elsewhere (other workers, scripts).
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Daily schedule entries after compilation
+_DAY_OFF = None          # no maintenance that day
+_DAY_ALL = "all_day"     # enabled without start/end -> whole day
+
+
+def _to_minutes(value: Optional[str]) -> Optional[int]:
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except (TypeError, ValueError):
+        return None
+
+
+def _compile_daily_schedule(schedule: Optional[dict]) -> Optional[Tuple]:
+    """Turns {"monday": {"enabled": True, "start": "09:00", "end": "11:00"}, ...} into a weekday-indexed tuple."""
+    if not schedule:
+        return None
+
+    compiled = []
+    for day in WEEKDAYS:
+        entry = schedule.get(day) or {}
+        if not entry.get("enabled"):
+            compiled.append(_DAY_OFF)
+            continue
+        start, end = _to_minutes(entry.get("start")), _to_minutes(entry.get("end"))
+        compiled.append((start, end) if start is not None and end is not None else _DAY_ALL)
+    return tuple(compiled)
+
+
+class MaintenanceSnapshot:
+    """Precompiled maintenance configuration with a cheap is_active(now) predicate."""
+
+    __slots__ = ("enabled", "maintenance_type", "title_ar", "message_ar", "message_en", "window", "daily")
+
+    def __init__(self, settings: Optional[StoreSettings]):
+        self.enabled = bool(settings and settings.maintenance_mode_enabled)
+        self.maintenance_type = (settings.maintenance_type if settings else None) or "fully_closed"
+        self.title_ar = settings.maintenance_title_ar if settings else None
+        self.message_ar = settings.maintenance_message_ar if settings else None
+        self.message_en = settings.maintenance_message_en if settings else None
+
+        self.window = None
+        if settings and settings.maintenance_period_type == "scheduled" \
+                and settings.maintenance_start_at and settings.maintenance_end_at:
+            self.window = (settings.maintenance_start_at, settings.maintenance_end_at)
+
+        self.daily = _compile_daily_schedule(settings.maintenance_daily_schedule) if settings else None
+
+    def is_active(self, now: datetime) -> bool:
+        if not self.enabled:
+            return False
+
+        # Scheduled maintenance: only inside the window
+        if self.window and not (self.window[0] <= now <= self.window[1]):
+            return False
+
+        # Daily schedule: only on enabled days, inside the configured hours
+        if self.daily is not None:
+            today = self.daily[now.weekday()]
+            if today is _DAY_OFF:
+                return False
+            if today is not _DAY_ALL:
+                minutes = now.hour * 60 + now.minute
+                if not (today[0] <= minutes <= today[1]):
+                    return False
+
+        return True
+
+
+class _SettingsCache:
+    def __init__(self):
+        self.snapshot: Optional[MaintenanceSnapshot] = None
+        self.loaded_at = 0.0
+        # Bumped by every invalidation; a reload started under an older one is not cached
+        self.generation = 0
+        self.loading: Optional[asyncio.Task] = None
+
+    def fresh(self) -> bool:
+        return self.snapshot is not None and (time.monotonic() - self.loaded_at) < SETTINGS_CACHE_TTL
+
+
+_cache = _SettingsCache()
+
+
+async def _reload(generation: int) -> MaintenanceSnapshot:
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(StoreSettings).limit(1))
+            settings = result.scalar_one_or_none()
+            snapshot = MaintenanceSnapshot(settings)
+
+        if _cache.generation == generation:
+            _cache.snapshot = snapshot
+            _cache.loaded_at = time.monotonic()
+        return snapshot
+    finally:
+        if _cache.loading is asyncio.current_task():
+            _cache.loading = None
+
+
+async def get_maintenance_snapshot() -> MaintenanceSnapshot:
+    """Returns the cached snapshot, reloading it from the database when stale or invalidated."""
+    if _cache.fresh():
+        return _cache.snapshot
+
+    loop = asyncio.get_running_loop()
+    loading = _cache.loading
+    if loading is None or loading.get_loop() is not loop:
+        loading = _cache.loading = loop.create_task(_reload(_cache.generation))
+    # A cancelled caller doesn't cancel the reload the others are waiting on
+    return await asyncio.shield(loading)
+
+
+def invalidate_store_settings():
+    """Call after committing any StoreSettings write."""
+    _cache.generation += 1
+    _cache.snapshot = None
+    _cache.loaded_at = 0.0
+    # Later callers start a reload that sees the write instead of joining one that may not
+    _cache.loading = None
@@ -0,0 +1,88 @@
+"""
+Benchmark: bulk-editor save and full stock-take finalize.
+Seeds ROWS variants with stock in one warehouse, then times
+batch_update_inventory (every row changed) and finalize_stock_taking
+(full count with every row different) against a throwaway SQLite
+database (or BENCHMARK_DATABASE_URL if set).
+
+Usage: python benchmark_bulk_stock_update.py [rows]
+"""
+import asyncio
+import sys
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from sqlalchemy import select, func, insert, update
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.inventory.models import Warehouse, InventoryItem, StockMovement, StockMovementReason, StockTakingItem
+from app.modules.inventory.schemas import BatchInventoryUpdate, InventoryUpdateItem, StockTakingCreate
+from app.modules.inventory.service import batch_update_inventory, create_stock_taking, finalize_stock_taking
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+
+async def seed(rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as session:
+        wh = Warehouse(name="Bench WH", priority_index=0)
+        session.add(wh)
+        await session.flush()
+
+        products = [{"name": f"Bench Product {i}", "slug": f"bench-product-{i}", "status": "Active"} for i in range(rows)]
+        product_ids = (await session.execute(insert(Product).returning(Product.id), products)).scalars().all()
+        variants = [{"product_id": pid, "sku": f"BENCH-{i:06d}", "price": 1.0} for i, pid in enumerate(product_ids)]
+        variant_ids = (await session.execute(insert(ProductVariant).returning(ProductVariant.id), variants)).scalars().all()
+        await session.execute(insert(InventoryItem), [
+            {"variant_id": vid, "warehouse_id": wh.id, "quantity": 10} for vid in variant_ids
+        ])
+        await session.commit()
+        return wh.id, list(variant_ids)
+
+
+def print_report(label: str, stats: dict):
+    print(f"{label:<22} rows={stats['rows']:<6} changed={stats['changed']:<6} "
+          f"elapsed={stats['elapsed_ms']:>9.2f} ms  {stats['rows_per_sec']:>10} rows/s")
+
+
+async def run(rows: int):
+    warehouse_id, variant_ids = await seed(rows)
+    print(f"Database: {engine.url}")
+
+    async with AsyncSessionLocal() as session:
+        batch = BatchInventoryUpdate(
+            reason=StockMovementReason.MANUAL_EDIT,
+            updates=[InventoryUpdateItem(variant_id=vid, warehouse_id=warehouse_id, new_quantity=20) for vid in variant_ids]
+        )
+        print_report("batch_update_inventory", await batch_update_inventory(session, batch))
+
+    async with AsyncSessionLocal() as session:
+        st = await create_stock_taking(session, StockTakingCreate(warehouse_id=warehouse_id, name="Bench count", type="full"))
+        st_id = st.id
+
+    async with AsyncSessionLocal() as session:
+        # Every item counted at 15 (bulk, the per-item count endpoint isn't what's measured here)
+        await session.execute(update(StockTakingItem).where(StockTakingItem.stock_taking_id == st_id).values(counted_qty=15))
+        await session.commit()
+
+    async with AsyncSessionLocal() as session:
+        print_report("finalize_stock_taking", await finalize_stock_taking(session, st_id))
+
+    async with AsyncSessionLocal() as session:
+        total = (await session.execute(select(func.sum(InventoryItem.quantity)))).scalar()
+        moves = (await session.execute(select(func.count(StockMovement.id)))).scalar()
+    assert total == rows * 15, total
+    assert moves == rows * 2, moves
+    print("OK: quantities and movement log consistent")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
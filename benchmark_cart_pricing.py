@@ -0,0 +1,129 @@
+"""
+Benchmark: per-cart pricing cost.
+Prices CARTS carts of LINES lines each against a throwaway SQLite database
+(or BENCHMARK_DATABASE_URL if set) three ways:
+  per-line queries  how /api/orders/calculate used to work (one query per line,
+                    plus settings and shipping rule queries per cart)
+  one cart/call     pricing.price_carts with a single cart (one IN query,
+                    cached config)
+  batched           pricing.price_carts with BATCH carts per call
+
+Usage: python benchmark_cart_pricing.py [carts] [lines] [batch]
+"""
+import asyncio
+import random
+import sys
+import time
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import joinedload
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.sales import pricing
+from app.modules.settings.models import ShippingRule, ShippingConditionType, StoreSettings
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.inventory import models as inv_models
+from app.modules.auth import models as auth_models
+
+CATALOG_SIZE = 1000
+
+
+async def seed() -> list:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Product), [
+            {"id": f"bench-{i}", "name": f"Bench Product {i}", "slug": f"bench-product-{i}", "status": "Active", "weight": 0.5}
+            for i in range(CATALOG_SIZE)
+        ])
+        await session.execute(insert(ProductVariant), [
+            {"id": f"bench-variant-{i}", "product_id": f"bench-{i}", "sku": f"BENCH-{i:05d}", "price": 10.0 + i % 50}
+            for i in range(CATALOG_SIZE)
+        ])
+        session.add(StoreSettings())
+        session.add_all([
+            ShippingRule(name="Flat", cost=25.0),
+            ShippingRule(name="Free over 500", condition_type=ShippingConditionType.PRICE_BASED, condition_value=500, cost=0.0),
+        ])
+        await session.commit()
+    return [f"bench-variant-{i}" for i in range(CATALOG_SIZE)]
+
+
+async def legacy_price_cart(db, lines):
+    """The old calculate_order body: a joined query per line, settings and rules per cart."""
+    subtotal = 0.0
+    total_weight = 0.0
+    for variant_id, quantity in lines:
+        stmt = (
+            select(ProductVariant).join(Product).where(ProductVariant.id == variant_id)
+            .options(joinedload(ProductVariant.product))
+        )
+        variant = (await db.execute(stmt)).unique().scalar_one_or_none()
+        if not variant:
+            continue
+        subtotal += variant.price * quantity
+        if variant.product and variant.product.weight:
+            total_weight += variant.product.weight * quantity
+
+    settings = (await db.execute(select(StoreSettings).limit(1))).scalar_one_or_none()
+    rules = (await db.execute(select(ShippingRule).where(ShippingRule.is_active == True))).scalars().all()
+    costs = [rule.cost for rule in rules if rule.condition_type == ShippingConditionType.FIXED
+             or (rule.condition_type == ShippingConditionType.PRICE_BASED and subtotal >= rule.condition_value)]
+    shipping = min(costs) if costs else 50.0
+    taxable = subtotal + shipping
+    tax = taxable - taxable / (1 + settings.tax_rate) if settings.tax_inclusive else taxable * settings.tax_rate
+    return {"subtotal": subtotal, "shipping": shipping, "tax": round(tax, 2)}
+
+
+async def timed(label, carts_count, work):
+    async with AsyncSessionLocal() as session:
+        await work(session)  # warm-up (config cache, statement cache)
+        started = time.perf_counter()
+        await work(session)
+        elapsed = time.perf_counter() - started
+    print(f"{label:<18} {elapsed * 1e6 / carts_count:10.1f} us/cart   {carts_count / elapsed:10.0f} carts/s")
+
+
+async def run(carts_count: int, lines: int, batch: int):
+    variant_ids = await seed()
+    rng = random.Random(1)
+    carts = [[(rng.choice(variant_ids), rng.randint(1, 3)) for _ in range(lines)] for _ in range(carts_count)]
+    print(f"Database: {engine.url}; {carts_count} carts x {lines} lines, batches of {batch}")
+
+    async def per_line(session):
+        for cart in carts:
+            await legacy_price_cart(session, cart)
+
+    async def one_per_call(session):
+        for cart in carts:
+            await pricing.price_carts(session, [cart])
+
+    async def batched(session):
+        for start in range(0, len(carts), batch):
+            await pricing.price_carts(session, carts[start:start + batch])
+
+    await timed("per-line queries", carts_count, per_line)
+    await timed("one cart/call", carts_count, one_per_call)
+    await timed("batched", carts_count, batched)
+
+    # Same numbers either way
+    async with AsyncSessionLocal() as session:
+        for cart in carts[:20]:
+            old, new = await legacy_price_cart(session, cart), (await pricing.price_carts(session, [cart]))[0]
+            assert (old["subtotal"], old["shipping"], old["tax"]) == (new["subtotal"], new["shipping"], new["tax"])
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    ))
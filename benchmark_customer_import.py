@@ -0,0 +1,90 @@
+"""
+Benchmark: streaming customer CSV import job.
+Writes a customer CSV of ROWS rows (with ~1% invalid rows, ~1% emails repeated
+within the file and EXISTING customers already in the database whose contacts
+reappear in the file), then runs the customer_import job against a throwaway
+SQLite database (or BENCHMARK_DATABASE_URL if set) and reports rows/s and peak memory.
+
+Usage: python benchmark_customer_import.py [rows]
+"""
+import asyncio
+import csv
+import os
+import resource
+import sys
+import time
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from sqlalchemy import select, insert, func
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.modules.customers import customer_import
+from app.modules.customers.models import Customer
+from app.modules.jobs import runner
+from app.modules.jobs.models import Job
+from app.modules.catalog import models as catalog_models
+from app.modules.inventory import models as inv_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+from app.modules.sales import models as sales_models
+
+EXISTING = 10_000
+
+
+def build_csv(rows: int, path: str):
+    with open(path, "w", newline="", encoding="utf-8-sig") as out:
+        writer = csv.writer(out)
+        writer.writerow(["Name", "Email", "Mobile", "Country", "City", "Type", "Gender", "Channel"])
+        for i in range(rows):
+            email = f"Bench.{i}@Example.com"
+            if i % 100 == 3:
+                email = f"bench.{i - 1}@example.com"    # repeated earlier in the file
+            elif i % 100 == 5:
+                email = f"existing.{i % EXISTING}@example.com"   # already a customer
+            name = "X" if i % 100 == 7 else f"Bench Customer {i}"   # invalid
+            writer.writerow([name, email, f"05{i:08d}", "Saudi Arabia", "Riyadh", "individual", "", "Store"])
+
+
+async def run(rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Customer), [
+            {"name": f"Existing {i}", "email": f"existing.{i}@example.com", "mobile": f"06{i:08d}"}
+            for i in range(EXISTING)
+        ])
+        await session.commit()
+
+    job_id = runner.new_job_id()
+    os.makedirs(runner.job_directory(job_id), exist_ok=True)
+    upload = os.path.join(runner.job_directory(job_id), "upload.csv")
+    build_csv(rows, upload)
+    print(f"Database: {engine.url}  (CSV: {rows} rows, {os.path.getsize(upload) / 1e6:.1f} MB; "
+          f"chunk size {customer_import.CUSTOMER_IMPORT_CHUNK_SIZE})")
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        await runner.submit_job(session, "customer_import", {"upload": "upload.csv"}, job_id=job_id)
+    await asyncio.gather(*runner._tasks)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    async with AsyncSessionLocal() as session:
+        job = await session.get(Job, job_id)
+        customers = (await session.execute(select(func.count()).select_from(Customer))).scalar()
+
+    print(f"status: {job.status.value}  {job.error or ''}")
+    print(f"result: {job.result}")
+    print(f"total:  {elapsed:.2f}s  ({rows / elapsed:,.0f} rows/s)")
+    print(f"peak RSS: {rss_after / 1024:.0f} MB (before import: {rss_before / 1024:.0f} MB)")
+    print(f"in database: {customers} customers ({EXISTING} existed before)")
+
+    await runner.shutdown_jobs()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
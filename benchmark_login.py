@@ -0,0 +1,125 @@
+"""
+Benchmark: login throughput under concurrency.
+Fires LOGINS POST /token requests, CONCURRENCY at a time, at the app (in
+process, throwaway SQLite database) while a probe task measures how long the
+event loop is stalled. Runs twice: with the password check inline in the
+handler (how it used to be) and offloaded to the hashing thread pool.
+The last section logs in users whose hashes are still bcrypt, which are
+re-hashed to the current scheme on that first login.
+
+Usage: python benchmark_login.py [logins] [concurrency]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+import httpx
+from passlib.context import CryptContext
+from sqlalchemy import insert, select
+
+from app.core import security
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.main import app
+from app.modules.auth import routes as auth_routes
+from app.modules.auth.models import User, UserRole
+from app.modules.catalog import models as catalog_models
+from app.modules.customers import models as customers_models
+from app.modules.inventory import models as inv_models
+from app.modules.jobs import models as jobs_models
+from app.modules.marketing import models as mkt_models
+from app.modules.sales import models as sales_models
+from app.modules.settings import models as set_models
+
+USERS = 20
+PASSWORD = "shift-change-123"
+
+
+async def _inline_verify_and_update(plain_password, hashed_password):
+    # The old behaviour: hashing on the event loop thread
+    return security.pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def _loop_probe(stop: asyncio.Event, stalls: list):
+    """Records how late a 5 ms sleep wakes up: the time the loop was blocked."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        stalls.append(time.perf_counter() - started - 0.005)
+
+
+async def _login_burst(client: httpx.AsyncClient, usernames, logins: int, concurrency: int):
+    limiter = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def login(i):
+        async with limiter:
+            started = time.perf_counter()
+            response = await client.post("/token", data={"username": usernames[i % len(usernames)], "password": PASSWORD})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+    stop, stalls = asyncio.Event(), []
+    probe = asyncio.create_task(_loop_probe(stop, stalls))
+    started = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return elapsed, latencies, stalls
+
+
+def _report(label, logins, elapsed, latencies, stalls):
+    latencies.sort()
+    print(f"{label:<28} {logins / elapsed:7.1f} logins/s   "
+          f"p50 {statistics.median(latencies) * 1000:6.0f} ms   p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.0f} ms   "
+          f"max loop stall {max(stalls, default=0) * 1000:6.0f} ms")
+
+
+async def run(logins: int, concurrency: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    current_hash = security.get_password_hash(PASSWORD)
+    legacy_hash = CryptContext(schemes=["bcrypt"]).hash(PASSWORD)
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(User), [{
+            "username": f"cashier{i}", "email": f"cashier{i}@store.com", "password_hash": current_hash,
+            "role": UserRole.STAFF, "token_version": 1
+        } for i in range(USERS)] + [{
+            "username": f"legacy{i}", "email": f"legacy{i}@store.com", "password_hash": legacy_hash,
+            "role": UserRole.STAFF, "token_version": 1
+        } for i in range(USERS)])
+        await session.commit()
+
+    print(f"scheme {security.PASSWORD_HASH_SCHEME} (argon2 t={security.ARGON2_TIME_COST} "
+          f"m={security.ARGON2_MEMORY_COST}KiB p={security.ARGON2_PARALLELISM}), "
+          f"{security.PASSWORD_HASH_WORKERS} hashing threads, {os.cpu_count()} CPUs; "
+          f"{logins} logins, {concurrency} concurrent")
+
+    cashiers = [f"cashier{i}" for i in range(USERS)]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        offloaded = auth_routes.verify_and_update_password_async
+        auth_routes.verify_and_update_password_async = _inline_verify_and_update
+        _report("inline (blocks the loop)", logins, *await _login_burst(client, cashiers, logins, concurrency))
+        auth_routes.verify_and_update_password_async = offloaded
+        _report("thread pool", logins, *await _login_burst(client, cashiers, logins, concurrency))
+
+        legacy = [f"legacy{i}" for i in range(USERS)]
+        _report("bcrypt users (re-hashed)", USERS, *await _login_burst(client, legacy, USERS, concurrency))
+
+    async with AsyncSessionLocal() as session:
+        hashes = (await session.execute(select(User.password_hash).where(User.username.like("legacy%")))).scalars().all()
+    print(f"legacy users now on argon2: {sum(h.startswith('$argon2') for h in hashes)}/{len(hashes)}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    ))
@@ -0,0 +1,77 @@
+"""
+Benchmark: order placement latency by basket size.
+Runs OrderPlacementService.place_order against a throwaway SQLite database
+(or BENCHMARK_DATABASE_URL if set) for 1, 10 and 100-line baskets.
+
+Usage: python benchmark_order_creation.py [repeats]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.core.schemas import OrderCreate, OrderItemSchema
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.inventory.models import Warehouse, InventoryItem
+from app.modules.sales.order_service import OrderPlacementService
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+BASKET_SIZES = [1, 10, 100]
+CATALOG_SIZE = 200
+
+
+async def seed() -> list:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as session:
+        wh = Warehouse(name="Bench WH", priority_index=0)
+        session.add(wh)
+        await session.flush()
+
+        variant_ids = []
+        for i in range(CATALOG_SIZE):
+            product = Product(name=f"Bench Product {i}", slug=f"bench-product-{i}", status="Active", weight=0.5)
+            session.add(product)
+            await session.flush()
+            variant = ProductVariant(product_id=product.id, sku=f"BENCH-{i:05d}", price=10.0)
+            session.add(variant)
+            await session.flush()
+            session.add(InventoryItem(variant_id=variant.id, warehouse_id=wh.id, quantity=1_000_000))
+            variant_ids.append(variant.id)
+
+        await session.commit()
+        return variant_ids
+
+
+async def run(repeats: int):
+    variant_ids = await seed()
+    print(f"Database: {engine.url}")
+    print(f"{'lines':>6} {'median ms':>10} {'p95 ms':>10} {'ms/line':>10}")
+
+    for size in BASKET_SIZES:
+        order = OrderCreate(items=[OrderItemSchema(variant_id=vid, quantity=1) for vid in variant_ids[:size]])
+        timings = []
+        for _ in range(repeats):
+            async with AsyncSessionLocal() as session:
+                started = time.perf_counter()
+                await OrderPlacementService.place_order(session, order, changed_by="benchmark")
+                timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        median = statistics.median(timings)
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{size:>6} {median:>10.2f} {p95:>10.2f} {median / size:>10.3f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20))
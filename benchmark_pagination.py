@@ -0,0 +1,121 @@
+"""
+Benchmark: offset vs keyset pagination and count modes on large lists.
+Seeds ROWS orders and ROWS stock movements into a throwaway SQLite database
+(or BENCHMARK_DATABASE_URL if set), then times /api/orders_list and /api/movements at
+page 1 and at a deep page (10,000 by default), reached by OFFSET and by
+cursor, plus the order total with count=exact / estimate / none.
+
+Usage: python benchmark_pagination.py [rows] [deep_page] [repeats]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from sqlalchemy import insert
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.customers.models import Customer
+from app.modules.inventory.models import Warehouse, StockMovement, StockMovementReason
+from app.modules.inventory.service import get_stock_movements
+from app.modules.sales.models import Order, OrderStatus
+from app.modules.sales.routes import list_orders
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+SEED_CHUNK = 10000
+PAGE_SIZE = 20
+
+
+async def seed(rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    started = datetime(2024, 1, 1)
+    async with AsyncSessionLocal() as session:
+        customer_ids = (await session.execute(
+            insert(Customer).returning(Customer.id), [{"name": f"Customer {i}"} for i in range(1000)]
+        )).scalars().all()
+        warehouse = Warehouse(name="Bench WH", priority_index=0)
+        product = Product(id="p-bench", name="Bench Product", slug="bench-product", status="Active")
+        session.add_all([warehouse, product])
+        await session.flush()
+        session.add(ProductVariant(id="v-bench", product_id=product.id, sku="BENCH-1", price=1.0))
+        await session.flush()
+
+        for start in range(0, rows, SEED_CHUNK):
+            batch = range(start, min(start + SEED_CHUNK, rows))
+            await session.execute(insert(Order), [{
+                "customer_id": customer_ids[i % len(customer_ids)], "status": OrderStatus.NEW,
+                "payment_status": "paid", "payment_method": "cash", "total_amount": float(i % 500),
+                "created_at": started + timedelta(seconds=i)
+            } for i in batch])
+            await session.execute(insert(StockMovement), [{
+                "variant_id": "v-bench", "warehouse_id": warehouse.id, "qty_change": 1,
+                "reason": StockMovementReason.MANUAL_EDIT, "created_at": started + timedelta(seconds=i)
+            } for i in batch])
+        await session.commit()
+
+
+async def timed(label: str, repeats: int, call):
+    timings = []
+    for _ in range(repeats):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            await call(session)
+            timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<44} {statistics.median(timings):>10.2f} ms")
+
+
+def orders(**params):
+    async def call(session):
+        return await list_orders(db=session, current_user=None, **{
+            "page": 1, "limit": PAGE_SIZE, "status": "all", "payment_status": "all", "date_from": None,
+            "date_to": None, "search": None, "sort": "newest", "cursor": None, "count": "none", **params
+        })
+    return call
+
+
+def movements(offset=0, cursor=None):
+    async def call(session):
+        return await get_stock_movements(session, PAGE_SIZE, offset, cursor)
+    return call
+
+
+async def run(rows: int, deep_page: int, repeats: int):
+    t0 = time.perf_counter()
+    await seed(rows)
+    print(f"Database: {engine.url}  ({rows} orders + {rows} movements seeded in {time.perf_counter() - t0:.1f}s)")
+    deep_page = min(deep_page, rows // PAGE_SIZE)
+    print(f"{'case':<44} {'median':>13}")
+
+    # Cursors that point just before the deep page (taken once, not timed)
+    async with AsyncSessionLocal() as session:
+        order_cursor = (await orders(page=deep_page - 1)(session))["meta"]["next_cursor"]
+        _, movement_cursor = await movements(offset=(deep_page - 2) * PAGE_SIZE)(session)
+
+    await timed("orders, page 1", repeats, orders())
+    await timed(f"orders, page {deep_page} (offset)", repeats, orders(page=deep_page))
+    await timed(f"orders, page {deep_page} (cursor)", repeats, orders(cursor=order_cursor))
+    await timed("orders, page 1 + count=exact", repeats, orders(count="exact"))
+    await timed("orders, page 1 + count=estimate (cached)", repeats, orders(count="estimate"))
+
+    await timed("movements, page 1", repeats, movements())
+    await timed(f"movements, page {deep_page} (offset)", repeats, movements(offset=(deep_page - 1) * PAGE_SIZE))
+    await timed(f"movements, page {deep_page} (cursor)", repeats, movements(cursor=movement_cursor))
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(run(
+        args[0] if args else 250_000,
+        args[1] if len(args) > 1 else 10_000,
+        args[2] if len(args) > 2 else 5
+    ))
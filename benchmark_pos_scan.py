@@ -0,0 +1,108 @@
+"""
+Benchmark: POS scan lookup (GET /api/pos/scan/{code}) latency.
+Seeds VARIANTS variants with barcodes into a throwaway SQLite database
+(or BENCHMARK_DATABASE_URL if set), then times lookups by barcode and by SKU with
+a cold cache (database round trip) and a warm cache (LRU hit), plus the
+old fuzzy /api/pos/products search for the same barcode.
+
+Usage: python benchmark_pos_scan.py [variants] [scans]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from sqlalchemy import insert, select, or_
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.catalog.scan_cache import lookup_scan_code, clear_scan_cache, scan_cache_stats
+from app.modules.inventory import models as inventory_models
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+SEED_CHUNK = 5000
+
+
+async def seed(count: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as session:
+        for start in range(0, count, SEED_CHUNK):
+            products, variants = [], []
+            for i in range(start, min(start + SEED_CHUNK, count)):
+                products.append({"id": f"p-{i:08d}", "name": f"Bench Product {i}", "slug": f"bench-product-{i}", "status": "Active"})
+                variants.append({
+                    "id": f"v-{i:08d}", "product_id": f"p-{i:08d}", "sku": f"BENCH-{i:08d}",
+                    "barcode": f"{6280000000000 + i}", "price": 10.0, "quantity": 50
+                })
+            await session.execute(insert(Product), products)
+            await session.execute(insert(ProductVariant), variants)
+        await session.commit()
+
+
+def summarize(label: str, timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{label:<30} median={statistics.median(timings) * 1000:>9.1f} us   p99={p99 * 1000:>9.1f} us")
+
+
+async def time_scans(label: str, codes, cold: bool):
+    timings = []
+    async with AsyncSessionLocal() as session:
+        for code in codes:
+            if cold:
+                clear_scan_cache()
+            started = time.perf_counter()
+            entry = await lookup_scan_code(session, code)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert entry is not None, code
+    summarize(label, timings)
+
+
+async def time_fuzzy(codes):
+    """What the till did before: ILIKE over name and SKU for the scanned code."""
+    timings = []
+    async with AsyncSessionLocal() as session:
+        for code in codes:
+            started = time.perf_counter()
+            await session.execute(
+                select(ProductVariant.id).join(Product)
+                .where(or_(Product.name.ilike(f"%{code}%"), ProductVariant.sku.ilike(f"%{code}%"), ProductVariant.barcode.ilike(f"%{code}%")))
+            )
+            timings.append((time.perf_counter() - started) * 1000)
+    summarize("fuzzy ILIKE search", timings)
+
+
+async def run(count: int, scans: int):
+    await seed(count)
+    print(f"Database: {engine.url}  ({count} variants)")
+
+    rng = random.Random(7)
+    picks = [rng.randrange(count) for _ in range(scans)]
+    barcodes = [f"{6280000000000 + i}" for i in picks]
+    skus = [f"BENCH-{i:08d}" for i in picks]
+
+    await time_scans("barcode, cold cache", barcodes, cold=True)
+    await time_scans("sku, cold cache", skus, cold=True)
+
+    # Warm: a small basket of hot items scanned over and over
+    hot = barcodes[:50]
+    await time_scans("barcode, warm cache", [hot[i % len(hot)] for i in range(scans)], cold=False)
+    print(f"cache: {scan_cache_stats()}")
+
+    await time_fuzzy(barcodes[:min(scans, 50)])
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(run(args[0] if args else 100_000, args[1] if len(args) > 1 else 1000))
@@ -0,0 +1,106 @@
+"""
+Benchmark: product list (GET /catalog/api/products) on a large catalog.
+Seeds PRODUCTS products with one variant each (about 10% out of stock,
+10% low) into a throwaway SQLite database (or BENCHMARK_DATABASE_URL if set), then
+times first pages, deep offset vs keyset pages, stock filters and stock sorts.
+
+Usage: python benchmark_product_list.py [products] [repeats]
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+import benchmark_env  # noqa: F401  (isolated database; must precede app imports)
+
+from sqlalchemy import insert
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.catalog.routes import list_products
+from app.modules.inventory import models as inventory_models
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+SEED_CHUNK = 5000
+PAGE_SIZE = 20
+
+
+async def seed(count: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    rng = random.Random(42)
+    started = datetime(2025, 1, 1)
+    async with AsyncSessionLocal() as session:
+        for start in range(0, count, SEED_CHUNK):
+            products, variants = [], []
+            for i in range(start, min(start + SEED_CHUNK, count)):
+                product_id = f"p-{i:08d}"
+                products.append({
+                    "id": product_id, "name": f"Bench Product {i}", "slug": f"bench-product-{i}",
+                    "status": "Active", "product_type": "Physical",
+                    "created_at": started + timedelta(minutes=i), "updated_at": started
+                })
+                roll = rng.random()
+                quantity = 0 if roll < 0.1 else rng.randint(1, 4) if roll < 0.2 else rng.randint(5, 500)
+                variants.append({
+                    "id": f"v-{i:08d}", "product_id": product_id, "sku": f"BENCH-{i:08d}",
+                    "price": 10.0, "quantity": quantity
+                })
+            await session.execute(insert(Product), products)
+            await session.execute(insert(ProductVariant), variants)
+        await session.commit()
+
+
+async def timed(label: str, repeats: int, **params):
+    timings = []
+    response = None
+    for _ in range(repeats):
+        async with AsyncSessionLocal() as session:
+            started = time.perf_counter()
+            response = await list_products(db=session, **{
+                "page": 1, "page_size": PAGE_SIZE, "search": None, "category_id": None,
+                "product_type": None, "status": None, "stock_status": None,
+                "sort": "newest", "cursor": None, **params
+            })
+            timings.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<34} {statistics.median(timings):>10.2f} ms   total={response.total:<8} items={len(response.items)}")
+    return response
+
+
+async def run(count: int, repeats: int):
+    t0 = time.perf_counter()
+    await seed(count)
+    print(f"Database: {engine.url}  ({count} products seeded in {time.perf_counter() - t0:.1f}s)")
+    print(f"{'case':<34} {'median':>13}")
+
+    await timed("newest, page 1", repeats)
+    deep_page = max(1, count // PAGE_SIZE - 1)
+    await timed(f"newest, page {deep_page} (offset)", repeats, page=deep_page)
+
+    # Walk to the same depth with keyset cursors, then time one keyset page there
+    async with AsyncSessionLocal() as session:
+        response = await list_products(
+            db=session, page=deep_page - 1, page_size=PAGE_SIZE, search=None, category_id=None,
+            product_type=None, status=None, stock_status=None, sort="newest", cursor=None
+        )
+    await timed(f"newest, page {deep_page} (cursor)", repeats, cursor=response.next_cursor)
+
+    await timed("stock_status=out, page 1", repeats, stock_status="out")
+    await timed("stock_status=low, page 1", repeats, stock_status="low")
+    await timed("stock_status=in, page 1", repeats, stock_status="in")
+    await timed("sort=stock_asc, page 1", repeats, sort="stock_asc")
+    await timed("sort=stock_desc, page 1", repeats, sort="stock_desc")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    asyncio.run(run(args[0] if args else 100_000, args[1] if len(args) > 1 else 5))
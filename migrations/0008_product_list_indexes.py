@@ -0,0 +1,24 @@
+"""Add keyset pagination index for the product list
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Newest-first listing pages by (created_at, id)
+    op.create_index('ix_products_created_at_id', 'products', ['created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_products_created_at_id', table_name='products')
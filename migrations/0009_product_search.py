@@ -0,0 +1,44 @@
+"""Add product search documents and full-text indexes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'product_search_documents',
+        sa.Column('product_id', sa.String(36), sa.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('document', sa.Text(), nullable=False, server_default=''),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_product_search_documents_tsv "
+            "ON product_search_documents USING gin (to_tsvector('simple', document))"
+        )
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX ix_product_search_documents_trgm "
+            "ON product_search_documents USING gin (document gin_trgm_ops)"
+        )
+    # Documents (and the SQLite FTS5 mirror) are built on the next startup,
+    # or with: python rebuild_search_index.py
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_product_search_documents_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_product_search_documents_tsv")
+    op.drop_table('product_search_documents')
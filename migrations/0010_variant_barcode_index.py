@@ -0,0 +1,24 @@
+"""Index product variant barcodes for POS scanning
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Exact-match lookup behind GET /api/pos/scan/{code}
+    op.create_index('ix_product_variants_barcode', 'product_variants', ['barcode'])
+
+
+def downgrade():
+    op.drop_index('ix_product_variants_barcode', table_name='product_variants')
@@ -0,0 +1,28 @@
+"""Add change-tracking indexes for the POS catalog snapshot
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Catalog version (max) and "changed since" deltas
+    op.create_index('ix_products_updated_at', 'products', ['updated_at'])
+    op.create_index('ix_product_variants_updated_at', 'product_variants', ['updated_at'])
+    op.create_index('ix_product_images_created_at', 'product_images', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_product_images_created_at', table_name='product_images')
+    op.drop_index('ix_product_variants_updated_at', table_name='product_variants')
+    op.drop_index('ix_products_updated_at', table_name='products')
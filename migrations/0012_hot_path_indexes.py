@@ -0,0 +1,44 @@
+"""Add indexes for order, stock movement and inventory access paths
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Order list: sorts (keyset on sort key + id) and status filters
+    ('ix_orders_created_at_id', 'orders', ['created_at', 'id']),
+    ('ix_orders_total_amount_id', 'orders', ['total_amount', 'id']),
+    ('ix_orders_status_created_at', 'orders', ['status', 'created_at', 'id']),
+    ('ix_orders_payment_status_created_at', 'orders', ['payment_status', 'created_at', 'id']),
+    # Customer order history and stats
+    ('ix_orders_customer_id_created_at', 'orders', ['customer_id', 'created_at']),
+    # Order items loaded per page of orders
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    # Movement log, per-variant history, per-warehouse, order allocation lookups
+    ('ix_stock_movements_created_at_id', 'stock_movements', ['created_at', 'id']),
+    ('ix_stock_movements_variant_id_created_at', 'stock_movements', ['variant_id', 'created_at']),
+    ('ix_stock_movements_warehouse_id', 'stock_movements', ['warehouse_id']),
+    ('ix_stock_movements_related_id', 'stock_movements', ['related_id']),
+    # Per-warehouse stock reads (the unique constraint leads with variant_id)
+    ('ix_inventory_items_warehouse_id', 'inventory_items', ['warehouse_id', 'variant_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,50 @@
+"""Add jobs table for background exports
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+JOB_STATUSES = ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED')
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('kind', sa.String(50), nullable=False),
+        sa.Column('status', sa.Enum(*JOB_STATUSES, name='jobstatus'), nullable=False),
+        sa.Column('params', sa.JSON(), nullable=False),
+        sa.Column('rows_done', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('rows_total', sa.Integer(), nullable=True),
+        sa.Column('checkpoint', sa.JSON(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('artifact_path', sa.String(500), nullable=True),
+        sa.Column('artifact_name', sa.String(255), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    # Startup recovery scans by status/heartbeat; the job list is per user, newest first
+    op.create_index('ix_jobs_status_heartbeat_at', 'jobs', ['status', 'heartbeat_at'])
+    op.create_index('ix_jobs_created_by_created_at', 'jobs', ['created_by', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_created_by_created_at', table_name='jobs')
+    op.drop_index('ix_jobs_status_heartbeat_at', table_name='jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
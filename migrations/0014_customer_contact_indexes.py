@@ -0,0 +1,25 @@
+"""Index customer email (case-insensitive) and mobile for import dedupe
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_customers_email_lower', 'customers', [sa.text('lower(email)')])
+    op.create_index('ix_customers_mobile', 'customers', ['mobile'])
+
+
+def downgrade():
+    op.drop_index('ix_customers_mobile', table_name='customers')
+    op.drop_index('ix_customers_email_lower', table_name='customers')
@@ -0,0 +1,28 @@
+"""Add segment_members table (materialized customer group membership)
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'segment_members',
+        sa.Column('group_id', sa.Integer(), sa.ForeignKey('customer_groups.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('customer_id', sa.Integer(), sa.ForeignKey('customers.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('added_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('segment_members')
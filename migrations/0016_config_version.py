@@ -0,0 +1,30 @@
+"""Add config_versions table (cross-worker version of the cached checkout configuration)
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    config_versions = op.create_table(
+        'config_versions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.bulk_insert(config_versions, [{'id': 1, 'version': 0}])
+
+
+def downgrade():
+    op.drop_table('config_versions')
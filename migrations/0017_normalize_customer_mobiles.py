@@ -0,0 +1,35 @@
+"""Normalize stored customer mobiles (no spaces, dashes, dots or brackets)
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+# Same characters as app.modules.customers.schemas.MOBILE_NOISE
+MOBILE_NOISE = (' ', '\t', '\n', '\r', '-', '(', ')', '.')
+
+
+def upgrade():
+    normalized = sa.column('mobile')
+    for char in MOBILE_NOISE:
+        normalized = sa.func.replace(normalized, char, '')
+    customers = sa.table('customers', sa.column('mobile'))
+    op.execute(
+        customers.update()
+        .where(customers.c.mobile.isnot(None))
+        .values(mobile=sa.func.nullif(normalized, ''))
+    )
+
+
+def downgrade():
+    # The original formatting isn't kept
+    pass
@@ -0,0 +1,32 @@
+"""Add catalog_deletions table (tombstones for POS catalog deltas)
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'catalog_deletions',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('entity', sa.String(20), nullable=False),
+        sa.Column('entity_id', sa.String(36), nullable=False),
+        sa.Column('product_id', sa.String(36), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_catalog_deletions_deleted_at', 'catalog_deletions', ['deleted_at'])
+
+
+def downgrade():
+    op.drop_index('ix_catalog_deletions_deleted_at', table_name='catalog_deletions')
+    op.drop_table('catalog_deletions')
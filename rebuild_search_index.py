@@ -0,0 +1,26 @@
+"""
+Rebuilds the product search index (documents + full-text index) from the
+catalog. Needed only after bulk writes that bypass the catalog API.
+
+Usage: python rebuild_search_index.py
+"""
+import asyncio
+from app.core.database import AsyncSessionLocal, engine
+from app.modules.catalog.search import ensure_search_index, rebuild_search_index
+# Import all models to ensure relationships resolve
+from app.modules.inventory import models as inventory_models
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+async def rebuild():
+    async with engine.begin() as conn:
+        await ensure_search_index(conn)
+    async with AsyncSessionLocal() as session:
+        indexed = await rebuild_search_index(session)
+    print(f"Search index rebuilt: {indexed} product(s) indexed.")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
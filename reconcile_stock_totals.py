@@ -0,0 +1,24 @@
+"""
+Rebuilds ProductVariant.quantity (the maintained per-variant stock total)
+from inventory_items. Run once after upgrading, and periodically (e.g. cron)
+as a safety net for writes made outside the inventory service.
+
+Usage: python reconcile_stock_totals.py
+"""
+import asyncio
+from app.core.database import AsyncSessionLocal
+from app.modules.inventory.service import reconcile_variant_stock_totals
+# Import all models to ensure relationships resolve
+from app.modules.sales import models as sales_models
+from app.modules.customers import models as customers_models
+from app.modules.marketing import models as mkt_models
+from app.modules.settings import models as set_models
+from app.modules.auth import models as auth_models
+
+async def reconcile():
+    async with AsyncSessionLocal() as session:
+        fixed = await reconcile_variant_stock_totals(session)
+    print(f"Stock totals reconciled: {fixed} variant(s) corrected.")
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())
@@ -283,14 +283,10 @@ async function loadCitiesForFilter(country) {
 }
 
 // Export/Import
-async function exportCustomers() {
-    try {
-        window.location.href = '/api/customers/export';
-        if (window.notifier) notifier.showToast('جاري التصدير...', 'info');
-    } catch (error) {
-        console.error('Error exporting:', error);
-        if (window.notifier) notifier.showToast('فشل التصدير', 'error');
-    }
+async function exportCustomers(e) {
+    if (e) e.preventDefault();
+    // Background job: the file downloads once it is ready
+    await window.ExportJobs.run('customers', 'csv');
 }
 
 async function importCustomers(e) {
@@ -303,18 +299,23 @@ async function importCustomers(e) {
     try {
         const response = await fetch('/api/customers/import', {
             method: 'POST',
+            headers: window.ExportJobs.authHeaders(),
             body: formData
         });
-
-        if (response.ok) {
-            if (window.notifier) notifier.showToast('تم الاستيراد بنجاح', 'success');
-            loadCustomers();
-        } else {
-            throw new Error('Import failed');
-        }
+        const started = await response.json();
+        if (!response.ok) throw new Error(started.detail || 'Import failed');
+
+        // Runs as a background job; its download is the per-row error report
+        if (window.notifier) notifier.showToast('جاري استيراد العملاء...', 'info');
+        const job = await window.ExportJobs.poll(started.job_id);
+        if (window.notifier) notifier.showToast(job.result?.message || 'تم الاستيراد بنجاح', job.result?.skipped ? 'warning' : 'success');
+        if (job.result?.skipped) window.ExportJobs.download(job.id);
+        loadCustomers();
     } catch (error) {
         console.error('Error importing:', error);
-        if (window.notifier) notifier.showToast('فشل الاستيراد', 'error');
+        if (window.notifier) notifier.showToast('فشل الاستيراد: ' + error.message, 'error');
+    } finally {
+        e.target.value = '';
     }
 }
 
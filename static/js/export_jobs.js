@@ -0,0 +1,63 @@
+/**
+ * Background Jobs (exports, imports)
+ * Submits an export to /api/jobs/exports, polls its progress and downloads
+ * the file when it is ready, so large exports never tie up a request.
+ * poll() is shared with other jobs (product import).
+ */
+const ExportJobs = {
+    POLL_MS: 1500,
+
+    authHeaders() {
+        const token = localStorage.getItem('access_token');
+        return token ? { 'Authorization': `Bearer ${token}` } : {};
+    },
+
+    toast(message, type = 'info') {
+        if (window.notifier) window.notifier.showToast(message, type);
+    },
+
+    /**
+     * @param {string} source - 'orders' | 'products' | 'customers'
+     * @param {string} format - 'xlsx' | 'csv'
+     * @param {object} filters - source filters (order list filters, product ids)
+     */
+    async run(source, format = 'xlsx', filters = {}) {
+        try {
+            const res = await fetch('/api/jobs/exports', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json', ...this.authHeaders() },
+                body: JSON.stringify({ source, format, filters })
+            });
+            const job = await res.json();
+            if (!res.ok) throw new Error(job.detail || res.statusText);
+
+            this.toast('جاري تجهيز ملف التصدير...', 'info');
+            const done = await this.poll(job.id);
+            this.download(done.id);
+            this.toast(`تم تصدير ${done.rows_done} صف`, 'success');
+        } catch (error) {
+            console.error('Export failed:', error);
+            this.toast('فشل التصدير: ' + error.message, 'error');
+        }
+    },
+
+    /** Resolves with the job once completed; rejects if it failed or was cancelled. */
+    async poll(jobId) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, this.POLL_MS));
+            const res = await fetch(`/api/jobs/${jobId}`, { headers: this.authHeaders() });
+            const job = await res.json();
+            if (!res.ok) throw new Error(job.detail || res.statusText);
+
+            if (job.status === 'completed') return job;
+            if (job.status === 'failed') throw new Error(job.error || 'failed');
+            if (job.status === 'cancelled') throw new Error('cancelled');
+        }
+    },
+
+    download(jobId) {
+        window.location.href = `/api/jobs/${jobId}/download`;
+    }
+};
+
+window.ExportJobs = ExportJobs;
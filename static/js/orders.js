@@ -32,6 +32,15 @@ const OrdersManager = {
                 document.querySelectorAll('.dropdown-menu').forEach(el => el.classList.remove('show'));
             }
         });
+
+        // Exports run as background jobs; the links stay as a direct-download fallback
+        [['exportExcelLink', 'xlsx'], ['exportCsvLink', 'csv']].forEach(([id, format]) => {
+            document.getElementById(id)?.addEventListener('click', (e) => {
+                if (!window.ExportJobs) return;
+                e.preventDefault();
+                window.ExportJobs.run('orders', format, this.exportFilters || {});
+            });
+        });
     },
 
     async loadOrders(overrides = {}) {
@@ -61,6 +70,16 @@ const OrdersManager = {
                 if (!value) params.delete(key);
             }
 
+            // Exports use the same filters as the list
+            const exportParams = new URLSearchParams(params);
+            exportParams.delete('page');
+            exportParams.delete('limit');
+            document.getElementById('exportExcelLink').href = `${API_BASE}/orders/export/excel?${exportParams.toString()}`;
+            document.getElementById('exportCsvLink').href = `${API_BASE}/orders/export/csv?${exportParams.toString()}`;
+            this.exportFilters = Object.fromEntries(
+                [...exportParams.entries()].filter(([key]) => ['status', 'payment_status', 'date_from', 'date_to', 'search'].includes(key))
+            );
+
             const res = await axios.get(`${API_BASE}/orders_list?${params.toString()}`, {
                 headers: { 'Authorization': `Bearer ${localStorage.getItem('access_token')}` }
             });
@@ -316,13 +316,9 @@ const ProductsManager = {
     },
 
     async bulkExport() {
-        if (this.state.selectedIds.length > 0) {
-            const ids = this.state.selectedIds.join(',');
-            window.location.href = `/catalog/api/products/export?ids=${ids}`;
-        } else {
-            // Full export
-            window.location.href = '/catalog/api/products/export';
-        }
+        // Runs as a background job (All or Selected)
+        const filters = this.state.selectedIds.length > 0 ? { ids: this.state.selectedIds } : {};
+        await window.ExportJobs.run('products', 'xlsx', filters);
     },
 
     async bulkDelete() {
@@ -395,7 +391,11 @@ const ProductsManager = {
             const response = await axios.post(`${API_BASE}/products/import`, formData, {
                 headers: { 'Content-Type': 'multipart/form-data' }
             });
-            window.notifier.showToast(response.data.message || 'تم الاستيراد بنجاح', 'success');
+            // Runs as a background job; its download is the per-row error report
+            window.notifier.showToast('جاري الاستيراد...', 'info');
+            const job = await window.ExportJobs.poll(response.data.job_id);
+            window.notifier.showToast(job.result?.message || 'تم الاستيراد بنجاح', job.result?.errors ? 'warning' : 'success');
+            if (job.result?.errors) window.ExportJobs.download(job.id);
             this.loadProducts();
         } catch (error) {
             window.notifier.showToast('فشل الاستيراد: ' + (error.response?.data?.detail || error.message), 'error');
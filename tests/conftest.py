@@ -0,0 +1,140 @@
+"""
+Shared test setup.
+
+Tests create and drop tables, so they never touch the database in
+DATABASE_URL (render.yaml points it at production). Each session gets a
+fresh SQLite file, or the database named by TEST_DATABASE_URL when set
+(e.g. a throwaway Postgres to check query plans there). DATABASE_URL is set
+here, before any app module is imported, because the engine is created at
+import time.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+if "app.core.database" in sys.modules:
+    raise RuntimeError("app.core.database was imported before tests/conftest.py could isolate the test database")
+
+_TMP_DIR = tempfile.mkdtemp(prefix="store-tests-")
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+else:
+    _fd, _db_path = tempfile.mkstemp(suffix=".db", dir=_TMP_DIR)
+    os.close(_fd)
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+os.environ["JOB_DIR"] = os.path.join(_TMP_DIR, "jobs")
+
+import pytest
+from sqlalchemy import event, select
+from fastapi.testclient import TestClient
+
+from app.core.database import engine, Base, AsyncSessionLocal
+
+# Dedicated login for API tests (created in the test database by `client`)
+TEST_USERNAME = "pytest-admin"
+TEST_PASSWORD = "pytest-secret-123"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP_DIR, ignore_errors=True)
+
+
+def _import_models():
+    # Base only knows the tables of imported model modules
+    from app.modules.auth import models as auth_models
+    from app.modules.catalog import models as catalog_models
+    from app.modules.customers import models as customers_models
+    from app.modules.inventory import models as inv_models
+    from app.modules.jobs import models as jobs_models
+    from app.modules.marketing import models as mkt_models
+    from app.modules.sales import models as sales_models
+    from app.modules.settings import models as set_models
+
+
+@pytest.fixture(scope="session")
+def reset_database():
+    """`await reset_database()` drops and recreates every table of the test database."""
+    _import_models()
+
+    async def reset():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    return reset
+
+
+@pytest.fixture
+def record_queries():
+    """`record_queries("FROM users", ...)` -> list collecting every statement containing one of the fragments."""
+    listeners = []
+
+    def start(*fragments):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if any(fragment in statement for fragment in fragments):
+                statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        listeners.append(record)
+        return statements
+
+    yield start
+    for record in listeners:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def _reset_test_user():
+    from app.core.security import get_password_hash
+    from app.modules.auth.models import User, UserRole
+    from app.modules.auth.user_cache import invalidate_user
+
+    async with AsyncSessionLocal() as session:
+        user = (await session.execute(select(User).where(User.username == TEST_USERNAME))).scalar_one_or_none()
+        if user is None:
+            user = User(username=TEST_USERNAME, email=f"{TEST_USERNAME}@example.com", role=UserRole.ADMIN)
+            session.add(user)
+        user.password_hash = get_password_hash(TEST_PASSWORD)
+        user.is_active = True
+        user.token_version = 1
+        user.full_name = None
+        await session.commit()
+    invalidate_user(TEST_USERNAME)
+
+
+@pytest.fixture
+def client():
+    """TestClient with the app started, fresh caches and the test user reset to TEST_PASSWORD."""
+    from app.main import app
+    from app.modules.auth.user_cache import clear_user_cache
+    from app.modules.settings.config_cache import invalidate_config
+
+    clear_user_cache()
+    invalidate_config()
+    with TestClient(app) as client:
+        client.portal.call(_reset_test_user)
+        yield client
+
+
+@pytest.fixture
+def api_user(client):
+    """Credentials of the test user (reset by `client` for every test)."""
+    return SimpleNamespace(username=TEST_USERNAME, password=TEST_PASSWORD)
+
+
+@pytest.fixture
+def login(client, api_user):
+    """`login(password=None)` -> access token of the test user (the session cookie is set too)."""
+
+    def log_in(password=None):
+        response = client.post("/token", data={"username": api_user.username, "password": password or api_user.password})
+        assert response.status_code == 200, response.text
+        return response.json()["access_token"]
+
+    return log_in
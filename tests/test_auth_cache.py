@@ -0,0 +1,96 @@
+"""
+Current-user cache tests: repeated authenticated requests don't query users,
+routes can still modify the cached user, logout-all and password changes
+revoke old tokens at once, claims-only endpoints skip the database, and
+deactivating or deleting a team member revokes their tokens.
+
+Run: python -m pytest -q tests/test_auth_cache.py
+"""
+from app import dependencies
+
+
+def _auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_repeated_requests_use_cached_user(client, login, record_queries):
+    token = login()
+    client.cookies.clear()
+    user_queries = record_queries("FROM users")
+
+    for _ in range(5):
+        assert client.get("/api/system/db-pool", headers=_auth(token)).status_code == 200
+    assert len(user_queries) == 1
+
+    # The cached user is attached to the request's session: updates still persist
+    response = client.put("/account/profile", json={"full_name": "Cached Admin"}, headers=_auth(token))
+    assert response.status_code == 200 and response.json()["full_name"] == "Cached Admin"
+    response = client.put("/account/profile", json={"full_name": "Test Admin"}, headers=_auth(token))
+    assert response.json()["full_name"] == "Test Admin"
+
+
+def test_logout_all_revokes_cached_tokens(client, login):
+    token = login()
+    client.cookies.clear()
+    assert client.get("/api/system/db-pool", headers=_auth(token)).status_code == 200
+
+    assert client.post("/api/account/logout-all", headers=_auth(token)).status_code == 200
+    assert client.get("/api/system/db-pool", headers=_auth(token)).status_code == 401
+    assert client.get("/api/system/db-pool", headers=_auth(login())).status_code == 200
+
+
+def test_password_change_revokes_old_tokens_and_issues_a_new_one(client, login, api_user):
+    old_token = login()
+    client.cookies.clear()
+    assert client.get("/api/system/db-pool", headers=_auth(old_token)).status_code == 200
+
+    response = client.post("/account/password", headers=_auth(old_token), json={
+        "current_password": api_user.password, "new_password": "changed123", "confirm_password": "changed123"
+    })
+    assert response.status_code == 200, response.text
+    new_token = response.json()["access_token"]
+    client.cookies.clear()
+    assert client.get("/api/system/db-pool", headers=_auth(old_token)).status_code == 401
+    assert client.get("/api/system/db-pool", headers=_auth(new_token)).status_code == 200
+
+    assert login("changed123")
+
+
+def test_claims_only_endpoints_skip_the_database(client, login, record_queries, monkeypatch):
+    monkeypatch.setattr(dependencies, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    token = login()
+    client.cookies.clear()
+    user_queries = record_queries("FROM users")
+
+    for _ in range(3):
+        assert client.get("/api/jobs", headers=_auth(token)).status_code == 200
+    assert user_queries == []
+
+    # Revocation seen by this process still applies
+    assert client.post("/api/account/logout-all", headers=_auth(token)).status_code == 200
+    assert client.get("/api/jobs", headers=_auth(token)).status_code == 401
+
+
+def test_deactivated_and_deleted_members_tokens_are_revoked(client, login, monkeypatch):
+    monkeypatch.setattr(dependencies, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    admin = _auth(login())
+    client.cookies.clear()
+    member = {"username": "pytest-member", "email": "pytest-member@example.com", "password": "member-secret-1"}
+
+    def create_and_log_in():
+        response = client.post("/api/settings/team/members", json=member, headers=admin)
+        assert response.status_code == 200, response.text
+        token = client.post("/token", data={"username": member["username"], "password": member["password"]}).json()["access_token"]
+        client.cookies.clear()
+        assert client.get("/api/jobs", headers=_auth(token)).status_code == 200
+        return response.json()["id"], token
+
+    member_id, token = create_and_log_in()
+    response = client.put(f"/api/settings/team/members/{member_id}", json={"is_active": False}, headers=admin)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/jobs", headers=_auth(token)).status_code == 401
+
+    assert client.delete(f"/api/settings/team/members/{member_id}", headers=admin).status_code == 200
+    member_id, token = create_and_log_in()  # a new member with the same name isn't revoked
+    assert client.delete(f"/api/settings/team/members/{member_id}", headers=admin).status_code == 200
+    assert client.get("/api/jobs", headers=_auth(token)).status_code == 401
@@ -0,0 +1,68 @@
+"""
+Batch inventory update tests: every row ends at its new_quantity with one
+movement logged per change, and a batch naming the same variant/warehouse
+twice ends at the last quantity given, as if applied row by row.
+
+Run: python -m pytest -q tests/test_batch_inventory.py
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.inventory.models import InventoryItem, StockMovement, Warehouse
+from app.modules.inventory.schemas import BatchInventoryUpdate
+from app.modules.inventory.service import batch_update_inventory
+
+
+async def _seed(reset_database):
+    await reset_database()
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Warehouse), [{"id": 1, "name": "Main"}])
+        await session.execute(insert(Product), [{"id": "p", "name": "Product", "slug": "product", "status": "Active"}])
+        await session.execute(insert(ProductVariant), [
+            {"id": f"v{i}", "product_id": "p", "sku": f"SKU-{i}", "price": 1.0, "quantity": 10} for i in range(2)
+        ])
+        await session.execute(insert(InventoryItem), [
+            {"variant_id": f"v{i}", "warehouse_id": 1, "quantity": 10} for i in range(2)
+        ])
+        await session.commit()
+
+
+def _update(reset_database, updates):
+    async def run():
+        try:
+            await _seed(reset_database)
+            async with AsyncSessionLocal() as session:
+                await batch_update_inventory(session, BatchInventoryUpdate(updates=updates))
+            async with AsyncSessionLocal() as session:
+                items = dict((await session.execute(select(InventoryItem.variant_id, InventoryItem.quantity))).all())
+                totals = dict((await session.execute(select(ProductVariant.id, ProductVariant.quantity))).all())
+                changes = sorted((await session.execute(
+                    select(StockMovement.variant_id, StockMovement.qty_change)
+                )).all())
+            return items, totals, changes
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_batch_sets_each_row(reset_database):
+    items, totals, changes = _update(reset_database, [
+        {"variant_id": "v0", "warehouse_id": 1, "new_quantity": 4},
+        {"variant_id": "v1", "warehouse_id": 1, "new_quantity": 10},
+    ])
+    assert items == totals == {"v0": 4, "v1": 10}
+    assert changes == [("v0", -6)]
+
+
+@pytest.mark.parametrize("quantities, expected", [((20, 20), 20), ((20, 5), 5), ((3, 10), 10)])
+def test_repeated_key_ends_at_last_quantity(reset_database, quantities, expected):
+    items, totals, changes = _update(reset_database, [
+        {"variant_id": "v0", "warehouse_id": 1, "new_quantity": quantity} for quantity in quantities
+    ])
+    assert items["v0"] == totals["v0"] == expected
+    assert sum(change for variant_id, change in changes if variant_id == "v0") == expected - 10
@@ -0,0 +1,77 @@
+"""
+Cart pricing tests: a batch of carts is priced with a single variant query,
+each result equals pricing that cart on its own, and oversized batches are
+rejected.
+
+Run: python -m pytest -q tests/test_cart_pricing.py
+"""
+import pytest
+from sqlalchemy import delete
+
+from app.core.database import AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.sales import pricing
+
+VARIANTS = 30
+
+
+async def _seed_variants():
+    async with AsyncSessionLocal() as session:
+        variants = []
+        for i in range(VARIANTS):
+            product = Product(name=f"Pricing Product {i}", slug=f"pricing-product-{i}", status="Active", weight=0.25 * i)
+            product.variants = [ProductVariant(sku=f"PRICING-{i:03d}", price=5.0 + i)]
+            session.add(product)
+            variants.append(product.variants[0])
+        await session.commit()
+        return [variant.id for variant in variants]
+
+
+async def _delete_variants():
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(ProductVariant).where(ProductVariant.sku.like("PRICING-%")))
+        await session.execute(delete(Product).where(Product.slug.like("pricing-product-%")))
+        await session.commit()
+
+
+@pytest.fixture
+def variant_ids(client, login):
+    login()
+    yield client.portal.call(_seed_variants)
+    client.portal.call(_delete_variants)
+
+
+def _carts(variant_ids):
+    carts = [
+        {"items": [{"variant_id": variant_ids[(c + line) % VARIANTS], "quantity": line + 1} for line in range(c % 5 + 1)]}
+        for c in range(20)
+    ]
+    carts.append({"items": [{"variant_id": "missing", "quantity": 3}]})
+    carts.append({"items": []})
+    return carts
+
+
+def test_batch_matches_single_cart_pricing(client, variant_ids, record_queries):
+    carts = _carts(variant_ids)
+    variant_queries = record_queries("FROM product_variants")
+    response = client.post("/api/orders/calculate/batch", json={"carts": carts})
+    assert response.status_code == 200, response.text
+    results = response.json()["carts"]
+    assert len(variant_queries) == 1
+    assert len(results) == len(carts)
+
+    for cart, result in zip(carts, results):
+        single = client.post("/api/orders/calculate", json=cart)
+        assert single.status_code == 200
+        assert single.json() == result
+
+    first = carts[0]["items"][0]
+    assert results[0]["subtotal"] == (5.0 + variant_ids.index(first["variant_id"])) * first["quantity"]
+    assert results[-2]["subtotal"] == 0 and results[-1]["subtotal"] == 0
+
+
+def test_oversized_batch_is_rejected(client, login, monkeypatch):
+    login()
+    monkeypatch.setattr(pricing, "PRICING_MAX_CARTS", 2)
+    response = client.post("/api/orders/calculate/batch", json={"carts": [{"items": []}] * 3})
+    assert response.status_code == 400
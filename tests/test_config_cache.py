@@ -0,0 +1,125 @@
+"""
+Checkout configuration cache tests: cart calculations stop querying tax,
+shipping and constraint tables once cached, settings writes in this worker
+apply at once, and a write committed by another worker is picked up at the
+next version check. Concurrent checks share one reload, a reload that
+overlaps a write here is not cached, and concurrent first bumps of the
+version counter don't collide.
+
+Run: python -m pytest -q tests/test_config_cache.py
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import update, delete
+
+from app.core.database import AsyncSessionLocal
+from app.modules.settings import config_cache
+from app.modules.settings.models import ConfigVersion, ShippingRule
+
+CONFIG_TABLES = ("store_settings", "shipping_rules", "shipping_constraints", "payment_constraints", "config_versions")
+
+
+@pytest.fixture(autouse=True)
+def signed_in(client, login, monkeypatch):
+    monkeypatch.setattr(config_cache, "CONFIG_VERSION_CHECK_INTERVAL", 3600)
+    login()
+    yield
+    client.portal.call(_delete_rules, "cache-test")
+
+
+@pytest.fixture
+def config_queries(record_queries):
+    return record_queries(*(f"FROM {table}" for table in CONFIG_TABLES))
+
+
+async def _delete_rules(name):
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(ShippingRule).where(ShippingRule.name == name))
+        await config_cache.commit_config_change(session)
+
+
+async def _reprice_rule_elsewhere(name, cost):
+    """Another worker's write: commits and bumps the version, but can't invalidate our copy."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(ShippingRule).where(ShippingRule.name == name).values(cost=cost))
+        await config_cache.bump_config_version(session)
+        await session.commit()
+
+
+def _shipping(client):
+    response = client.post("/api/orders/calculate", json={"items": []})
+    assert response.status_code == 200, response.text
+    return response.json()["shipping"]
+
+
+def test_cart_calculations_use_cached_config(client, config_queries):
+    _shipping(client)
+    config_queries.clear()
+    for _ in range(5):
+        _shipping(client)
+    assert config_queries == []
+
+
+def test_settings_write_applies_immediately(client):
+    before = _shipping(client)
+    response = client.post("/api/settings/shipping", json={"name": "cache-test", "cost": 0.5})
+    assert response.status_code == 200, response.text
+    assert _shipping(client) == 0.5 != before
+
+
+def test_other_workers_writes_seen_at_next_version_check(client, monkeypatch):
+    client.post("/api/settings/shipping", json={"name": "cache-test", "cost": 0.5})
+    assert _shipping(client) == 0.5
+
+    client.portal.call(_reprice_rule_elsewhere, "cache-test", 0.25)
+    assert _shipping(client) == 0.5  # within the check interval
+
+    monkeypatch.setattr(config_cache, "CONFIG_VERSION_CHECK_INTERVAL", 0)
+    assert _shipping(client) == 0.25
+    assert config_cache.config_cache_stats()["version"] >= 2
+
+
+def test_concurrent_misses_share_one_reload(client, config_queries):
+    config_cache.invalidate_config()
+
+    async def run():
+        return await asyncio.gather(*[config_cache.get_config_snapshot() for _ in range(20)])
+
+    snapshots = client.portal.call(run)
+    assert len([q for q in config_queries if "FROM config_versions" in q]) == 1
+    assert len([q for q in config_queries if "FROM store_settings" in q]) == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+def test_reload_overlapping_a_write_is_not_cached(client):
+    config_cache.invalidate_config()
+
+    async def run():
+        stale = asyncio.ensure_future(config_cache.get_config_snapshot())
+        await asyncio.sleep(0)  # the reload has started
+        config_cache.invalidate_config()
+        await stale
+        cached_after_stale = config_cache._cache.snapshot is not None
+        await config_cache.get_config_snapshot()
+        return cached_after_stale, config_cache._cache.snapshot is not None
+
+    cached_after_stale, cached_after_reload = client.portal.call(run)
+    assert not cached_after_stale and cached_after_reload
+
+
+def test_concurrent_first_bumps_both_count(client):
+    async def bump():
+        async with AsyncSessionLocal() as session:
+            await config_cache.bump_config_version(session)
+            await session.commit()
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(ConfigVersion))
+            await session.commit()
+        await asyncio.gather(bump(), bump())
+        async with AsyncSessionLocal() as session:
+            return await config_cache.current_config_version(session)
+
+    assert client.portal.call(run) == 2
@@ -0,0 +1,117 @@
+"""
+Constraint rule engine tests: compiled constraints block exactly the carts the
+original condition-by-condition loop blocked, ids match whatever their JSON
+type, and checkout options for every company/method come from one call.
+
+Run: python -m pytest -q tests/test_constraint_rules.py
+"""
+import random
+from types import SimpleNamespace
+
+from app.modules.settings.constraint_rules import build_index, cart_product_ids, SHIPPING_BLOCKED_MESSAGE
+
+
+def _reference_violated(conditions, cart_total, product_ids, location):
+    """The validator's loop before compilation."""
+    violated = False
+    for condition in conditions:
+        value = condition.value
+        if condition.type == "CART_TOTAL":
+            if condition.operator == "GT" and cart_total <= value.get("amount", 0):
+                violated = True
+            elif condition.operator == "LT" and cart_total >= value.get("amount", 0):
+                violated = True
+            elif condition.operator == "BETWEEN":
+                if not (value.get("min", 0) <= cart_total <= value.get("max", 999999)):
+                    violated = True
+        elif condition.type == "PRODUCT":
+            if any(pid in value.get("product_ids", []) for pid in product_ids):
+                violated = True
+        elif condition.type == "LOCATION":
+            if location and location in value.get("locations", []):
+                violated = True
+    return violated
+
+
+def _random_condition(rng):
+    kind = rng.choice(["CART_TOTAL", "CART_TOTAL", "PRODUCT", "LOCATION", "CART_QUANTITY"])
+    if kind == "CART_TOTAL":
+        operator = rng.choice(["GT", "LT", "BETWEEN", "EQ"])
+        low = rng.choice([0, 50, 100, 150])
+        value = {"amount": low} if operator != "BETWEEN" else {"min": low, "max": low + rng.choice([0, 50, 100])}
+        return SimpleNamespace(type=kind, operator=operator, value=value)
+    if kind == "PRODUCT":
+        return SimpleNamespace(type=kind, operator="IN", value={"product_ids": rng.sample(["p1", "p2", "p3", "p4"], 2)})
+    if kind == "LOCATION":
+        return SimpleNamespace(type=kind, operator="IN", value={"locations": rng.sample(["Riyadh", "Jeddah", "Dammam"], 1)})
+    return SimpleNamespace(type=kind, operator="GT", value={"min": 3})
+
+
+def test_compiled_constraints_match_reference_loop():
+    rng = random.Random(7)
+    constraints = [
+        SimpleNamespace(
+            shipping_company_ids=rng.sample(["1", "2", "3"], rng.randint(1, 2)),
+            conditions=[_random_condition(rng) for _ in range(rng.randint(1, 3))],
+            custom_error_message=f"blocked by {i}", is_custom_error_enabled=bool(i % 2)
+        )
+        for i in range(40)
+    ]
+    index = build_index(constraints, "shipping_company_ids", SHIPPING_BLOCKED_MESSAGE)
+
+    for _ in range(500):
+        company = rng.choice(["1", "2", "3", "4"])
+        total = rng.choice([0, 49.99, 50, 75, 100, 100.01, 150, 250])
+        products = rng.sample(["p1", "p2", "p3", "p4", "p5"], rng.randint(0, 3))
+        location = rng.choice([None, "Riyadh", "Jeddah", "Mecca"])
+
+        expected = None
+        for i, constraint in enumerate(constraints):
+            if company in constraint.shipping_company_ids and \
+                    _reference_violated(constraint.conditions, total, products, location):
+                expected = f"blocked by {i}" if i % 2 else SHIPPING_BLOCKED_MESSAGE
+                break
+        assert index.check(company, total, cart_product_ids(products), location) == expected
+
+
+def test_ids_compare_regardless_of_json_type():
+    constraint = SimpleNamespace(
+        shipping_company_ids=[7], custom_error_message=None, is_custom_error_enabled=False,
+        conditions=[SimpleNamespace(type="PRODUCT", operator="IN", value={"product_ids": [11]})]
+    )
+    index = build_index([constraint], "shipping_company_ids", SHIPPING_BLOCKED_MESSAGE)
+    assert index.check("7", 10, cart_product_ids(["11"])) == SHIPPING_BLOCKED_MESSAGE
+    assert index.check(7, 10, cart_product_ids([12])) is None
+
+
+def test_checkout_options_for_every_company_and_method(client, login):
+    login()
+    created = []
+    for path, body in (
+        ("shipping", {"name": "Minimum 100", "shipping_company_ids": ["aramex", "smsa"],
+                      "conditions": [{"type": "CART_TOTAL", "operator": "GT", "value": {"amount": 100}}]}),
+        ("payment", {"name": "No COD over 0", "payment_method_ids": ["cod"], "is_custom_error_enabled": True,
+                     "custom_error_message": "COD unavailable",
+                     "conditions": [{"type": "CART_TOTAL", "operator": "LT", "value": {"amount": 0}}]}),
+    ):
+        response = client.post(f"/api/settings/constraints/{path}", json=body)
+        assert response.status_code == 200, response.text
+        created.append((path, response.json()["id"]))
+
+    try:
+        response = client.post("/api/orders/checkout-options", json={
+            "items": [], "shipping_company_ids": ["aramex", "dhl"], "payment_method_ids": ["cod", "card"]
+        })
+        assert response.status_code == 200, response.text
+        options = response.json()
+        assert options["subtotal"] == 0
+        assert [(o["id"], o["allowed"]) for o in options["shipping_companies"]] == [("aramex", False), ("dhl", True)]
+        assert options["payment_methods"][0] == {"id": "cod", "allowed": False, "error_message": "COD unavailable"}
+        assert options["payment_methods"][1]["allowed"]
+
+        # Without explicit ids: every constrained company / method
+        options = client.post("/api/orders/checkout-options", json={"items": []}).json()
+        assert sorted(o["id"] for o in options["shipping_companies"]) == ["aramex", "smsa"]
+    finally:
+        for path, constraint_id in created:
+            assert client.delete(f"/api/settings/constraints/{path}/{constraint_id}").status_code == 200
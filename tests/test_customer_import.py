@@ -0,0 +1,138 @@
+"""
+Customer import job tests: invalid and duplicate rows (within the file and
+against existing customers) go to the error report, and an import that fails
+halfway resumes from its last committed chunk without repeating or losing rows.
+Mobiles are stored normalized, so formatted ones still match.
+
+Run: python -m pytest -q tests/test_customer_import.py
+"""
+import asyncio
+import csv
+import os
+
+import pytest
+from sqlalchemy import select, func
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.customers import customer_import, service
+from app.modules.customers.models import Customer
+from app.modules.customers.schemas import CustomerCreate, CustomerUpdate
+from app.modules.jobs import runner
+from app.modules.jobs.models import Job, JobStatus
+
+ROWS = 250
+CHUNK = 50
+
+
+async def _reset(reset_database):
+    await reset_database()
+    async with AsyncSessionLocal() as session:
+        # Through the API's write path: the mobile is stored normalized
+        await service.create_customer(session, CustomerCreate(
+            name="Existing", email="Taken@Example.com", mobile="050 000-0000"
+        ))
+
+
+def _write_upload(job_id):
+    os.makedirs(runner.job_directory(job_id), exist_ok=True)
+    with open(os.path.join(runner.job_directory(job_id), "upload.csv"), "w", newline="", encoding="utf-8-sig") as out:
+        writer = csv.writer(out)
+        writer.writerow(["Name", "Email", "Mobile", "Type"])
+        for i in range(ROWS):
+            writer.writerow([f"Customer {i}", f"c{i}@example.com", f"05{i + 1:08d}", "individual"])
+        writer.writerow(["X", "x@example.com", "", ""])                          # name too short
+        writer.writerow(["Bad Email", "not-an-email", "", ""])
+        writer.writerow(["Bad Type", "", "", "robot"])
+        writer.writerow(["Repeat", "C0@EXAMPLE.COM", "", ""])                    # earlier in the file
+        writer.writerow(["Repeat Mobile", "", "050 000-0001", ""])               # earlier in the file
+        writer.writerow(["Existing Email", "taken@example.com", "", ""])
+        writer.writerow(["Existing Mobile", "", "(050) 000 0000", ""])
+
+
+async def _import():
+    job_id = runner.new_job_id()
+    _write_upload(job_id)
+    async with AsyncSessionLocal() as session:
+        await runner.submit_job(session, "customer_import", {"upload": "upload.csv"}, job_id=job_id)
+    await asyncio.gather(*runner._tasks)
+    return await _reload(job_id)
+
+
+async def _reload(job_id):
+    async with AsyncSessionLocal() as session:
+        return await session.get(Job, job_id)
+
+
+async def _customer_count():
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(select(func.count()).select_from(Customer))).scalar()
+
+
+def _report_errors(path):
+    with open(path, encoding="utf-8-sig", newline="") as report:
+        return [row["Error"] for row in csv.DictReader(report)]
+
+
+@pytest.fixture(autouse=True)
+def chunk_size(monkeypatch):
+    monkeypatch.setattr(customer_import, "CUSTOMER_IMPORT_CHUNK_SIZE", CHUNK)
+
+
+def test_import_reports_invalid_and_duplicate_rows(reset_database):
+    async def run():
+        try:
+            await _reset(reset_database)
+            return await _import(), await _customer_count()
+        finally:
+            await engine.dispose()
+
+    job, customers = asyncio.run(run())
+    assert job.status == JobStatus.COMPLETED, job.error
+    assert job.rows_done == job.rows_total == ROWS + 7
+    assert job.result["imported"] == ROWS and job.result["skipped"] == 7
+    assert customers == ROWS + 1
+    assert sorted(_report_errors(job.artifact_path)) == sorted([
+        "Name is required (at least 2 characters)", "Invalid email",
+        "Type must be one of: company, individual",
+        "Duplicate email", "Duplicate mobile", "Duplicate email", "Duplicate mobile",
+    ])
+
+
+def test_failed_import_resumes_from_last_committed_chunk(monkeypatch, reset_database):
+    lookup = customer_import.existing_contacts
+    calls = {"seen": 0}
+
+    async def failing_lookup(session, emails, mobiles):
+        calls["seen"] += 1
+        if calls["seen"] == 3:
+            raise RuntimeError("connection lost")
+        return await lookup(session, emails, mobiles)
+
+    async def run():
+        try:
+            await _reset(reset_database)
+            monkeypatch.setattr(customer_import, "existing_contacts", failing_lookup)
+            failed = await _import()
+            monkeypatch.setattr(customer_import, "existing_contacts", lookup)
+
+            async with AsyncSessionLocal() as session:
+                await runner.resume_job(session, await session.get(Job, failed.id))
+            await asyncio.gather(*runner._tasks)
+            return failed, await _reload(failed.id), await _customer_count()
+        finally:
+            await engine.dispose()
+
+    failed, resumed, customers = asyncio.run(run())
+    assert failed.status == JobStatus.FAILED and failed.error == "connection lost"
+    assert failed.rows_done == failed.checkpoint["rows"] == 2 * CHUNK
+
+    assert resumed.status == JobStatus.COMPLETED, resumed.error
+    assert resumed.result["imported"] == ROWS and resumed.result["skipped"] == 7
+    assert customers == ROWS + 1
+    assert len(_report_errors(resumed.artifact_path)) == 7
+
+
+def test_mobiles_are_normalized_on_write():
+    assert CustomerCreate(name="Someone", mobile="(050) 123-4567").mobile == "0501234567"
+    assert CustomerUpdate(mobile="050.123.4567").mobile == "0501234567"
+    assert CustomerUpdate(mobile=" - ").mobile is None
@@ -0,0 +1,195 @@
+"""
+Customer segment tests: every group's count comes from one SUM(CASE) query,
+matches a plain COUNT with the same criteria, leaves out soft-deleted
+customers, is cached until customers change, and member listing returns
+exactly the counted customers. Marketing segments (order count / amount
+spent) resolve in SQL, stream in id batches and refresh their materialized
+membership incrementally.
+
+Run: python -m pytest -q tests/test_customer_segments.py
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select, func
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.customers import service, schemas
+from app.modules.customers.models import Customer, CustomerGroup, Gender
+from app.modules.customers.segments import compile_criteria
+from app.modules.marketing.service import DiscountCalculator
+from app.modules.sales.models import Order, OrderStatus
+
+CUSTOMERS = 600
+ORDERS = 3000
+# Soft-deleted customers (some with orders) never count as members
+DELETED = {i for i in range(CUSTOMERS) if i % 40 == 0}
+CRITERIA = [
+    {"min_orders": 5},
+    {"max_orders": 3, "city": "Riyadh"},
+    {"gender": "female", "city": "Jeddah"},
+    {},
+    {"gender": "robot"},
+]
+
+
+async def _seed(reset_database):
+    await reset_database()
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Customer), [{
+            "name": f"Customer {i}", "total_orders": i % 10,
+            "city": "Riyadh" if i % 2 else "Jeddah",
+            "gender": Gender.FEMALE if i % 3 == 0 else Gender.MALE,
+            "deleted_at": datetime(2026, 1, 1) if i in DELETED else None,
+        } for i in range(CUSTOMERS)])
+        session.add_all([CustomerGroup(name=f"Group {i}", criteria=criteria) for i, criteria in enumerate(CRITERIA)])
+        # Customer n (1-based id) has a skewed number of orders of varying amounts
+        await session.execute(insert(Order), [{
+            "customer_id": (i * i) % CUSTOMERS + 1, "status": OrderStatus.COMPLETED, "payment_status": "paid",
+            "payment_method": "cash", "total_amount": float(i % 97),
+        } for i in range(ORDERS)])
+        await session.commit()
+
+
+def _expected_members(criteria):
+    """The old Python-side evaluation, as the reference."""
+    stats = {}
+    for i in range(ORDERS):
+        count, spent = stats.get((i * i) % CUSTOMERS + 1, (0, 0.0))
+        stats[(i * i) % CUSTOMERS + 1] = (count + 1, spent + float(i % 97))
+    members = set()
+    for customer_id, (count, spent) in stats.items():
+        i = customer_id - 1
+        if i in DELETED:
+            continue
+        if "min_orders" in criteria and count < criteria["min_orders"]:
+            continue
+        if "min_spent" in criteria and spent < criteria["min_spent"]:
+            continue
+        if "city" in criteria and criteria["city"] != ("Riyadh" if i % 2 else "Jeddah"):
+            continue
+        if "gender" in criteria and criteria["gender"] != ("female" if i % 3 == 0 else "male"):
+            continue
+        members.add(customer_id)
+    return members
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database(reset_database):
+    asyncio.run(_seed(reset_database))
+    yield
+    asyncio.run(engine.dispose())
+
+
+def _run(coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def test_group_counts_in_one_query_and_cached(record_queries):
+    statements = record_queries("FROM customers")
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            first = {g.name: g.customer_count for g in await service.get_customer_groups(session)}
+            scans = len(statements)
+            second = {g.name: g.customer_count for g in await service.get_customer_groups(session)}
+            cached_scans = len(statements) - scans
+
+            await service.create_customer(session, schemas.CustomerCreate(name="New Customer", city="Riyadh"))
+            third = {g.name: g.customer_count for g in await service.get_customer_groups(session)}
+
+            expected = {}
+            for i, criteria in enumerate(CRITERIA):
+                expected[f"Group {i}"] = (await session.execute(
+                    select(func.count()).select_from(Customer).where(compile_criteria(criteria))
+                )).scalar()
+            return first, scans, second, cached_scans, third, expected
+
+    first, scans, second, cached_scans, third, expected = _run(run())
+
+    assert scans == 1 and cached_scans == 0
+    assert first == second
+    assert first["Group 3"] == CUSTOMERS - len(DELETED) and first["Group 4"] == 0
+    # The new customer invalidated the cache
+    assert third == expected and third["Group 3"] == CUSTOMERS - len(DELETED) + 1
+
+
+def test_group_members_match_count():
+    async def run():
+        async with AsyncSessionLocal() as session:
+            groups = {g.name: g for g in await service.get_customer_groups(session)}
+            group = groups["Group 2"]
+            ids, cursor = [], None
+            while True:
+                page = await service.get_group_members(session, group.id, limit=50, cursor=cursor)
+                ids.extend(customer.id for customer in page["customers"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            missing = await service.get_group_members(session, 10_000)
+            return group.customer_count, page["total"], ids, missing
+
+    count, total, ids, missing = _run(run())
+    assert count == total == len(ids) == len(set(ids)) > 0
+    assert missing is None
+
+
+@pytest.mark.parametrize("criteria", [
+    {"min_orders": 50},
+    {"min_spent": 3000.0},
+    {"min_orders": 40, "min_spent": 2000.0, "city": "Riyadh"},
+    {"gender": "female"},
+])
+def test_segment_members_resolved_in_sql(criteria):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            group = CustomerGroup(name="Segment", criteria=criteria)
+            session.add(group)
+            await session.commit()
+            calculator = DiscountCalculator(session)
+            members = await calculator.get_segment_members(group.id)
+            batches = [ids async for ids in calculator.iter_segment_member_ids(group.id, batch_size=25)]
+            await service.delete_customer_group(session, group.id)
+            return members, batches
+
+    members, batches = _run(run())
+    expected = _expected_members(criteria)
+    assert set(members) == expected and len(members) == len(expected) > 0
+    streamed = [customer_id for batch in batches for customer_id in batch]
+    assert streamed == sorted(expected) and all(len(batch) <= 25 for batch in batches)
+
+
+def test_materialized_segment_refreshes_incrementally():
+    criteria = {"min_orders": 40}
+
+    async def run():
+        async with AsyncSessionLocal() as session:
+            group = CustomerGroup(name="Big campaign", criteria=criteria)
+            session.add(group)
+            await session.commit()
+            calculator = DiscountCalculator(session)
+
+            first = await calculator.refresh_segment_members(group.id)
+            unchanged = await calculator.refresh_segment_members(group.id)
+
+            group.criteria = {"min_orders": 50}
+            await session.commit()
+            narrowed = await calculator.refresh_segment_members(group.id)
+            stored = [ids async for ids in calculator.iter_segment_member_ids(group.id, materialized=True)]
+            missing = await calculator.refresh_segment_members(10_000)
+            await service.delete_customer_group(session, group.id)
+            return first, unchanged, narrowed, stored, missing
+
+    first, unchanged, narrowed, stored, missing = _run(run())
+    wide, narrow = _expected_members({"min_orders": 40}), _expected_members({"min_orders": 50})
+    assert first == {"group_id": first["group_id"], "added": len(wide), "removed": 0, "members": len(wide)}
+    assert unchanged["added"] == unchanged["removed"] == 0
+    assert narrowed["added"] == 0 and narrowed["removed"] == len(wide - narrow) > 0
+    assert [customer_id for batch in stored for customer_id in batch] == sorted(narrow)
+    assert missing is None
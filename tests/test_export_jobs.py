@@ -0,0 +1,136 @@
+"""
+Export job tests: a job runs to completion with row progress, a job that
+fails halfway resumes from its checkpoint without repeating or losing rows,
+and the synchronous product Excel export streams every variant.
+
+Run: python -m pytest -q tests/test_export_jobs.py
+"""
+import asyncio
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+
+import openpyxl
+import pytest
+from sqlalchemy import insert
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.catalog import product_export
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.customers.models import Customer
+from app.modules.jobs import exports, runner
+from app.modules.jobs.models import Job, JobStatus
+from app.modules.sales.models import Order, OrderStatus
+
+ORDERS = 4500  # three chunks of ORDER_EXPORT_CHUNK_SIZE
+PRODUCTS = 25
+
+
+async def _seed(reset_database):
+    await reset_database()
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Customer), [{"id": i + 1, "name": f"Customer {i}"} for i in range(20)])
+        await session.execute(insert(Order), [{
+            "id": i + 1, "customer_id": i % 20 + 1, "status": OrderStatus.NEW, "payment_status": "paid",
+            "payment_method": "cash", "total_amount": float(i), "created_at": datetime(2024, 1, 1) + timedelta(minutes=i)
+        } for i in range(ORDERS)])
+        await session.execute(insert(Product), [
+            {"id": f"p{i}", "name": f"Product {i}", "slug": f"product-{i}", "status": "Active"} for i in range(PRODUCTS)
+        ])
+        # Two variants each, except the last product (exported as one bare row)
+        await session.execute(insert(ProductVariant), [
+            {"id": f"p{i}-{v}", "product_id": f"p{i}", "sku": f"SKU-{i}-{v}", "price": 10.0 + i}
+            for i in range(PRODUCTS - 1) for v in range(2)
+        ])
+        await session.commit()
+
+
+async def _export(fmt="csv"):
+    async with AsyncSessionLocal() as session:
+        job = await runner.submit_job(session, "export", exports.export_job_params("orders", fmt, {}))
+    await asyncio.gather(*runner._tasks)
+    return await _reload(job.id)
+
+
+async def _reload(job_id):
+    async with AsyncSessionLocal() as session:
+        return await session.get(Job, job_id)
+
+
+def _csv_ids(path):
+    with open(path, encoding="utf-8-sig", newline="") as artifact:
+        return [row[0] for row in list(csv.reader(artifact))[1:]]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database(reset_database):
+    asyncio.run(_seed(reset_database))
+    yield
+    asyncio.run(engine.dispose())
+
+
+def test_export_job_completes_with_progress():
+    async def run():
+        try:
+            return await _export("xlsx")
+        finally:
+            await engine.dispose()
+
+    job = asyncio.run(run())
+    assert job.status == JobStatus.COMPLETED, job.error
+    assert job.rows_done == job.rows_total == ORDERS
+    assert job.artifact_name == "orders_export.xlsx"
+    assert os.path.getsize(job.artifact_path) > 0
+
+
+def test_failed_export_resumes_from_checkpoint(monkeypatch):
+    source = exports.EXPORT_SOURCES["orders"]
+    chunks = {"seen": 0}
+
+    def failing_rows(filters, cursor):
+        async def rows():
+            async for chunk, next_cursor in source.iter_rows(filters, cursor):
+                chunks["seen"] += 1
+                if chunks["seen"] == 2:
+                    raise RuntimeError("connection lost")
+                yield chunk, next_cursor
+        return rows()
+
+    async def run():
+        try:
+            monkeypatch.setitem(exports.EXPORT_SOURCES, "orders", source._replace(iter_rows=failing_rows))
+            failed = await _export("csv")
+            monkeypatch.setitem(exports.EXPORT_SOURCES, "orders", source)
+
+            async with AsyncSessionLocal() as session:
+                await runner.resume_job(session, await session.get(Job, failed.id))
+            await asyncio.gather(*runner._tasks)
+            return failed, await _reload(failed.id)
+        finally:
+            await engine.dispose()
+
+    failed, resumed = asyncio.run(run())
+    assert failed.status == JobStatus.FAILED and failed.error == "connection lost"
+    assert 0 < failed.rows_done < ORDERS and failed.checkpoint["cursor"]
+
+    assert resumed.status == JobStatus.COMPLETED, resumed.error
+    assert resumed.attempts == 2
+    ids = _csv_ids(resumed.artifact_path)
+    assert len(ids) == len(set(ids)) == ORDERS
+
+
+def test_product_excel_export_streams_every_row():
+    async def run():
+        try:
+            return b"".join([chunk async for chunk in product_export.stream_products_xlsx()])
+        finally:
+            await engine.dispose()
+
+    workbook = openpyxl.load_workbook(io.BytesIO(asyncio.run(run())), read_only=True)
+    rows = list(workbook["Products"].iter_rows(values_only=True))
+    assert rows[0] == product_export.PRODUCT_EXPORT_COLUMNS
+    assert len(rows) - 1 == 2 * (PRODUCTS - 1) + 1
+    assert sorted(row[1] for row in rows[1:] if row[1].startswith("SKU-")) == sorted(
+        f"SKU-{i}-{v}" for i in range(PRODUCTS - 1) for v in range(2)
+    )
@@ -0,0 +1,64 @@
+"""
+Password hashing tests: the async helpers hash off the event loop thread, and
+a user whose stored hash uses a deprecated scheme (bcrypt) is re-hashed to the
+current one on a successful login.
+
+Run: python -m pytest -q tests/test_password_hashing.py
+"""
+import asyncio
+import threading
+
+from passlib.context import CryptContext
+from sqlalchemy import select, update
+
+from app.core import security
+from app.core.database import AsyncSessionLocal
+from app.modules.auth.models import User
+
+
+def test_async_helpers_run_off_the_event_loop(monkeypatch):
+    threads = []
+    hash_password = security.get_password_hash
+
+    def recording_hash(password):
+        threads.append(threading.current_thread())
+        return hash_password(password)
+
+    monkeypatch.setattr(security, "get_password_hash", recording_hash)
+
+    async def run():
+        hashed = await security.get_password_hash_async("secret-1")
+        return (
+            hashed,
+            await security.verify_password_async("secret-1", hashed),
+            await security.verify_password_async("wrong", hashed),
+        )
+
+    hashed, valid, invalid = asyncio.run(run())
+    assert hashed.startswith("$" + security.PASSWORD_HASH_SCHEME)
+    assert valid and not invalid
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_deprecated_hash_is_replaced_on_login(client, api_user):
+    legacy_hash = CryptContext(schemes=["bcrypt"]).hash(api_user.password)
+
+    async def set_hash(value):
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(User).where(User.username == api_user.username).values(password_hash=value))
+            await session.commit()
+
+    async def stored_hash():
+        async with AsyncSessionLocal() as session:
+            value = (await session.execute(select(User.password_hash).where(User.username == api_user.username))).scalar()
+        return value
+
+    client.portal.call(set_hash, legacy_hash)
+    assert client.post("/token", data={"username": api_user.username, "password": "wrong"}).status_code == 401
+    assert client.portal.call(stored_hash) == legacy_hash
+
+    credentials = {"username": api_user.username, "password": api_user.password}
+    assert client.post("/token", data=credentials).status_code == 200
+    rehashed = client.portal.call(stored_hash)
+    assert rehashed != legacy_hash and rehashed.startswith("$argon2")
+    assert client.post("/token", data=credentials).status_code == 200
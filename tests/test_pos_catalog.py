@@ -0,0 +1,87 @@
+"""
+POS catalog delta tests: a variant deleted in the same window as another is
+created is reported as deleted (counts alone would hide it), and deleting an
+image changes the version and re-sends the product's variants.
+
+Run: python -m pytest -q tests/test_pos_catalog.py
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant, ProductImage
+from app.modules.catalog.pos_catalog import catalog_version, get_catalog_changes
+
+
+async def _seed(reset_database):
+    await reset_database()
+    async with AsyncSessionLocal() as session:
+        session.add(Product(
+            id="p", name="Product", slug="product", status="Active",
+            variants=[ProductVariant(id="v1", sku="SKU-1"), ProductVariant(id="v2", sku="SKU-2")],
+            images=[ProductImage(id="i1", image_url="/img/1.png", is_main=True)]
+        ))
+        session.add(Product(id="q", name="Other", slug="other", status="Active",
+                            variants=[ProductVariant(id="w1", sku="SKU-W")]))
+        await session.commit()
+
+
+def _run(reset_database, change):
+    async def run():
+        try:
+            await _seed(reset_database)
+            async with AsyncSessionLocal() as session:
+                since = await catalog_version(session)
+            async with AsyncSessionLocal() as session:
+                await change(session)
+                await session.commit()
+            async with AsyncSessionLocal() as session:
+                return since, await get_catalog_changes(session, since)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+def test_delete_plus_create_reports_the_deleted_variant(reset_database):
+    async def change(session):
+        product = (await session.execute(select(Product).where(Product.id == "p"))).scalar_one()
+        product.variants = [v for v in product.variants if v.id != "v1"] + [ProductVariant(id="v3", sku="SKU-3")]
+
+    since, changes = _run(reset_database, change)
+    assert changes["version"] != since
+    assert changes["version"].split("-")[1] == since.split("-")[1]  # same count
+    assert changes["reset"] is False
+    assert changes["deleted"] == ["v1"]
+    assert "v3" in {item["id"] for item in changes["items"]}
+
+
+def test_deleted_product_reports_its_variants(reset_database):
+    async def change(session):
+        await session.delete(await session.get(Product, "q"))
+
+    _, changes = _run(reset_database, change)
+    assert changes["reset"] is False and changes["deleted"] == ["w1"]
+
+
+def test_image_delete_changes_version_and_resends_product(reset_database):
+    async def change(session):
+        await session.delete(await session.get(ProductImage, "i1"))
+
+    since, changes = _run(reset_database, change)
+    assert changes["version"] != since and changes["deleted"] == []
+    images = {item["id"]: item["image"] for item in changes["items"]}
+    assert images["v1"] == images["v2"] == "/static/placeholder.png"
+
+
+def test_unknown_version_resets(reset_database):
+    async def run():
+        try:
+            await _seed(reset_database)
+            async with AsyncSessionLocal() as session:
+                return await get_catalog_changes(session, "garbage")
+        finally:
+            await engine.dispose()
+
+    assert asyncio.run(run())["reset"] is True
@@ -0,0 +1,169 @@
+"""
+Product import job tests: invalid rows and rows whose SKU or product already
+exists go to the error report; a SKU created by someone else while the job
+runs rejects only that row, not its chunk; and an import that fails halfway
+resumes from its last committed chunk without repeating or losing products.
+
+Run: python -m pytest -q tests/test_product_import.py
+"""
+import asyncio
+import csv
+import os
+
+import pytest
+from sqlalchemy import insert, select, func
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.catalog import product_import
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.inventory.models import Warehouse
+from app.modules.jobs import runner
+from app.modules.jobs.models import Job, JobStatus
+
+ROWS = 60
+CHUNK = 20
+
+
+async def _reset(reset_database):
+    await reset_database()
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Warehouse), [{"id": 1, "name": "Main"}])
+        await session.execute(insert(Product), [
+            {"id": "existing", "name": "Existing", "slug": "existing", "status": "Active"}
+        ])
+        await session.execute(insert(ProductVariant), [
+            {"id": "existing-v", "product_id": "existing", "sku": "TAKEN", "price": 1.0, "quantity": 0}
+        ])
+        await session.commit()
+
+
+def _write_upload(job_id):
+    os.makedirs(runner.job_directory(job_id), exist_ok=True)
+    with open(os.path.join(runner.job_directory(job_id), "upload.csv"), "w", newline="", encoding="utf-8-sig") as out:
+        writer = csv.writer(out)
+        writer.writerow(["Product Name", "SKU", "Price", "Quantity"])
+        for i in range(ROWS):
+            writer.writerow([f"Product {i}", f"P-{i}", "9.5", "3"])
+        writer.writerow(["", "NO-NAME", "1", "1"])
+        writer.writerow(["Bad Price", "BAD-PRICE", "free", "1"])
+        writer.writerow(["Repeat", "P-0", "1", "1"])                  # earlier in the file
+        writer.writerow(["Taken Sku", "TAKEN", "1", "1"])             # already in the catalog
+        writer.writerow(["Existing", "NEW-SKU", "1", "1"])            # product slug already exists
+
+
+async def _import():
+    job_id = runner.new_job_id()
+    _write_upload(job_id)
+    async with AsyncSessionLocal() as session:
+        await runner.submit_job(session, "product_import", {"upload": "upload.csv"}, job_id=job_id)
+    await asyncio.gather(*runner._tasks)
+    return await _reload(job_id)
+
+
+async def _reload(job_id):
+    async with AsyncSessionLocal() as session:
+        return await session.get(Job, job_id)
+
+
+async def _counts():
+    async with AsyncSessionLocal() as session:
+        products = (await session.execute(select(func.count()).select_from(Product))).scalar()
+        variants = (await session.execute(select(func.count()).select_from(ProductVariant))).scalar()
+    return products, variants
+
+
+def _report(path):
+    with open(path, encoding="utf-8-sig", newline="") as report:
+        return {row["SKU"]: row["Error"] for row in csv.DictReader(report)}
+
+
+@pytest.fixture(autouse=True)
+def chunk_size(monkeypatch):
+    monkeypatch.setattr(product_import, "PRODUCT_IMPORT_CHUNK_SIZE", CHUNK)
+
+
+def test_import_reports_invalid_and_existing_rows(reset_database):
+    async def run():
+        try:
+            await _reset(reset_database)
+            return await _import(), await _counts()
+        finally:
+            await engine.dispose()
+
+    job, (products, variants) = asyncio.run(run())
+    assert job.status == JobStatus.COMPLETED, job.error
+    assert job.rows_done == job.rows_total == ROWS + 5
+    assert job.result["products"] == job.result["variants"] == ROWS and job.result["errors"] == 5
+    assert products == variants == ROWS + 1
+    assert _report(job.artifact_path) == {
+        "NO-NAME": "Product Name is required",
+        "BAD-PRICE": "Price must be a number",
+        "P-0": "Duplicate SKU in file",
+        "TAKEN": "SKU already exists",
+        "NEW-SKU": "Product already exists",
+    }
+
+
+def test_sku_created_during_import_rejects_only_that_row(monkeypatch, reset_database):
+    insert_chunk = product_import._insert_chunk
+    clashed = {"done": False}
+
+    async def insert_after_someone_else(records):
+        if not clashed["done"]:
+            clashed["done"] = True
+            # Another user saves P-3 after the plan was made
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(ProductVariant), [
+                    {"id": "racer", "product_id": "existing", "sku": "P-3", "price": 1.0, "quantity": 0}
+                ])
+                await session.commit()
+        await insert_chunk(records)
+
+    async def run():
+        try:
+            await _reset(reset_database)
+            monkeypatch.setattr(product_import, "_insert_chunk", insert_after_someone_else)
+            return await _import(), await _counts()
+        finally:
+            await engine.dispose()
+
+    job, (products, variants) = asyncio.run(run())
+    assert job.status == JobStatus.COMPLETED, job.error
+    assert job.result["products"] == job.result["variants"] == ROWS - 1 and job.result["errors"] == 6
+    assert (products, variants) == (ROWS, ROWS + 1)
+    report = _report(job.artifact_path)
+    assert report["P-3"] == "SKU already exists" and len(report) == 6
+
+
+def test_failed_import_resumes_from_last_committed_chunk(monkeypatch, reset_database):
+    insert_chunk = product_import._insert_chunk
+    calls = {"seen": 0}
+
+    async def failing_insert(records):
+        calls["seen"] += 1
+        if calls["seen"] == 2:
+            raise RuntimeError("connection lost")
+        await insert_chunk(records)
+
+    async def run():
+        try:
+            await _reset(reset_database)
+            monkeypatch.setattr(product_import, "_insert_chunk", failing_insert)
+            failed = await _import()
+            monkeypatch.setattr(product_import, "_insert_chunk", insert_chunk)
+
+            async with AsyncSessionLocal() as session:
+                await runner.resume_job(session, await session.get(Job, failed.id))
+            await asyncio.gather(*runner._tasks)
+            return failed, await _reload(failed.id), await _counts()
+        finally:
+            await engine.dispose()
+
+    failed, resumed, (products, variants) = asyncio.run(run())
+    assert failed.status == JobStatus.FAILED and failed.error == "connection lost"
+    assert failed.checkpoint["next_product"] == CHUNK and failed.checkpoint["products"] == CHUNK
+
+    assert resumed.status == JobStatus.COMPLETED, resumed.error
+    assert resumed.result["products"] == resumed.result["variants"] == ROWS and resumed.result["errors"] == 5
+    assert products == variants == ROWS + 1
+    assert len(_report(resumed.artifact_path)) == 5
@@ -0,0 +1,172 @@
+"""
+Query-plan regression test for the hot read paths.
+
+Seeds a large dataset (QUERY_PLAN_ROWS orders / stock movements, default
+20,000) into the isolated test database (tests/conftest.py), runs the
+real service/route code while capturing the SQL it sends, then EXPLAINs every
+captured statement. Fails if any of them falls back to a full scan of a large
+table, or sorts its whole result to return one page (ORDER BY ... LIMIT).
+
+Run: python -m pytest -q tests/test_query_plans.py
+"""
+import asyncio
+import os
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.catalog.models import Product, ProductVariant
+from app.modules.customers.models import Customer
+from app.modules.customers.service import get_customer_orders, get_customer_stats
+from app.modules.inventory.allocation import load_order_allocation
+from app.modules.inventory.models import Warehouse, InventoryItem, StockMovement, StockMovementReason
+from app.modules.inventory.service import get_stock_movements, get_variant_stock_by_warehouse, get_variant_total_stock
+from app.modules.sales.models import Order, OrderItem, OrderStatus
+from app.modules.sales.routes import list_orders
+
+ROWS = int(os.getenv("QUERY_PLAN_ROWS", "20000"))
+CUSTOMERS = 1000
+WAREHOUSES = 50
+VARIANTS = 400
+CHUNK = 10000
+
+# Tables that grow without bound; a full scan of any of them is a regression
+LARGE_TABLES = {"orders", "order_items", "stock_movements", "inventory_items"}
+
+STATUSES = list(OrderStatus)
+
+
+async def _seed(reset_database):
+    await reset_database()
+
+    started = datetime(2024, 1, 1)
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Customer), [{"id": i + 1, "name": f"Customer {i}"} for i in range(CUSTOMERS)])
+        await session.execute(insert(Warehouse), [
+            {"id": i + 1, "name": f"WH {i}", "priority_index": i} for i in range(WAREHOUSES)
+        ])
+        await session.execute(insert(Product), [{"id": "p-plan", "name": "Plan Product", "slug": "plan-product", "status": "Active"}])
+        await session.execute(insert(ProductVariant), [
+            {"id": f"v-{i:05d}", "product_id": "p-plan", "sku": f"PLAN-{i:05d}", "price": 1.0} for i in range(VARIANTS)
+        ])
+        await session.execute(insert(InventoryItem), [
+            {"variant_id": f"v-{v:05d}", "warehouse_id": w + 1, "quantity": 10}
+            for v in range(VARIANTS) for w in range(WAREHOUSES)
+        ])
+
+        for start in range(0, ROWS, CHUNK):
+            batch = range(start, min(start + CHUNK, ROWS))
+            await session.execute(insert(Order), [{
+                "id": i + 1, "customer_id": i % CUSTOMERS + 1, "status": STATUSES[i % len(STATUSES)],
+                "payment_status": "paid" if i % 2 else "pending", "payment_method": "cash",
+                "total_amount": float(i % 997), "created_at": started + timedelta(minutes=i)
+            } for i in batch])
+            await session.execute(insert(OrderItem), [{
+                "order_id": i + 1, "variant_id": f"v-{i % VARIANTS:05d}", "quantity": 1, "unit_price": 1.0
+            } for i in batch])
+            await session.execute(insert(StockMovement), [{
+                "variant_id": f"v-{i % VARIANTS:05d}", "warehouse_id": i % WAREHOUSES + 1, "qty_change": -1,
+                "reason": StockMovementReason.NEW_ORDER, "related_id": i + 1,
+                "created_at": started + timedelta(minutes=i)
+            } for i in batch])
+        await session.commit()
+
+    # Planner statistics, as a production database would have
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+
+
+async def _hot_paths(session):
+    """The read paths behind the order list, customer pages, movement log and stock lookups."""
+    page_one = await list_orders(
+        page=1, limit=20, status="all", payment_status="all", date_from=None, date_to=None,
+        search=None, sort="newest", cursor=None, count="none", db=session, current_user=None
+    )
+    for params in ({"sort": "oldest"}, {"sort": "total_high"}, {"status": OrderStatus.PROCESSING.name},
+                   {"payment_status": "paid"}, {"cursor": page_one["meta"]["next_cursor"]}):
+        await list_orders(**{
+            "page": 1, "limit": 20, "status": "all", "payment_status": "all", "date_from": None, "date_to": None,
+            "search": None, "sort": "newest", "cursor": None, "count": "none", **params
+        }, db=session, current_user=None)
+
+    await get_customer_orders(session, 42)
+    await get_customer_stats(session, 42)
+
+    _, cursor = await get_stock_movements(session, 50, 0)
+    await get_stock_movements(session, 50, 0, cursor)
+    await load_order_allocation(session, ROWS // 2)
+
+    await get_variant_total_stock(session, "v-00042")
+    await get_variant_stock_by_warehouse(session, "v-00042")
+    await session.execute(InventoryItem.__table__.select().where(InventoryItem.warehouse_id == 7))
+
+
+async def _capture_and_explain():
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        async with AsyncSessionLocal() as session:
+            await _hot_paths(session)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    dialect = engine.dialect.name
+    prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in captured:
+            result = await conn.exec_driver_sql(prefix + statement, parameters)
+            rows = result.all()
+            lines = [row[3] for row in rows] if dialect == "sqlite" else [row[0] for row in rows]
+            plans.append((statement, lines))
+    return plans
+
+
+def _problems(statement, lines):
+    # Sorting a handful of rows is fine; sorting everything to return one page is not
+    paged = " LIMIT " in statement.upper()
+    problems = []
+    for line in lines:
+        line = line.strip()
+        # SQLite: "SCAN orders" is a full scan; "SCAN orders USING INDEX ..." walks an index in order
+        full_scan = re.match(r"SCAN (\w+)(?: AS \w+)?$", line)
+        # Postgres: "Seq Scan on orders  (cost=...)"
+        seq_scan = re.search(r"Seq Scan on (\w+)", line)
+        table = (full_scan or seq_scan).group(1) if (full_scan or seq_scan) else None
+        if table in LARGE_TABLES:
+            problems.append(line)
+        if paged and "USE TEMP B-TREE FOR ORDER BY" in line:
+            problems.append(line)
+    return problems
+
+
+@pytest.fixture(scope="module")
+def plans(reset_database):
+    async def run():
+        await _seed(reset_database)
+        try:
+            return await _capture_and_explain()
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def test_hot_queries_were_captured(plans):
+    assert len(plans) >= 15, f"expected the hot paths to issue their queries, got {len(plans)}"
+
+
+def test_hot_queries_use_indexes(plans):
+    failures = []
+    for statement, lines in plans:
+        problems = _problems(statement, lines)
+        if problems:
+            failures.append(f"{' '.join(statement.split())[:300]}\n    -> " + "\n    -> ".join(problems))
+    assert not failures, "Query plan regressions:\n" + "\n\n".join(failures)
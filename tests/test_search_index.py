@@ -0,0 +1,92 @@
+"""
+SQLite search mirror tests: a process that never ran ensure_search_index
+(job workers, scripts) still keeps the FTS5 table current, and startup
+repairs mirror rows whose text differs even when the row counts match.
+
+Run: python -m pytest -q tests/test_search_index.py
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert, text, update
+
+from app.core.database import engine, AsyncSessionLocal
+from app.modules.catalog import search
+from app.modules.catalog.models import Product
+
+if engine.dialect.name != "sqlite":
+    pytest.skip("FTS5 mirror is SQLite only", allow_module_level=True)
+
+
+async def _seed(reset_database):
+    await reset_database()
+    async with engine.begin() as conn:
+        await search.ensure_search_index(conn)
+        await conn.execute(text(f"DELETE FROM {search.FTS_TABLE}"))
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(Product), [{"id": "p", "name": "Old Name", "slug": "old-name", "status": "Active"}])
+        await search.index_products(session, ["p"])
+        await session.commit()
+
+
+async def _mirrored():
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(
+            text(f"SELECT document FROM {search.FTS_TABLE} WHERE product_id = 'p'")
+        )).scalars().all()
+
+
+async def _rename(session):
+    await session.execute(update(Product).where(Product.id == "p").values(name="New Name"))
+
+
+@pytest.fixture(autouse=True)
+def search_state(monkeypatch):
+    # ensure_search_index sets module state; keep it to this module's tests
+    monkeypatch.setattr(search, "_state", search._SearchState())
+
+
+def test_writes_keep_mirror_without_fts_backend(reset_database, monkeypatch):
+    async def run():
+        try:
+            await _seed(reset_database)
+            # A process whose backend was never picked by ensure_search_index
+            monkeypatch.setattr(search, "_state", search._SearchState())
+            async with AsyncSessionLocal() as session:
+                await _rename(session)
+                await search.index_products(session, ["p"])
+                await session.commit()
+            return search._state.backend, await _mirrored()
+        finally:
+            await engine.dispose()
+
+    backend, mirrored = asyncio.run(run())
+    assert backend == "like"
+    assert mirrored == ["new name old name"]
+
+
+def test_startup_repairs_stale_mirror_with_matching_count(reset_database, monkeypatch):
+    async def run():
+        try:
+            await _seed(reset_database)
+            # A document rewritten without touching the mirror: counts still match
+            async with AsyncSessionLocal() as session:
+                await _rename(session)
+                has_fts = search._has_fts
+                monkeypatch.setattr(search, "_has_fts", lambda executor: asyncio.sleep(0, False))
+                await search.index_products(session, ["p"])
+                monkeypatch.setattr(search, "_has_fts", has_fts)
+                await session.commit()
+            stale = await _mirrored()
+            async with engine.begin() as conn:
+                await search.ensure_search_index(conn)
+            async with AsyncSessionLocal() as session:
+                found = (await session.execute(search.search_matches("new"))).all()
+            return stale, await _mirrored(), found
+        finally:
+            await engine.dispose()
+
+    stale, mirrored, found = asyncio.run(run())
+    assert stale == ["old name old name"]
+    assert mirrored == ["new name old name"]
+    assert [product_id for product_id, score in found] == ["p"]
@@ -0,0 +1,58 @@
+"""
+Store settings snapshot cache tests: concurrent misses share one reload, and
+a reload that overlaps a settings write is returned but not cached.
+
+Run: python -m pytest -q tests/test_settings_cache.py
+"""
+import asyncio
+
+import pytest
+
+from app.core.database import engine
+from app.modules.settings import settings_cache
+
+
+@pytest.fixture(scope="module", autouse=True)
+def database(reset_database):
+    asyncio.run(reset_database())
+    yield
+    asyncio.run(engine.dispose())
+
+
+def _run(coro):
+    async def run():
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def test_concurrent_misses_share_one_reload(record_queries):
+    statements = record_queries("FROM store_settings")
+    settings_cache.invalidate_store_settings()
+
+    async def run():
+        return await asyncio.gather(*[settings_cache.get_maintenance_snapshot() for _ in range(20)])
+
+    snapshots = _run(run())
+    assert len(statements) == 1
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+def test_reload_overlapping_a_write_is_not_cached(record_queries):
+    statements = record_queries("FROM store_settings")
+    settings_cache.invalidate_store_settings()
+
+    async def run():
+        stale = asyncio.ensure_future(settings_cache.get_maintenance_snapshot())
+        await asyncio.sleep(0)  # the reload has started
+        settings_cache.invalidate_store_settings()
+        await stale
+        cached_after_stale = settings_cache._cache.fresh()
+        await settings_cache.get_maintenance_snapshot()
+        return cached_after_stale, settings_cache._cache.fresh()
+
+    cached_after_stale, cached_after_reload = _run(run())
+    assert not cached_after_stale and cached_after_reload
+    assert len(statements) == 2